@@ -0,0 +1,53 @@
+"""
+Compact per-session answer storage for the Online Examination System
+
+An exam session keeps only its question ids and an AnswerSheet: one 2-bit
+choice per question plus one "answered" bit, packed into two bytearrays.
+Question text and options are never copied into session state; anything
+that needs them is rebuilt from the shared question cache.
+"""
+
+OPTIONS = 'ABCD'
+OPTION_CODES = {letter: code for code, letter in enumerate(OPTIONS)}
+
+
+class AnswerSheet:
+    """Answers to a fixed-length paper, indexed by question position"""
+    __slots__ = ('length', '_choices', '_answered')
+
+    def __init__(self, length):
+        self.length = length
+        self._choices = bytearray((length + 3) // 4)
+        self._answered = bytearray((length + 7) // 8)
+
+    def __len__(self):
+        return self.length
+
+    def get(self, position):
+        """The letter chosen for the question at position, or None"""
+        if not self._answered[position >> 3] & (1 << (position & 7)):
+            return None
+        return OPTIONS[(self._choices[position >> 2] >> ((position & 3) * 2)) & 3]
+
+    def set(self, position, letter):
+        """Record letter ('A'-'D') for the question at position; None clears it"""
+        if not 0 <= position < self.length:
+            raise IndexError(f"question position {position} out of range")
+        shift = (position & 3) * 2
+        self._choices[position >> 2] &= ~(3 << shift) & 0xFF
+        if letter is None:
+            self._answered[position >> 3] &= ~(1 << (position & 7)) & 0xFF
+            return
+        self._choices[position >> 2] |= OPTION_CODES[letter] << shift
+        self._answered[position >> 3] |= 1 << (position & 7)
+
+    def clear(self):
+        self._choices[:] = bytes(len(self._choices))
+        self._answered[:] = bytes(len(self._answered))
+
+    def answered_count(self):
+        return sum(bin(byte).count('1') for byte in self._answered)
+
+    def letters(self):
+        """Every position's letter (or None) in paper order"""
+        return [self.get(position) for position in range(self.length)]
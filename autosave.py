@@ -0,0 +1,193 @@
+"""
+Per-answer autosave for exams in progress
+
+Every answer change is recorded in an in-process AnswerBuffer instead of being
+written straight to SQLite. A background thread flushes the buffer every
+flush_interval seconds, or as soon as max_pending changes are waiting, as one
+batched transaction into attempt_answers. Repeated changes to the same
+question between flushes collapse into one row, so the write rate is bounded
+by the flush rate rather than by how often students click. On submission an
+attempt's still-buffered changes are taken out of the buffer and written in
+the same transaction that grades it.
+
+attempt_answers is keyed by (attempt_id, question_id). Attempt ids only grow,
+so new rows are appended at the end of the table's B-tree; each row carries
+the sequence number of the change it holds and a flush never overwrites a
+newer change with an older one.
+"""
+import atexit
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CREATE_EXAM_ATTEMPTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS exam_attempts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL,
+        category_id INTEGER NOT NULL,
+        question_ids BLOB NOT NULL,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        result_id INTEGER,
+        FOREIGN KEY (student_id) REFERENCES students (id),
+        FOREIGN KEY (category_id) REFERENCES categories (id),
+        FOREIGN KEY (result_id) REFERENCES exam_results (id)
+    )
+'''
+
+# A NULL answer records a cleared question
+CREATE_ATTEMPT_ANSWERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS attempt_answers (
+        attempt_id INTEGER NOT NULL,
+        question_id INTEGER NOT NULL,
+        answer CHAR(1) CHECK (answer IN ('A', 'B', 'C', 'D')),
+        sequence INTEGER NOT NULL,
+        PRIMARY KEY (attempt_id, question_id),
+        FOREIGN KEY (attempt_id) REFERENCES exam_attempts (id),
+        FOREIGN KEY (question_id) REFERENCES questions (id)
+    ) WITHOUT ROWID
+'''
+
+# A stored answer is only replaced by a later change
+UPSERT_ATTEMPT_ANSWER = '''
+    INSERT INTO attempt_answers (attempt_id, question_id, answer, sequence)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (attempt_id, question_id) DO UPDATE SET
+        answer = excluded.answer,
+        sequence = excluded.sequence
+    WHERE excluded.sequence > attempt_answers.sequence
+'''
+
+
+class AnswerBuffer:
+    """Process-wide buffer of answer changes, flushed to attempt_answers in batches"""
+
+    def __init__(self, db, max_pending=500, flush_interval=1.0):
+        self.db = db
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+
+        self._pending = {}  # (attempt_id, question_id) -> (sequence, answer)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        # Seeded from the clock so a restarted process still writes newer sequences
+        self._sequence = itertools.count(time.time_ns())
+        self._stats = {
+            'recorded': 0,
+            'coalesced': 0,
+            'flushes': 0,
+            'rows_written': 0,
+            'rows_taken': 0,
+            'failed_flushes': 0,
+            'max_pending': 0,
+            'flush_seconds': 0.0,
+        }
+
+    def start(self):
+        """Start the flush thread and flush what is left at interpreter exit"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='answer-autosave', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def record(self, attempt_id, answers):
+        """Buffer (question_id, answer) changes for one attempt; None clears an answer"""
+        with self._lock:
+            for question_id, answer in answers:
+                key = (attempt_id, question_id)
+                if key in self._pending:
+                    self._stats['coalesced'] += 1
+                self._pending[key] = (next(self._sequence), answer)
+                self._stats['recorded'] += 1
+            pending = len(self._pending)
+            if pending > self._stats['max_pending']:
+                self._stats['max_pending'] = pending
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def take(self, attempt_id):
+        """Remove and return one attempt's buffered changes as write_attempt_answers rows.
+
+        Waits for a flush in progress, so every earlier change of the attempt
+        is either stored or returned.
+        """
+        with self._flush_lock, self._lock:
+            keys = [key for key in self._pending if key[0] == attempt_id]
+            self._stats['rows_taken'] += len(keys)
+            return [(attempt_id, key[1], self._pending[key][1], self._pending.pop(key)[0]) for key in keys]
+
+    def restore(self, rows):
+        """Put rows returned by take() back, unless a newer change was recorded since"""
+        with self._lock:
+            for attempt_id, question_id, answer, sequence in rows:
+                key = (attempt_id, question_id)
+                if key not in self._pending or self._pending[key][0] < sequence:
+                    self._pending[key] = (sequence, answer)
+
+    def flush(self):
+        """Write every buffered change in one transaction; returns the rows written.
+
+        Changes are put back into the buffer if the write fails.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                self.db.write_attempt_answers([
+                    (attempt_id, question_id, answer, sequence)
+                    for (attempt_id, question_id), (sequence, answer) in batch.items()
+                ])
+            except Exception:
+                with self._lock:
+                    for key, change in batch.items():
+                        # Keep any change recorded while this flush was running
+                        if key not in self._pending or self._pending[key][0] < change[0]:
+                            self._pending[key] = change
+                    self._stats['failed_flushes'] += 1
+                raise
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += len(batch)
+                self._stats['flush_seconds'] += time.perf_counter() - started
+            return len(batch)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing autosaved answers: {e}")
+
+    def close(self, timeout=30.0):
+        """Stop the flush thread and write everything still buffered"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._wakeup.set()
+            self._thread.join(timeout)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing autosaved answers: {e}")
+
+    def stats(self):
+        """Snapshot of buffered, coalesced and flushed change counts"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['pending'] = len(self._pending)
+        snapshot['average_flush_rows'] = (
+            snapshot['rows_written'] / snapshot['flushes'] if snapshot['flushes'] else 0.0
+        )
+        snapshot['flush_seconds'] = round(snapshot['flush_seconds'], 4)
+        return snapshot
@@ -0,0 +1,207 @@
+"""
+Answer autosave throughput during a simulated full cohort
+
+Every student in the cohort starts an attempt, then answers each question of
+the paper (changing some answers more than once) at an even pace over an
+exam window of --duration seconds, and submits near its end. The timeline is
+replayed in real time by a pool of worker threads. Two write paths are
+compared:
+
+  direct    one transaction per answer change (what naive autosave would do)
+  buffered  changes go through the AnswerBuffer and are flushed in batches
+            (an attempt's unflushed changes are written with its submission)
+
+Reported: the offered and sustained answer changes per second, rows per
+second written to attempt_answers, commits, how far the replay fell behind
+its schedule, p50/p99 latency of recording one change and p50/p99 submission
+latency (submissions are graded from the stored answers). With
+--group-commit, submissions go through the group-commit queue
+(EXAM_GROUP_COMMIT=1) and share transactions.
+
+    python benchmarks/bench_autosave.py [--students 2000] [--duration 10] [--threads 16] [--group-commit] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import percentile
+
+import database  # noqa: E402
+
+
+class DirectWriter:
+    """Write every answer change in its own transaction"""
+
+    def __init__(self, db):
+        self.db = db
+        self._sequence = iter(range(1, 1 << 62))
+        self._lock = threading.Lock()
+        self.commits = 0
+
+    def record(self, attempt_id, question_id, answer):
+        with self._lock:
+            sequence = next(self._sequence)
+            self.commits += 1
+        self.db.write_attempt_answers([(attempt_id, question_id, answer, sequence)])
+
+
+def seed_questions(db, category_id, count):
+    """Top the category up to count synthetic questions"""
+    from question_import import question_hash
+
+    existing = db.get_questions_count_by_category(category_id)
+    db.bulk_insert_questions([
+        (text, 'one', 'two', 'three', 'four', 'B', category_id, 'Medium',
+         question_hash(text, 'one', 'two', 'three', 'four'))
+        for text in (f'Autosave benchmark question {n}?' for n in range(existing, count))
+    ])
+
+
+def cohort_events(args, attempt_ids, paper):
+    """(seconds, attempt_id, question_id, answer) answer changes plus (seconds, attempt_id) submissions.
+
+    Each student works through the paper at an even pace over the exam
+    window and submits somewhere in its last 30%.
+    """
+    rng = random.Random(0)
+    events = []
+    for attempt_id in attempt_ids:
+        finish = args.duration * rng.uniform(0.7, 1.0)
+        changes = [
+            (question_id, rng.choice('ABCD'))
+            for question_id in paper
+            for _ in range(1 + (rng.random() < args.change_rate))
+        ]
+        for index, (question_id, answer) in enumerate(changes):
+            events.append((finish * (index + rng.random()) / (len(changes) + 1), attempt_id, question_id, answer))
+        events.append((finish, attempt_id))
+    events.sort()
+    return events
+
+
+def run_cohort(db_path, mode, args):
+    db = database.ExamDatabase(db_path, pool_size=args.threads + 2)
+    category_id = db.get_all_categories()[0].db_id
+    seed_questions(db, category_id, args.length)
+    paper = [question.db_id for question in db.build_exam(category_id, 0, args.length)]
+    attempt_ids = [
+        db.start_attempt(db.register_student(f'{mode.upper()}{number:06d}', f'Student {number}'), category_id, paper)
+        for number in range(args.students)
+    ]
+    events = cohort_events(args, attempt_ids, paper)
+    if args.group_commit:
+        db.enable_submission_queue()
+
+    if mode == 'buffered':
+        buffer = db.enable_autosave(flush_interval=args.flush_interval, max_pending=args.max_pending)
+
+        def record(attempt_id, question_id, answer):
+            db.record_answers(attempt_id, [(question_id, answer)])
+    else:
+        direct = DirectWriter(db)
+        record = direct.record
+
+    record_latencies = []
+    submit_latencies = []
+    lags = []
+    lock = threading.Lock()
+    next_event = iter(events)
+
+    def worker():
+        while True:
+            with lock:
+                event = next(next_event, None)
+            if event is None:
+                return
+            delay = started + event[0] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            began = time.perf_counter()
+            if len(event) == 4:
+                record(*event[1:])
+                timings = record_latencies
+            else:
+                db.submit_attempt(event[1], int(event[0]))
+                timings = submit_latencies
+            finished = time.perf_counter()
+            with lock:
+                timings.append(finished - began)
+                lags.append(max(0.0, began - started - event[0]))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as executor:
+        for future in [executor.submit(worker) for _ in range(args.threads)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    submit_commits = db.submission_stats()['batches'] if args.group_commit else len(submit_latencies)
+
+    if mode == 'buffered':
+        stats = buffer.stats()
+        buffer.close()
+        commits = stats['flushes']
+        rows_written = stats['rows_written'] + stats['rows_taken']
+    else:
+        commits = direct.commits
+        rows_written = direct.commits
+    db.pool.close_all()
+
+    record_latencies.sort()
+    submit_latencies.sort()
+    lags.sort()
+    return {
+        'mode': mode,
+        'seconds': round(elapsed, 3),
+        'changes': len(record_latencies),
+        'offered_changes_per_second': round(len(record_latencies) / args.duration, 1),
+        'changes_per_second': round(len(record_latencies) / elapsed, 1),
+        'rows_written_per_second': round(rows_written / elapsed, 1),
+        'answer_commits': commits,
+        'schedule_lag_p99_ms': round(percentile(lags, 0.99) * 1000, 3),
+        'schedule_lag_max_ms': round(lags[-1] * 1000, 3) if lags else 0.0,
+        'record_p50_ms': round(percentile(record_latencies, 0.50) * 1000, 3),
+        'record_p99_ms': round(percentile(record_latencies, 0.99) * 1000, 3),
+        'submit_p50_ms': round(percentile(submit_latencies, 0.50) * 1000, 3),
+        'submit_p99_ms': round(percentile(submit_latencies, 0.99) * 1000, 3),
+        'submit_commits': submit_commits,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--duration', type=float, default=10.0, help="exam window in seconds")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--length', type=int, default=20, help="questions per paper")
+    parser.add_argument('--change-rate', type=float, default=0.3,
+                        help="fraction of questions whose answer is changed once more")
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    parser.add_argument('--max-pending', type=int, default=500)
+    parser.add_argument('--group-commit', action='store_true', help="submit through the group-commit queue")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('direct', 'buffered'):
+            results.append(run_cohort(os.path.join(tmp, f'{mode}.db'), mode, args))
+
+    print(f"{args.students} students over {args.duration:g}s, {args.threads} threads, "
+          f"{args.length} questions each" + (", group commit" if args.group_commit else ""))
+    columns = list(results[0])[1:]
+    print(f"{'':<30}" + ''.join(f"{result['mode']:>14}" for result in results))
+    for column in columns:
+        print(f"{column:<30}" + ''.join(f"{result[column]:>14}" for result in results))
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
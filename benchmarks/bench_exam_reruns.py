@@ -0,0 +1,190 @@
+"""
+Server work per completed exam in the Streamlit app
+
+Drives main.py through Streamlit's AppTest: register, answer every question,
+move through the paper with NEXT and submit. Counts full script runs (each
+calls st.set_page_config), ExamDatabase API calls and SQL statements, plus
+server time, per interaction and per completed exam.
+
+AppTest always reruns the whole script, whereas the browser scopes a rerun
+to the fragment containing the widget. So when the app has registered a
+fragment, answer and NEXT interactions are replayed as fragment reruns.
+With --client-mode (EXAM_CLIENT_MODE=1) the paper is answered in the
+browser, and the single submission the component would send is injected as
+its widget value.
+
+    python benchmarks/bench_exam_reruns.py [--exams 5] [--length 20] [--app path/to/main.py] [--client-mode] [--json out.json]
+
+Pass --app with an older main.py (e.g. from `git show <rev>:main.py`) to
+compare before and after a change.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+
+class Counter:
+    def __init__(self):
+        self.full_runs = 0
+        self.fragment_runs = 0
+        self.api_calls = 0
+
+
+def instrument(db, counter):
+    """Count full script runs and ExamDatabase API calls made by the app"""
+    import streamlit as st
+
+    set_page_config = st.set_page_config
+
+    def counting_set_page_config(*args, **kwargs):
+        counter.full_runs += 1
+        return set_page_config(*args, **kwargs)
+
+    st.set_page_config = counting_set_page_config
+
+    for name in dir(type(db)):
+        method = getattr(db, name)
+        if name.startswith('_') or not callable(method):
+            continue
+
+        def counting(*args, __method=method, **kwargs):
+            counter.api_calls += 1
+            return __method(*args, **kwargs)
+
+        setattr(db, name, counting)
+
+
+def seed_questions(db, per_category):
+    """Top every category up to per_category synthetic questions"""
+    from question_import import question_hash
+
+    for category in db.get_all_categories():
+        existing = db.get_questions_count_by_category(category.db_id)
+        db.bulk_insert_questions([
+            (text, 'one', 'two', 'three', 'four', 'B', category.db_id, 'Medium',
+             question_hash(text, 'one', 'two', 'three', 'four'))
+            for text in (f'{category.name} benchmark question {n}?' for n in range(existing, per_category))
+        ])
+
+
+def submit_client_exam(at, answer):
+    """Send the exam_client component's one submission, answering every question"""
+    component = next(element for element in at.main
+                     if str(getattr(element.proto, 'id', '')).endswith('exam_client'))
+    paper = json.loads(component.proto.json_args)['questions']
+    states = at._tree.get_widget_states()
+    state = states.widgets.add()
+    state.id = component.proto.id
+    state.json_value = json.dumps({
+        'submission_id': f'bench-{id(at)}',
+        'answers': {str(question['id']): answer for question in paper}
+    })
+    return at._run(states)
+
+
+def take_exam(app_path, number, counter, client_mode=False):
+    """Complete one exam; returns the number of interactions and server seconds"""
+    from streamlit.testing.v1 import AppTest, local_script_runner
+
+    interactions = 0
+    seconds = 0.0
+    rerun_data = local_script_runner.RerunData
+
+    def run(element, in_fragment=False):
+        nonlocal interactions, seconds
+        # Scope the rerun like the browser would for a widget inside a fragment
+        fragment_ids = list(at._fragment_storage._fragments)
+        if in_fragment and fragment_ids:
+            local_script_runner.RerunData = functools.partial(rerun_data, fragment_id=fragment_ids[-1])
+            counter.fragment_runs += 1
+        started = time.perf_counter()
+        try:
+            app = element() if callable(element) else element.run()
+        finally:
+            local_script_runner.RerunData = rerun_data
+        seconds += time.perf_counter() - started
+        interactions += 1
+        assert not app.exception, app.exception
+
+    at = AppTest.from_file(app_path, default_timeout=60)
+    run(at)
+    run(at.button(key='home_start_btn').click())
+    run(at.text_input(key='name_input').input(f'Bench Student {number}'))
+    run(at.text_input(key='id_input').input(f'BENCH{number:05d}'))
+    run(at.button(key='next_btn').click())
+    if client_mode:
+        run(functools.partial(submit_client_exam, at, 'B'))
+        return interactions, seconds
+    while True:
+        run(at.radio[0].set_value('B'), in_fragment=True)
+        labels = [button.label for button in at.button]
+        if 'SUBMIT EXAM' in labels:
+            run(at.button[labels.index('SUBMIT EXAM')].click(), in_fragment=True)
+            break
+        run(at.button[labels.index('NEXT')].click(), in_fragment=True)
+    return interactions, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--exams', type=int, default=5)
+    parser.add_argument('--length', type=int, default=20, help="questions per exam (EXAM_LENGTH)")
+    parser.add_argument('--app', default=os.path.join(REPO, 'main.py'))
+    parser.add_argument('--client-mode', action='store_true',
+                        help="answer the paper in the exam_client component (EXAM_CLIENT_MODE=1)")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['EXAM_DB_PATH'] = os.path.join(tmp, 'bench.db')
+        os.environ['EXAM_LENGTH'] = str(args.length)
+        os.environ['EXAM_CLIENT_MODE'] = '1' if args.client_mode else '0'
+        # SQL statements are counted through the query instrumentation
+        os.environ['EXAM_DB_INSTRUMENT'] = '1'
+        import database
+
+        db = database.exam_db
+        seed_questions(db, args.length)
+        db.reset_query_stats()
+        counter = Counter()
+        instrument(db, counter)
+
+        interactions = 0
+        seconds = 0.0
+        for number in range(args.exams):
+            exam_interactions, exam_seconds = take_exam(args.app, number, counter, args.client_mode)
+            interactions += exam_interactions
+            seconds += exam_seconds
+
+        statements = sum(stats['count'] for stats in db.query_stats()['methods'].values())
+        db.pool.close_all()
+
+    result = {
+        'app': args.app,
+        'client_mode': args.client_mode,
+        'exams': args.exams,
+        'questions_per_exam': args.length,
+        'interactions_per_exam': round(interactions / args.exams, 1),
+        'full_runs_per_exam': round(counter.full_runs / args.exams, 1),
+        'fragment_runs_per_exam': round(counter.fragment_runs / args.exams, 1),
+        'api_calls_per_exam': round(counter.api_calls / args.exams, 1),
+        'sql_statements_per_exam': round(statements / args.exams, 1),
+        'server_ms_per_interaction': round(seconds * 1000 / interactions, 2)
+    }
+    for key, value in result.items():
+        print(f"{key:<28}{value}")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(result, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
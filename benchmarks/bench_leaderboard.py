@@ -0,0 +1,125 @@
+"""
+Leaderboard read cost as exam_results grows
+
+Fills a scratch database with random results in steps and, at every size,
+times three reads for one category:
+
+  sort_all      best attempt per student ranked straight from exam_results
+                (what a leaderboard costs without the top-K table)
+  leaderboard   the top-K read from leaderboard_entries (uncached)
+  board_rank    the rank of a student on the top-K board, read from its entries
+  student_rank  the rank of a random student, mostly off the board and so
+                counted over the (category_id, percentage, time_taken) index
+
+plus the insert cost per result, which now includes the leaderboard upkeep.
+
+    python benchmarks/bench_leaderboard.py [--sizes 10000,100000,400000] [--students 20000] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Timing is done here, so skip the per-statement instrumentation
+os.environ.setdefault('EXAM_DB_INSTRUMENT', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+SORT_ALL_SQL = '''
+    SELECT student_id, id, percentage, time_taken
+    FROM (
+        SELECT student_id, id, percentage, time_taken,
+               ROW_NUMBER() OVER (PARTITION BY student_id ORDER BY percentage DESC, time_taken, id) AS position
+        FROM exam_results
+        WHERE category_id = ?
+    )
+    WHERE position = 1
+    ORDER BY percentage DESC, time_taken, id
+    LIMIT ?
+'''
+
+
+def median_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def grow(db, rng, students, category_ids, count, batch_size=5000):
+    """Insert count random results; returns seconds per result"""
+    started = time.perf_counter()
+    for first in range(0, count, batch_size):
+        rows = []
+        for _ in range(min(batch_size, count - first)):
+            score = rng.randint(0, 20)
+            rows.append((rng.choice(students), rng.choice(category_ids), score, 20, score * 5.0,
+                         rng.randint(60, 1200)))
+        db.save_exam_results(rows)
+    return (time.perf_counter() - started) / count if count else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,400000', help="comma-separated result counts")
+    parser.add_argument('--students', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=10, help="leaderboard rows read")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = database.ExamDatabase(os.path.join(tmp, 'leaderboard.db'))
+        category_ids = [category.db_id for category in db.get_all_categories()]
+        ids, _ = db.bulk_upsert_students([(f'LB{n:06d}', f'Student {n}', None) for n in range(args.students)])
+        students = list(ids.values())
+        category_id = category_ids[0]
+
+        size = 0
+        for target in sorted(int(value) for value in args.sizes.split(',')):
+            insert_seconds = grow(db, rng, students, category_ids, target - size)
+            size = target
+            conn = db.get_connection()
+            try:
+                sort_all = median_ms(
+                    lambda: conn.execute(SORT_ALL_SQL, (category_id, args.limit)).fetchall(),
+                    max(1, args.repeat // 4)
+                )
+            finally:
+                conn.close()
+            leaderboard = median_ms(lambda: db._load_leaderboard((category_id, args.limit)), args.repeat)
+            board = [entry.student_db_id for entry in db._load_leaderboard((category_id, args.repeat))]
+            board_rank = median_ms(lambda: db.get_student_rank(board.pop(), category_id), len(board))
+            sample = rng.sample(students, args.repeat)
+            rank = median_ms(lambda: db.get_student_rank(sample.pop(), category_id), args.repeat)
+            results.append({
+                'results': size,
+                'sort_all_ms': sort_all,
+                'leaderboard_ms': leaderboard,
+                'board_rank_ms': board_rank,
+                'student_rank_ms': rank,
+                'insert_us_per_result': round(insert_seconds * 1e6, 2)
+            })
+        db.pool.close_all()
+
+    columns = list(results[0])
+    print(''.join(f"{column:>22}" for column in columns))
+    for result in results:
+        print(''.join(f"{result[column]:>22}" for column in columns))
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
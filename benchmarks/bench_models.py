@@ -0,0 +1,131 @@
+"""
+Model layer benchmark: tuple-backed models vs sqlite3.Row
+
+Fills a scratch database with exam results, then for each row representation
+measures fetch throughput, retained memory of the fetched list (tracemalloc),
+and the cost of converting every row to a dict and to columns.
+
+    python benchmarks/bench_models.py [--rows 200000] [--json models.json]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import ExamResult  # noqa: E402
+
+QUERY = f'''
+    SELECT {ExamResult.COLUMNS}
+    FROM exam_results er
+    JOIN students s ON er.student_id = s.id
+    JOIN categories c ON er.category_id = c.id
+'''
+
+
+def build_database(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE categories (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE students (id INTEGER PRIMARY KEY, student_id TEXT, full_name TEXT);
+        CREATE TABLE exam_results (
+            id INTEGER PRIMARY KEY, student_id INTEGER, category_id INTEGER, score INTEGER,
+            total_questions INTEGER, percentage REAL, time_taken INTEGER, submitted_at TEXT
+        );
+    ''')
+    conn.executemany('INSERT INTO categories VALUES (?, ?)',
+                     [(i, f'Category {i}') for i in range(1, 5)])
+    conn.executemany('INSERT INTO students VALUES (?, ?, ?)',
+                     [(i, f'S{i:06d}', f'Student {i}') for i in range(1, 10001)])
+    conn.executemany(
+        'INSERT INTO exam_results VALUES (NULL, ?, ?, ?, 20, ?, ?, ?)',
+        (
+            (random.randint(1, 10000), random.randint(1, 4), score, score * 5.0,
+             random.randint(60, 3600), '2026-01-01 10:00:00')
+            for score in (random.randint(0, 20) for _ in range(rows))
+        )
+    )
+    conn.commit()
+    conn.close()
+
+
+def fetch(path, row_factory):
+    conn = sqlite3.connect(path)
+    conn.row_factory = row_factory
+    started = time.perf_counter()
+    rows = conn.execute(QUERY).fetchall()
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return rows, elapsed
+
+
+def measure(path, name, row_factory, to_dicts, to_columns):
+    fetch(path, row_factory)  # warm the page cache
+
+    tracemalloc.start()
+    rows, fetch_seconds = fetch(path, row_factory)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    to_dicts(rows)
+    dict_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    to_columns(rows)
+    column_seconds = time.perf_counter() - started
+
+    return {
+        'representation': name,
+        'rows': len(rows),
+        'fetch_rows_per_second': round(len(rows) / fetch_seconds),
+        'retained_bytes_per_row': round(retained / len(rows), 1),
+        'to_dicts_seconds': round(dict_seconds, 4),
+        'to_columns_seconds': round(column_seconds, 4)
+    }
+
+
+def row_to_columns(rows):
+    keys = rows[0].keys()
+    return {key: [row[key] for row in rows] for key in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'models.db')
+        build_database(path, args.rows)
+        results = [
+            measure(path, 'sqlite3.Row', sqlite3.Row,
+                    lambda rows: [dict(row) for row in rows], row_to_columns),
+            measure(path, 'tuple', None,
+                    lambda rows: [dict(zip(ExamResult.FIELDS, row)) for row in rows],
+                    lambda rows: dict(zip(ExamResult.FIELDS, map(list, zip(*rows))))),
+            measure(path, 'models.ExamResult', ExamResult.row_factory,
+                    ExamResult.to_dicts, ExamResult.to_columns),
+        ]
+
+    header = f"{'representation':<20}{'rows/s':>12}{'bytes/row':>12}{'to_dicts s':>12}{'to_columns s':>14}"
+    print(header)
+    for result in results:
+        print(f"{result['representation']:<20}{result['fetch_rows_per_second']:>12}"
+              f"{result['retained_bytes_per_row']:>12}{result['to_dicts_seconds']:>12}"
+              f"{result['to_columns_seconds']:>14}")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Per-session exam state memory: dict-of-copies vs ids plus packed answers
+
+Builds the exam state that many concurrent sessions would keep after
+submitting, in three layouts, and measures the retained bytes per session
+with tracemalloc. The shared question bank is allocated before measuring, as
+it lives in the process-wide cache.
+
+  original  answers {'q_<id>': letter} plus a results list of dicts holding
+            copies of each question's text, options, category and difficulty
+  shared    the same answers dict plus results dicts referencing the shared
+            Question records
+  lean      an array of question ids plus an AnswerSheet (2-bit choices)
+
+    python benchmarks/bench_session_state.py [--sessions 2000] [--length 20] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_sheet import AnswerSheet  # noqa: E402
+from models import Question  # noqa: E402
+
+
+def build_bank(size):
+    return [
+        Question(
+            question_id,
+            f'Question {question_id}: which of the following statements about topic {question_id % 97} is true?',
+            f'The first option for question {question_id}',
+            f'The second option for question {question_id}',
+            f'The third option for question {question_id}',
+            f'The fourth option for question {question_id}',
+            random.choice('ABCD'),
+            1,
+            'Computer Science',
+            random.choice(('Easy', 'Medium', 'Hard'))
+        )
+        for question_id in range(1, size + 1)
+    ]
+
+
+def copy(text):
+    """A distinct copy of text, like a string read from a fresh database row"""
+    return text.encode('utf-8').decode('utf-8')
+
+
+def original_state(paper, letters):
+    answers = {f'q_{question.db_id}': letter for question, letter in zip(paper, letters)}
+    results = [
+        {
+            'question': copy(question.question_text),
+            'user_answer': letter,
+            'correct_answer': question.correct_answer,
+            'is_correct': letter == question.correct_answer,
+            'options': {option: copy(text) for option, text in question.options.items()},
+            'category': copy(question.category_name),
+            'difficulty': question.difficulty_level
+        }
+        for question, letter in zip(paper, letters)
+    ]
+    return {'answers': answers, 'results': results}
+
+
+def shared_state(paper, letters):
+    answers = {f'q_{question.db_id}': letter for question, letter in zip(paper, letters)}
+    results = [
+        {'question': question, 'user_answer': letter, 'is_correct': letter == question.correct_answer}
+        for question, letter in zip(paper, letters)
+    ]
+    return {'answers': answers, 'results': results}
+
+
+def lean_state(paper, letters):
+    answers = AnswerSheet(len(paper))
+    for position, letter in enumerate(letters):
+        answers.set(position, letter)
+    return {'exam_question_ids': array('q', (question.db_id for question in paper)), 'answers': answers}
+
+
+def measure(layout, papers, answer_letters):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    sessions = [layout(paper, letters) for paper, letters in zip(papers, answer_letters)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return (after - before) / len(papers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--length', type=int, default=20)
+    parser.add_argument('--bank', type=int, default=1000, help="questions in the shared bank")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    random.seed(0)
+    bank = build_bank(args.bank)
+    papers = [random.sample(bank, args.length) for _ in range(args.sessions)]
+    answer_letters = [[random.choice('ABCD') for _ in range(args.length)] for _ in range(args.sessions)]
+
+    results = []
+    for name, layout in (('original', original_state), ('shared', shared_state), ('lean', lean_state)):
+        per_session = measure(layout, papers, answer_letters)
+        results.append({'layout': name, 'bytes_per_session': round(per_session, 1)})
+
+    baseline = results[0]['bytes_per_session']
+    print(f"{args.sessions} sessions, {args.length} questions each")
+    print(f"{'layout':<12}{'bytes/session':>16}{'vs original':>14}")
+    for result in results:
+        result['ratio_to_original'] = round(result['bytes_per_session'] / baseline, 3)
+        print(f"{result['layout']:<12}{result['bytes_per_session']:>16}{result['ratio_to_original']:>14}")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Startup cost benchmark
+
+Measures, in fresh interpreters, how long `import database` takes, which
+modules dominate it (via -X importtime), and how long the first query takes
+against a new and an already-initialized database.
+
+    python benchmarks/bench_startup.py [--runs 10] [--json startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = '''
+import time
+started = time.perf_counter()
+import database
+print(time.perf_counter() - started)
+'''
+
+FIRST_QUERY_SNIPPET = '''
+import sys, time
+started = time.perf_counter()
+import database
+db = database.ExamDatabase(sys.argv[1])
+db.get_all_categories()
+print(time.perf_counter() - started)
+'''
+
+
+def run_python(code, *args, extra_flags=()):
+    completed = subprocess.run(
+        [sys.executable, *extra_flags, '-c', code, *args],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    return completed
+
+
+def time_runs(code, runs, *args):
+    return [float(run_python(code, *args).stdout.strip()) * 1000 for _ in range(runs)]
+
+
+def top_imports(limit=10):
+    """Slowest modules by cumulative import time, in milliseconds"""
+    completed = run_python('import database', extra_flags=('-X', 'importtime'))
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative_us) / 1000, name.strip()))
+    entries.sort(reverse=True)
+    return entries[:limit]
+
+
+def summarize(samples):
+    return {
+        'min_ms': round(min(samples), 2),
+        'median_ms': round(statistics.median(samples), 2),
+        'max_ms': round(max(samples), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    report = {'import_database': summarize(time_runs(IMPORT_SNIPPET, args.runs))}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh = [time_runs(FIRST_QUERY_SNIPPET, 1, os.path.join(tmp, f'fresh{i}.db'))[0]
+                 for i in range(args.runs)]
+        existing_db = os.path.join(tmp, 'existing.db')
+        time_runs(FIRST_QUERY_SNIPPET, 1, existing_db)
+        existing = time_runs(FIRST_QUERY_SNIPPET, args.runs, existing_db)
+    report['first_query_new_db'] = summarize(fresh)
+    report['first_query_existing_db'] = summarize(existing)
+    report['top_imports_ms'] = [{'module': name, 'cumulative_ms': ms} for ms, name in top_imports()]
+
+    for name in ('import_database', 'first_query_new_db', 'first_query_existing_db'):
+        stats = report[name]
+        print(f"{name:<26} median {stats['median_ms']:8.2f} ms  "
+              f"(min {stats['min_ms']:.2f}, max {stats['max_ms']:.2f})")
+    print("\nSlowest imports (cumulative):")
+    for entry in report['top_imports_ms']:
+        print(f"  {entry['cumulative_ms']:8.2f} ms  {entry['module']}")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
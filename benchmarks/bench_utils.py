@@ -0,0 +1,13 @@
+"""
+Helpers shared by the benchmark scripts
+
+Importing this module puts the repository root on sys.path, so the scripts
+can import the app modules when run as python benchmarks/<script>.py.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The rerun profiler reports the same percentiles, so there is one definition
+from rerun_profiler import percentile  # noqa: E402,F401
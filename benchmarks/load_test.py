@@ -0,0 +1,188 @@
+"""
+Concurrent load test for the ExamDatabase API
+
+Spawns simulated students across worker processes, each running several
+threads. Every student drives the real sequence
+
+    register_student -> get_questions_by_category -> save_exam_result -> get_all_results
+
+against a scratch database; --history-fraction lowers the share of students
+that open their results history (default: all of them). Instrumentation is off
+unless EXAM_DB_INSTRUMENT is set. The report gives throughput and p50/p95/p99
+latency per method, failed calls, and the connection pools' lock-error and
+retry counts, and can be saved as JSON to compare runs.
+
+    python benchmarks/load_test.py --processes 4 --threads 16 --students 2000 --json run.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from bench_utils import percentile
+
+# Measure the API, not the query instrumentation
+os.environ.setdefault('EXAM_DB_INSTRUMENT', '0')
+
+import database  # noqa: E402
+
+METHODS = ('register_student', 'get_questions_by_category', 'save_exam_result', 'get_all_results')
+
+
+def simulate_student(db, number, categories, history_fraction, samples, errors, errors_lock):
+    """Run one student's session, recording per-method latencies in seconds"""
+    rng = random.Random(number)
+
+    def count_error(name):
+        with errors_lock:
+            errors[name] += 1
+
+    def timed(method, *args):
+        # A failed call is counted and the session carries on with the next step
+        started = time.perf_counter()
+        try:
+            return getattr(db, method)(*args)
+        except sqlite3.Error:
+            count_error('failed_' + method)
+            return None
+        finally:
+            samples[method].append(time.perf_counter() - started)
+
+    student_db_id = timed('register_student', f'LOAD{number:07d}', f'Load Student {number}')
+    if student_db_id is None:
+        # register_student also reports failures by returning None
+        count_error('failed_register_student')
+        return
+    category_id = rng.choice(categories)
+    questions = timed('get_questions_by_category', category_id) or []
+    score = sum(rng.random() < 0.6 for _ in questions)
+    total = len(questions) or 1
+    if not timed('save_exam_result', student_db_id, category_id, score, total,
+                 score * 100.0 / total, rng.randint(60, 1800)):
+        count_error('failed_save_exam_result')
+    if rng.random() < history_fraction:
+        timed('get_all_results')
+
+
+def run_worker(db_path, first_student, student_count, threads, history_fraction, queue):
+    """Process entry point: run student_count students on a thread pool"""
+    db = database.ExamDatabase(db_path)
+    categories = [category.db_id for category in db.get_all_categories()]
+    samples = {method: [] for method in METHODS}
+    errors = {'failed_' + method: 0 for method in METHODS}
+    counter = iter(range(first_student, first_student + student_count))
+    counter_lock = threading.Lock()
+
+    def work():
+        while True:
+            with counter_lock:
+                number = next(counter, None)
+            if number is None:
+                return
+            simulate_student(db, number, categories, history_fraction, samples, errors, counter_lock)
+
+    pool = [threading.Thread(target=work) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    queue.put({'samples': samples, 'errors': errors, 'pool': db.pool_stats()})
+
+
+def run_load_test(db_path, processes, threads, students, history_fraction=1.0):
+    # Create and seed the scratch database once before the workers start
+    database.ExamDatabase(db_path).get_all_categories()
+
+    queue = multiprocessing.Queue()
+    per_process = -(-students // processes)
+    workers = []
+    started = time.perf_counter()
+    for index in range(processes):
+        first = index * per_process
+        count = max(0, min(per_process, students - first))
+        worker = multiprocessing.Process(target=run_worker, args=(db_path, first, count, threads, history_fraction, queue))
+        worker.start()
+        workers.append(worker)
+    reports = [queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    samples = {method: [] for method in METHODS}
+    errors = {}
+    pools = []
+    for report in reports:
+        for method, values in report['samples'].items():
+            samples[method].extend(values)
+        for name, count in report['errors'].items():
+            errors[name] = errors.get(name, 0) + count
+        pools.append(report['pool'])
+
+    methods = {}
+    for method, values in samples.items():
+        values.sort()
+        methods[method] = {
+            'calls': len(values),
+            'throughput_per_second': round(len(values) / elapsed, 1),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+            'max_ms': round((values[-1] if values else 0.0) * 1000, 3)
+        }
+
+    return {
+        'config': {'processes': processes, 'threads': threads, 'students': students,
+                   'history_fraction': history_fraction},
+        'elapsed_seconds': round(elapsed, 3),
+        'students_per_second': round(students / elapsed, 1),
+        'methods': methods,
+        'errors': errors,
+        # The API methods retry and swallow lock errors, so the pools are where they show up
+        'pool_lock_errors': sum(pool['lock_errors'] for pool in pools),
+        'pool_retries': sum(pool['retries'] for pool in pools),
+        'pool_waits': sum(pool['waits'] for pool in pools)
+    }
+
+
+def print_report(report):
+    config = report['config']
+    print(f"{config['students']} students, {config['processes']} processes x {config['threads']} threads "
+          f"in {report['elapsed_seconds']}s ({report['students_per_second']} students/s)")
+    print(f"{'method':<28}{'calls':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for method, stats in report['methods'].items():
+        print(f"{method:<28}{stats['calls']:>8}{stats['throughput_per_second']:>10}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    print(f"errors: {report['errors']}")
+    print(f"pool lock errors: {report['pool_lock_errors']}  pool retries: {report['pool_retries']}  "
+          f"pool waits: {report['pool_waits']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the ExamDatabase API")
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--history-fraction', type=float, default=1.0,
+                        help="share of students that call get_all_results (default: 1.0)")
+    parser.add_argument('--db', help="database file to use (default: a scratch file)")
+    parser.add_argument('--json', help="write the report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, 'load_test.db')
+        report = run_load_test(db_path, args.processes, args.threads, args.students,
+                               args.history_fraction)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
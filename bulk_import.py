@@ -0,0 +1,101 @@
+"""
+Shared file reading and reporting for the bulk importers
+
+question_import and roster_import stream rows from CSV, NDJSON or JSON-array
+files and count what happened to them in an ImportReport.
+"""
+import csv
+import json
+import os
+import time
+
+# Keep only the first few validation errors in the report
+MAX_REPORTED_ERRORS = 20
+
+
+def _iter_json_array(handle, read_size=65536):
+    """Yield objects from a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    while True:
+        chunk = handle.read(read_size)
+        buffer += chunk
+        position = 0
+        while True:
+            # Skip whitespace, the opening bracket and separators
+            while position < len(buffer) and buffer[position] in ' \t\r\n,[':
+                if buffer[position] == '[':
+                    started = True
+                position += 1
+            if position >= len(buffer) or buffer[position] == ']':
+                break
+            if not started:
+                raise ValueError("Expected a JSON array")
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break  # Incomplete object - read more
+            yield item
+            position = end
+        buffer = buffer[position:]
+        if not chunk:
+            return
+
+
+def read_rows(path, kind, json_array=True):
+    """Stream dicts from a .csv, .ndjson/.jsonl or (if json_array) .json file of kind rows"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8') as handle:
+        if extension == '.csv':
+            yield from csv.DictReader(handle)
+        elif extension in ('.ndjson', '.jsonl'):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        elif extension == '.json' and json_array:
+            yield from _iter_json_array(handle)
+        else:
+            raise ValueError(f"Unsupported {kind} file type: {extension}")
+
+
+class ImportReport:
+    """Counters and throughput for one import run.
+
+    counters names the per-import counters, in report order; each starts at 0.
+    """
+
+    def __init__(self, *counters):
+        self.counters = counters
+        self.rows_read = 0
+        for name in counters:
+            setattr(self, name, 0)
+        self.errors = []
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def reject(self, line_number, error):
+        """Count an invalid row, keeping its error if fewer than MAX_REPORTED_ERRORS are kept"""
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"row {line_number}: {error}")
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+        return self
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        report = {'rows_read': self.rows_read}
+        report.update((name, getattr(self, name)) for name in self.counters)
+        report.update({
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': self.errors
+        })
+        return report
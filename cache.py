@@ -0,0 +1,221 @@
+"""
+In-process caches shared by every session of the Online Examination System
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class QuestionBankCache:
+    """Process-wide LRU cache of question lists keyed by category.
+
+    Entries are dropped whenever the questions change counter moves, which is
+    polled at most once per check_interval seconds. Eviction is bounded by the
+    total number of cached questions (sizeof of each entry) so large banks
+    cannot grow without limit.
+    """
+
+    def __init__(self, loader, version_reader, max_questions=50000, check_interval=1.0,
+                 sizeof=len):
+        self.loader = loader
+        self.version_reader = version_reader
+        self.max_questions = max_questions
+        self.check_interval = check_interval
+        self.sizeof = sizeof
+
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _check_version(self):
+        """Clear the cache if the underlying table changed since the last poll"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        version = self.version_reader()
+        with self._lock:
+            self._checked_at = now
+            if version != self._version:
+                if self._version is not None:
+                    self._stats['invalidations'] += 1
+                self._entries.clear()
+                self._size = 0
+                self._version = version
+
+    def get(self, category_id):
+        """Return the cached questions for category_id, loading them on a miss"""
+        self._check_version()
+        with self._lock:
+            entry = self._entries.get(category_id)
+            if entry is not None:
+                self._entries.move_to_end(category_id)
+                self._stats['hits'] += 1
+                return entry
+            load_lock = self._load_locks.setdefault(category_id, threading.Lock())
+
+        # Only one thread loads a given category; the rest wait and reuse it
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(category_id)
+                if entry is not None:
+                    self._stats['hits'] += 1
+                    return entry
+                version = self._version
+            entry = self.loader(category_id)
+            with self._lock:
+                self._stats['misses'] += 1
+                self._load_locks.pop(category_id, None)
+                if version == self._version and self.sizeof(entry) <= self.max_questions:
+                    self._store(category_id, entry)
+            return entry
+
+    def _store(self, category_id, entry):
+        """Insert entry and evict least recently used categories over the bound"""
+        self._entries[category_id] = entry
+        self._size += self.sizeof(entry)
+        while self._size > self.max_questions and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= self.sizeof(evicted)
+            self._stats['evictions'] += 1
+
+    def invalidate(self, category_id=None):
+        """Drop one category, or everything when category_id is None"""
+        with self._lock:
+            if category_id is None:
+                self._entries.clear()
+                self._size = 0
+            else:
+                entry = self._entries.pop(category_id, None)
+                if entry is not None:
+                    self._size -= self.sizeof(entry)
+            self._checked_at = 0.0
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        """Snapshot of hit/miss/eviction counters"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['categories'] = len(self._entries)
+            snapshot['questions'] = self._size
+        return snapshot
+
+
+class TTLCache:
+    """Process-wide cache whose entries expire ttl seconds after loading.
+
+    Used for small, hot query results that every session shows, so concurrent
+    visitors share one query per key per ttl. Loads are single-flight.
+    """
+
+    def __init__(self, loader, ttl=2.0, max_entries=128):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'expirations': 0, 'invalidations': 0}
+
+    def _fresh(self, key):
+        """Return the unexpired entry for key or None (caller holds the lock)"""
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        loaded_at, entry = item
+        if time.monotonic() - loaded_at >= self.ttl:
+            del self._entries[key]
+            self._stats['expirations'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return item
+
+    def get(self, key):
+        """Return the cached value for key, loading it if missing or expired"""
+        with self._lock:
+            item = self._fresh(key)
+            if item is not None:
+                self._stats['hits'] += 1
+                return item[1]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                item = self._fresh(key)
+                if item is not None:
+                    self._stats['hits'] += 1
+                    return item[1]
+                generation = self._generation
+            entry = self.loader(key)
+            with self._lock:
+                self._stats['misses'] += 1
+                self._load_locks.pop(key, None)
+                # An invalidation during the load means the value may be stale
+                if generation == self._generation:
+                    self._entries[key] = (time.monotonic(), entry)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return entry
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._generation += 1
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        """Snapshot of hit/miss/expiry counters"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['entries'] = len(self._entries)
+        return snapshot
+
+
+class LRUCache:
+    """Bounded, thread-safe mapping that forgets the least recently used keys"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        """Return the value for key, or None if it is not cached"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def put_many(self, items):
+        """Insert or refresh (key, value) pairs, evicting beyond max_entries"""
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def stats(self):
+        """Snapshot of hit/miss/eviction counters"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['entries'] = len(self._entries)
+        return snapshot
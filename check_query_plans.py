@@ -0,0 +1,163 @@
+"""
+Query plan check for ExamDatabase
+
+Runs every ExamDatabase query against a scratch database, captures the SQL
+actually executed through a trace callback and runs EXPLAIN QUERY PLAN on it.
+Exits with status 1 if any statement falls back to a full table scan, other
+than those of the rebuild commands and the statements in ALLOWED_SCANS.
+
+    python check_query_plans.py
+"""
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+import database
+
+# A plan step like "SCAN er" (SQLite 3.36+) or "SCAN TABLE exam_results AS er"
+# (older releases) is a full scan of the table, or of an index it walks in order
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING .*)?$')
+
+# Statements that are not queries over table data
+SKIPPED_PREFIXES = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'CREATE', 'EXPLAIN')
+
+# A scan in rowid or index order that stops at a LIMIT, with no filter to
+# skip rows and no sort before it
+BOUNDED_SCAN = re.compile(r' ORDER BY [^()]* LIMIT \S+$')
+SORTED_PLAN = 'USE TEMP B-TREE FOR ORDER BY'
+
+# ExamDatabase methods that recompute derived tables from every result
+# (manage.py rebuild-*). They are full scans by design, so exercise() does
+# not call them.
+REBUILD_METHODS = ('rebuild_leaderboards', 'rebuild_rollups', 'rebuild_student_summaries')
+
+# Statements meant to read every row of their table
+ALLOWED_SCANS = (
+    # The category list: a handful of rows, in name order
+    re.compile(r'^SELECT .* FROM categories (c LEFT JOIN .* )?ORDER BY (c\.)?name$'),
+    # Exports and the full results listing, in submission order
+    re.compile(r'^SELECT [^()]* FROM exam_results er JOIN students s .* ORDER BY er\.submitted_at DESC(, er\.id DESC)?$'),
+)
+
+
+def exercise(db):
+    """Call every ExamDatabase query with representative arguments"""
+    student_db_id = db.register_student('PLAN1', 'Plan Check')
+    db.bulk_upsert_students([('PLAN2', 'Plan Roster', None), ('PLAN1', 'Plan Check', 'plan@example.com')])
+    db.preload_student_ids(10)
+    db.get_student_by_id(student_db_id)
+    categories = db.get_all_categories()
+    db._load_category_catalog()
+    category_id = categories[0].db_id
+    db.get_category_name(category_id)
+    new_category_id, _ = db.get_or_create_category('Plan Check')
+    db.bulk_insert_questions([
+        ('Plan?', 'a', 'b', 'c', 'd', 'A', new_category_id, 'Easy', 'plan-check-hash')
+    ])
+    db.get_change_version('questions')
+    db._load_questions_by_category(category_id)
+    db.get_questions_count_by_category(category_id)
+    question_id = db.get_answer_key(category_id)[0]['id']
+    db.save_exam_result(student_db_id, category_id, 4, 5, 80.0, 120, answers={question_id: 'A'})
+    attempt_id = db.start_attempt(student_db_id, category_id, [question_id])
+    db.record_answers(attempt_id, [(question_id, 'B')])
+    db.get_attempt_answers(attempt_id)
+    db.submit_attempt(attempt_id, 60)
+    db.submit_attempt(attempt_id, 60)
+    for _ in db.iter_category_answers(category_id):
+        pass
+    db.update_result_scores([(5, 100.0, 1)])
+    db.write_question_stats(category_id, [(question_id, 1, 1.0, None, 1, 0, 0, 0)])
+    db._load_question_stats(category_id)
+    db.get_all_results()
+    db.get_recent_student_attempts(5)
+    db.get_student_results(student_db_id)
+    history = db._load_student_dashboard(student_db_id)
+    db.get_student_results_page(student_db_id, 1, history['next_cursor'] or ('2100-01-01', 0))
+    db._load_leaderboard((category_id, 10))
+    db.get_student_rank(student_db_id, category_id)
+    # Off the board, the rank is counted from exam_results; the delete goes
+    # through its own connection so it is not traced as an app statement
+    conn = sqlite3.connect(db.db_name)
+    conn.execute('DELETE FROM leaderboard_entries WHERE student_id = ?', (student_db_id,))
+    conn.commit()
+    conn.close()
+    db.get_student_rank(student_db_id, category_id)
+
+    filter_sets = [
+        {},
+        {'category_id': category_id},
+        {'student_id': 'PLAN1'},
+        {'date_from': '2000-01-01', 'date_to': '2100-01-01'},
+        {'grade': 'B'},
+    ]
+    for filters in filter_sets:
+        db.get_results_summary(**filters)
+        for _ in db.export_results(**filters):
+            pass
+        for sort_by in database.RESULT_SORT_COLUMNS:
+            for descending in (True, False):
+                page = db.get_results_page(page_size=1, sort_by=sort_by,
+                                           descending=descending, **filters)
+                db.get_results_page(page_size=1, cursor=page['next_cursor'] or (0, 0),
+                                    sort_by=sort_by, descending=descending, **filters)
+
+
+def collect_statements(db):
+    """Run exercise(db) and return the distinct SQL statements it executed"""
+    statements = []
+    conn = db.get_connection()
+    conn.set_trace_callback(statements.append)
+    conn.close()
+    try:
+        exercise(db)
+    finally:
+        conn = db.get_connection()
+        conn.set_trace_callback(None)
+        conn.close()
+    seen = []
+    for statement in statements:
+        statement = statement.strip()
+        if statement.upper().startswith(SKIPPED_PREFIXES) or statement in seen:
+            continue
+        seen.append(statement)
+    return seen
+
+
+def find_full_scans(db):
+    """Return (statement, plan step) pairs for every full table scan"""
+    statements = collect_statements(db)
+    conn = db.get_connection()
+    scans = []
+    try:
+        for statement in statements:
+            plan = [row['detail'] for row in conn.execute(f'EXPLAIN QUERY PLAN {statement}')]
+            flat = ' '.join(statement.split())
+            allowed = any(pattern.search(flat) for pattern in ALLOWED_SCANS) or (
+                BOUNDED_SCAN.search(flat) and ' WHERE ' not in flat and SORTED_PLAN not in plan
+            )
+            for detail in plan:
+                if FULL_SCAN.match(detail) and not allowed:
+                    scans.append((statement, detail))
+    finally:
+        conn.close()
+    return statements, scans
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        # A single pooled connection so the trace callback sees every statement
+        db = database.ExamDatabase(os.path.join(tmp, 'plans.db'), pool_size=1)
+        statements, scans = find_full_scans(db)
+        db.pool.close_all()
+
+    print(f"Checked {len(statements)} statements")
+    for statement, detail in scans:
+        print(f"\nFULL SCAN ({detail}):\n{' '.join(statement.split())}")
+    return 1 if scans else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+SQLite connection pooling for the Online Examination System
+"""
+import queue
+import random
+import sqlite3
+import threading
+import time
+
+
+def is_lock_error(error):
+    """Return True if error is a transient 'database is locked/busy' failure"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+class PooledConnection:
+    """Proxy around a pooled sqlite3 connection; close() returns it to the pool"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._conn.__exit__(exc_type, exc_value, traceback)
+
+    @property
+    def raw(self):
+        """The underlying sqlite3.Connection"""
+        return self._conn
+
+    def close(self):
+        """Hand the connection back to the pool instead of closing it"""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared across threads"""
+
+    def __init__(self, db_name, max_size=8, busy_timeout=5.0, journal_mode='WAL', synchronous='FULL',
+                 acquire_timeout=30.0, max_retries=5, retry_delay=0.05, factory=sqlite3.Connection):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.busy_timeout = busy_timeout
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.acquire_timeout = acquire_timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.factory = factory
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'retries': 0,
+            'lock_errors': 0,
+            'connections_created': 0,
+        }
+
+    def _create_connection(self):
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            factory=self.factory
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}')
+        if self.journal_mode:
+            conn.execute(f'PRAGMA journal_mode = {self.journal_mode}')
+        if self.synchronous:
+            # FULL fsyncs every commit, so a committed submission survives a power loss;
+            # under WAL, NORMAL only fsyncs at checkpoints and can lose the last commits
+            conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        return conn
+
+    def acquire(self, timeout=None):
+        """Check out a connection, opening a new one while below max_size"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+
+        if conn is None:
+            with self._lock:
+                can_create = self._created < self.max_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._create_connection()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                with self._lock:
+                    self._stats['connections_created'] += 1
+            else:
+                started = time.perf_counter()
+                wait_timeout = self.acquire_timeout if timeout is None else timeout
+                try:
+                    conn = self._idle.get(timeout=wait_timeout)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f"No database connection available after {wait_timeout}s "
+                        f"(pool size {self.max_size})"
+                    )
+                with self._lock:
+                    self._stats['waits'] += 1
+                    self._stats['wait_time'] += time.perf_counter() - started
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection to the idle set, discarding any open transaction"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            # Broken connection - drop it so a fresh one can be opened
+            with self._lock:
+                self._created -= 1
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return
+        self._idle.put(conn)
+
+    def run_with_retry(self, func, *args, **kwargs):
+        """Call func, retrying with exponential backoff on lock errors"""
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_lock_error(e):
+                    raise
+                with self._lock:
+                    self._stats['lock_errors'] += 1
+                if attempt >= self.max_retries:
+                    raise
+                with self._lock:
+                    self._stats['retries'] += 1
+                delay = self.retry_delay * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+                attempt += 1
+
+    def stats(self):
+        """Snapshot of pool counters for sizing the pool"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['open_connections'] = self._created
+        snapshot['idle_connections'] = self._idle.qsize()
+        snapshot['in_use'] = snapshot['open_connections'] - snapshot['idle_connections']
+        snapshot['max_size'] = self.max_size
+        return snapshot
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            conn.close()
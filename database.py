@@ -1,21 +1,202 @@
+import csv
+import io
+import json
+import logging
+import os
 import sqlite3
-import pandas as pd
+import threading
+import zlib
+from array import array
+from concurrent.futures import Future
 from datetime import datetime
+from autosave import UPSERT_ATTEMPT_ANSWER, AnswerBuffer
+from connection_pool import ConnectionPool
+from instrumentation import QueryStats
+from cache import LRUCache, QuestionBankCache, TTLCache
+from migrations import LATEST_VERSION, apply_migrations, get_schema_version
+import latest_attempts
+import leaderboards
+import rollups
+import student_summaries
+from submission_queue import SUBMIT_ACK_TIMEOUT, SubmissionWriter
+from question_import import question_hash
+from models import (Category, CategorySummary, ExamResult, LeaderboardEntry, Question, QuestionStats, Student,
+                    StudentCategorySummary)
+from exam_sampling import DifficultyIndex, sample_exam
+
+logger = logging.getLogger(__name__)
+
+# Percentage bands (lower inclusive, upper exclusive) for each grade
+GRADE_BANDS = {
+    'A': (90, None),
+    'B': (80, 90),
+    'C': (70, 80),
+    'D': (60, 70),
+    'F': (None, 60)
+}
+
+# Columns the results history can be sorted by (each backed by an index)
+RESULT_SORT_COLUMNS = {
+    'submitted_at': 'er.submitted_at',
+    'percentage': 'er.percentage'
+}
+
+# Attempts per page of a student's own history
+STUDENT_HISTORY_PAGE_SIZE = 20
+
+# Column headings of the results export, in order
+EXPORT_COLUMNS = ['Student Name', 'Student ID', 'Category', 'Score', 'Percentage', 'Grade', 'Date']
+
+def grade_for_percentage(percentage):
+    """Get the letter grade for a percentage"""
+    for grade, (low, high) in GRADE_BANDS.items():
+        if (low is None or percentage >= low) and (high is None or percentage < high):
+            return grade
+    return 'F'
 
 class ExamDatabase:
-    def __init__(self, db_name='exam_system.db'):
+    def __init__(self, db_name='exam_system.db', pool_size=None, busy_timeout=None):
         self.db_name = db_name
-        self.init_database()
+        if pool_size is None:
+            pool_size = int(os.environ.get('EXAM_DB_POOL_SIZE', 8))
+        if busy_timeout is None:
+            busy_timeout = float(os.environ.get('EXAM_DB_BUSY_TIMEOUT', 5.0))
+        # Statements are timed only when EXAM_DB_INSTRUMENT=1
+        self.instrumentation = None
+        factory = sqlite3.Connection
+        if os.environ.get('EXAM_DB_INSTRUMENT', '0') == '1':
+            slow_query_ms = float(os.environ.get('EXAM_DB_SLOW_QUERY_MS', 200))
+            self.instrumentation = QueryStats(type(self), slow_query_ms=slow_query_ms)
+            factory = self.instrumentation.connect
+        # Commits are fsync'd unless EXAM_DB_SYNCHRONOUS=NORMAL trades durability for speed
+        synchronous = os.environ.get('EXAM_DB_SYNCHRONOUS', 'FULL')
+        self.pool = ConnectionPool(db_name, max_size=pool_size, busy_timeout=busy_timeout,
+                                   synchronous=synchronous, factory=factory)
+        cache_size = int(os.environ.get('EXAM_QUESTION_CACHE_SIZE', 50000))
+        self.question_cache = QuestionBankCache(
+            self._load_questions_by_category,
+            lambda: self.get_change_version('questions'),
+            max_questions=cache_size
+        )
+        # Per-category difficulty strata used to sample and grade exam papers. Loaded
+        # straight from the database: going through question_cache, whose own version
+        # poll can lag this one, could store an old answer key under the new version
+        self.exam_index_cache = QuestionBankCache(
+            lambda category_id: DifficultyIndex(self._load_questions_by_category(category_id)),
+            lambda: self.get_change_version('questions'),
+            max_questions=cache_size
+        )
+        # Categories with question counts for the registration page
+        self.catalog_cache = QuestionBankCache(
+            lambda _: self._load_category_catalog(),
+            lambda: self.get_change_version('questions'),
+            check_interval=float(os.environ.get('EXAM_CATALOG_CHECK_INTERVAL', 5.0))
+        )
+        # Item analysis per category, reloaded when an analysis run writes new statistics
+        self.question_stats_cache = QuestionBankCache(
+            self._load_question_stats,
+            lambda: self.get_change_version('question_stats'),
+            max_questions=cache_size
+        )
+        # Homepage feed of recent attempts, shared by every visitor
+        self.recent_attempts_cache = TTLCache(
+            self._load_recent_student_attempts,
+            ttl=float(os.environ.get('EXAM_RECENT_FEED_TTL', 2.0))
+        )
+        # Category leaderboards, dropped on every local submission
+        self.leaderboard_cache = TTLCache(
+            self._load_leaderboard,
+            ttl=float(os.environ.get('EXAM_LEADERBOARD_TTL', 5.0))
+        )
+        # Each student's history dashboard, dropped when they submit
+        self.student_dashboard_cache = TTLCache(
+            self._load_student_dashboard,
+            ttl=float(os.environ.get('EXAM_STUDENT_DASHBOARD_TTL', 30.0)),
+            max_entries=int(os.environ.get('EXAM_STUDENT_DASHBOARD_CACHE_SIZE', 10000))
+        )
+        # External student_id -> students.id; the mapping never changes once assigned
+        self.student_id_cache = LRUCache(int(os.environ.get('EXAM_STUDENT_ID_CACHE_SIZE', 100000)))
+        self.submission_writer = None
+        self.answer_buffer = None
+        
+        # The database is opened lazily, on the first query
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    def ensure_initialized(self):
+        """Bring the schema up to date once, before the first query"""
+        with self._init_lock:
+            if self._initialized:
+                return
+            self.init_database()
+            self._initialized = True
+            if os.environ.get('EXAM_PRELOAD_STUDENT_IDS') == '1':
+                self.preload_student_ids()
+            if os.environ.get('EXAM_GROUP_COMMIT') == '1':
+                self.enable_submission_queue()
     
     def get_connection(self):
-        """Create and return database connection"""
-        conn = sqlite3.connect(self.db_name)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Check out a pooled database connection (close() returns it to the pool)"""
+        if not self._initialized:
+            self.ensure_initialized()
+        return self.pool.acquire()
+    
+    def fetch_models(self, model, sql, params=()):
+        """Run a query with model.row_factory registered and return all instances"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = model.row_factory
+            return cursor.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+    
+    def iter_models(self, model, sql, params=(), chunk_size=1000):
+        """Stream model instances from a query as lists of up to chunk_size"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = model.row_factory
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+    
+    def pool_stats(self):
+        """Get connection pool counters (checkouts, waits, retries)"""
+        return self.pool.stats()
+    
+    def query_stats(self):
+        """Get per-method and per-statement query timings and recent slow queries"""
+        if self.instrumentation is None:
+            return None
+        return self.instrumentation.snapshot()
+    
+    def reset_query_stats(self):
+        """Clear the query timings and the slow-query log"""
+        if self.instrumentation is not None:
+            self.instrumentation.reset()
     
     def init_database(self):
         """Initialize database with proper tables"""
-        conn = self.get_connection()
+        conn = self.pool.acquire()
+        try:
+            # An up-to-date database needs nothing beyond this one header read
+            if get_schema_version(conn) == LATEST_VERSION:
+                return
+            self._create_schema(conn)
+        finally:
+            conn.close()
+    
+    def _create_schema(self, conn):
+        """Create missing tables, run migrations and seed a brand-new database"""
+        is_new = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'categories'"
+        ).fetchone()[0] == 0
         cursor = conn.cursor()
         
         # Create categories table
@@ -65,26 +246,55 @@ class ExamDatabase:
                 score INTEGER NOT NULL,
                 total_questions INTEGER NOT NULL,
                 percentage REAL NOT NULL,
-                time_taken INTEGER DEFAULT 0,
+                time_taken INTEGER NOT NULL DEFAULT 0,
                 submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (student_id) REFERENCES students (id),
                 FOREIGN KEY (category_id) REFERENCES categories (id)
             )
         ''')
         
-        # Insert default categories if they don't exist
-        cursor.execute("SELECT COUNT(*) FROM categories")
-        if cursor.fetchone()[0] == 0:
-            self.insert_default_categories(cursor)
+        # Change counters let in-process caches detect writes cheaply
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_counters (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO change_counters (name, version) VALUES ('questions', 0)")
         
-        # Insert sample questions if table is empty
-        cursor.execute("SELECT COUNT(*) FROM questions")
-        if cursor.fetchone()[0] == 0:
-            self.insert_sample_questions(cursor)
+        # Any write to questions or categories bumps the 'questions' counter
+        for table in ('questions', 'categories'):
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE change_counters SET version = version + 1 WHERE name = 'questions';
+                    END
+                ''')
         
         conn.commit()
-        conn.close()
-        print("Database initialized successfully with proper tables!")
+        
+        # Upgrade the schema in place (indexes etc.)
+        apply_migrations(conn)
+        
+        # Seed only on first creation; the write lock keeps concurrent workers from seeding twice
+        if is_new:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                cursor.execute("SELECT COUNT(*) FROM categories")
+                if cursor.fetchone()[0] == 0:
+                    self.insert_default_categories(cursor)
+                
+                cursor.execute("SELECT COUNT(*) FROM questions")
+                if cursor.fetchone()[0] == 0:
+                    self.insert_sample_questions(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        
+        logger.info("Database initialized successfully with proper tables!")
     
     def insert_default_categories(self, cursor):
         """Insert default categories"""
@@ -99,7 +309,7 @@ class ExamDatabase:
             'INSERT INTO categories (name, description) VALUES (?, ?)',
             categories
         )
-        print("Inserted default categories!")
+        logger.info("Inserted default categories!")
     
     def insert_sample_questions(self, cursor):
         """Insert sample questions into database"""
@@ -318,12 +528,12 @@ class ExamDatabase:
             }
         ]
         
-        for question in sample_questions:
-            cursor.execute('''
-                INSERT INTO questions (question_text, option_a, option_b, option_c, option_d, 
-                                     correct_answer, category_id, difficulty_level)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+        cursor.executemany('''
+            INSERT INTO questions (question_text, option_a, option_b, option_c, option_d, 
+                                 correct_answer, category_id, difficulty_level, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (
                 question['question_text'],
                 question['option_a'],
                 question['option_b'],
@@ -331,136 +541,1050 @@ class ExamDatabase:
                 question['option_d'],
                 question['correct_answer'],
                 question['category_id'],
-                question['difficulty']
-            ))
+                question['difficulty'],
+                question_hash(
+                    question['question_text'],
+                    question['option_a'],
+                    question['option_b'],
+                    question['option_c'],
+                    question['option_d']
+                )
+            )
+            for question in sample_questions
+        ])
         
-        print(f"Inserted {len(sample_questions)} sample questions!")
+        logger.info(f"Inserted {len(sample_questions)} sample questions!")
     
     # Student Management
     def register_student(self, student_id, full_name, email=None):
         """Register a new student or return existing one"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        if not self._initialized:
+            self.ensure_initialized()
+        # Students already on a loaded roster are answered from memory
+        student_db_id = self.student_id_cache.get(student_id)
+        if student_db_id is not None:
+            return student_db_id
+        
+        def _register():
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO students (student_id, full_name, email)
+                    VALUES (?, ?, ?)
+                ''', (student_id, full_name, email))
+                
+                # Get student ID
+                cursor.execute('SELECT id FROM students WHERE student_id = ?', (student_id,))
+                result = cursor.fetchone()
+                
+                conn.commit()
+                return result['id'] if result else None
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
         
         try:
-            cursor.execute('''
-                INSERT OR IGNORE INTO students (student_id, full_name, email)
-                VALUES (?, ?, ?)
-            ''', (student_id, full_name, email))
-            
-            # Get student ID
-            cursor.execute('SELECT id FROM students WHERE student_id = ?', (student_id,))
-            result = cursor.fetchone()
-            
-            conn.commit()
-            return result['id'] if result else None
-            
+            student_db_id = self.pool.run_with_retry(_register)
         except Exception as e:
-            conn.rollback()
-            print(f"Error registering student: {e}")
+            logger.error(f"Error registering student: {e}")
             return None
+        if student_db_id is not None:
+            self.student_id_cache.put(student_id, student_db_id)
+        return student_db_id
+    
+    def bulk_upsert_students(self, students):
+        """Upsert (student_id, full_name, email) tuples in one transaction.
+        
+        Existing students keep their email when the new one is None. Returns
+        ({student_id: db_id}, number of newly created students) and caches
+        the ids for register_student.
+        """
+        def _upsert():
+            conn = self.get_connection()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                # Ids above the current maximum were created by this batch
+                last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM students').fetchone()[0]
+                conn.executemany('''
+                    INSERT INTO students (student_id, full_name, email)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (student_id) DO UPDATE SET
+                        full_name = excluded.full_name,
+                        email = COALESCE(excluded.email, email)
+                ''', students)
+                rows = conn.execute(
+                    'SELECT student_id, id FROM students WHERE student_id IN (SELECT value FROM json_each(?))',
+                    (json.dumps([student[0] for student in students]),)
+                ).fetchall()
+                conn.commit()
+                return rows, last_id
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        rows, last_id = self.pool.run_with_retry(_upsert)
+        ids = {row[0]: row[1] for row in rows}
+        self.student_id_cache.put_many(ids.items())
+        return ids, sum(1 for student_db_id in ids.values() if student_db_id > last_id)
+    
+    def preload_student_ids(self, limit=None):
+        """Fill the student id cache with the most recently added students"""
+        limit = limit or self.student_id_cache.max_entries
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                'SELECT student_id, id FROM students ORDER BY id DESC LIMIT ?', (limit,)
+            ).fetchall()
         finally:
             conn.close()
+        # Oldest first so the newest end up most recently used
+        self.student_id_cache.put_many((row[0], row[1]) for row in reversed(rows))
+        return len(rows)
     
     def get_student_by_id(self, student_db_id):
         """Get student by database ID"""
-        conn = self.get_connection()
-        student = conn.execute(
-            'SELECT * FROM students WHERE id = ?', (student_db_id,)
-        ).fetchone()
-        conn.close()
-        return student
+        students = self.fetch_models(
+            Student, f'SELECT {Student.COLUMNS} FROM students WHERE id = ?', (student_db_id,)
+        )
+        return students[0] if students else None
     
     # Category Management
     def get_all_categories(self):
         """Get all available categories"""
-        conn = self.get_connection()
-        categories = conn.execute(
-            'SELECT id, name, description FROM categories ORDER BY name'
-        ).fetchall()
-        conn.close()
-        return categories
+        return self.fetch_models(
+            Category, f'SELECT {Category.COLUMNS} FROM categories ORDER BY name'
+        )
+    
+    def get_category_catalog(self):
+        """Get every category with its question counts, from the shared catalog cache"""
+        return self.catalog_cache.get('catalog')
+    
+    def _load_category_catalog(self):
+        """Load categories and their per-difficulty question counts in one query"""
+        return tuple(self.fetch_models(CategorySummary, '''
+            SELECT c.id, c.name, c.description,
+                   COALESCE(n.total, 0), COALESCE(n.easy, 0), COALESCE(n.medium, 0), COALESCE(n.hard, 0)
+            FROM categories c
+            LEFT JOIN (
+                SELECT category_id,
+                       COUNT(*) AS total,
+                       SUM(difficulty_level = 'Easy') AS easy,
+                       SUM(difficulty_level = 'Medium') AS medium,
+                       SUM(difficulty_level = 'Hard') AS hard
+                FROM questions
+                GROUP BY category_id
+            ) n ON n.category_id = c.id
+            ORDER BY c.name
+        '''))
+    
+    def get_or_create_category(self, name, description=None):
+        """Get a category ID by name, creating the category if needed.
+        
+        Returns (category_id, created).
+        """
+        def _get_or_create():
+            conn = self.get_connection()
+            try:
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO categories (name, description) VALUES (?, ?)',
+                    (name, description)
+                )
+                created = cursor.rowcount == 1
+                row = conn.execute('SELECT id FROM categories WHERE name = ?', (name,)).fetchone()
+                conn.commit()
+                return row['id'], created
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        return self.pool.run_with_retry(_get_or_create)
     
     def get_category_name(self, category_id):
         """Get category name by ID"""
         conn = self.get_connection()
-        category = conn.execute(
-            'SELECT name FROM categories WHERE id = ?', (category_id,)
-        ).fetchone()
-        conn.close()
+        try:
+            category = conn.execute(
+                'SELECT name FROM categories WHERE id = ?', (category_id,)
+            ).fetchone()
+        finally:
+            conn.close()
         return category['name'] if category else 'Unknown'
     
+    def get_change_version(self, name):
+        """Get the change counter for a cached table"""
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                'SELECT version FROM change_counters WHERE name = ?', (name,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row['version'] if row else 0
+    
     # Question Management
     def get_questions_by_category(self, category_id):
-        """Get questions by category ID"""
-        conn = self.get_connection()
-        questions = conn.execute(
-            '''SELECT q.*, c.name as category_name 
+        """Get questions by category ID from the shared question bank cache"""
+        return self.question_cache.get(category_id)
+    
+    def _load_questions_by_category(self, category_id):
+        """Load questions by category ID from the database"""
+        return tuple(self.fetch_models(
+            Question,
+            f'''SELECT {Question.COLUMNS}
                FROM questions q 
                JOIN categories c ON q.category_id = c.id 
                WHERE q.category_id = ? 
                ORDER BY q.id''', 
             (category_id,)
-        ).fetchall()
-        conn.close()
-        return questions
+        ))
+    
+    def build_exam(self, category_id, seed, length=None):
+        """Build a session's exam paper: length questions sampled by difficulty from seed.
+        
+        The same seed always rebuilds the same paper while the bank is unchanged.
+        """
+        index = self.exam_index_cache.get(category_id)
+        return sample_exam(index, length or len(index), seed)
+    
+    def get_exam_questions(self, category_id, question_ids):
+        """Get a stored paper's questions, in order, from the shared question cache"""
+        index = self.exam_index_cache.get(category_id)
+        return tuple(
+            index.questions[index.positions[question_id]]
+            for question_id in question_ids if question_id in index.positions
+        )
+    
+    def bulk_insert_questions(self, questions):
+        """Insert question tuples in one transaction, skipping content already in their category.
+        
+        Each tuple is (question_text, option_a, option_b, option_c, option_d,
+        correct_answer, category_id, difficulty_level, content_hash). Returns
+        the number of questions actually inserted.
+        """
+        def _insert():
+            conn = self.get_connection()
+            try:
+                cursor = conn.executemany('''
+                    INSERT OR IGNORE INTO questions (question_text, option_a, option_b, option_c, option_d,
+                                                     correct_answer, category_id, difficulty_level, content_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', questions)
+                inserted = cursor.rowcount
+                conn.commit()
+                return inserted
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        return self.pool.run_with_retry(_insert)
     
     def get_questions_count_by_category(self, category_id):
         """Get number of questions in a category"""
         conn = self.get_connection()
-        count = conn.execute(
-            'SELECT COUNT(*) as count FROM questions WHERE category_id = ?',
-            (category_id,)
-        ).fetchone()
-        conn.close()
+        try:
+            count = conn.execute(
+                'SELECT COUNT(*) as count FROM questions WHERE category_id = ?',
+                (category_id,)
+            ).fetchone()
+        finally:
+            conn.close()
         return count['count'] if count else 0
     
-    # Exam Results Management
-    def save_exam_result(self, student_db_id, category_id, score, total_questions, percentage, time_taken=0):
-        """Save exam result to database"""
+    # Exam Attempts (autosaved answers)
+    def start_attempt(self, student_db_id, category_id, question_ids):
+        """Open an autosaved attempt at a paper and return its id (None on error)"""
+        def _start():
+            conn = self.get_connection()
+            try:
+                cursor = conn.execute(
+                    'INSERT INTO exam_attempts (student_id, category_id, question_ids) VALUES (?, ?, ?)',
+                    (student_db_id, category_id, array('q', question_ids).tobytes())
+                )
+                conn.commit()
+                return cursor.lastrowid
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        try:
+            return self.pool.run_with_retry(_start)
+        except Exception as e:
+            logger.error(f"Error starting exam attempt: {e}")
+            return None
+    
+    def record_answers(self, attempt_id, answers):
+        """Buffer (question_id, answer) changes of an attempt for the next autosave flush"""
+        if self.answer_buffer is None:
+            self.enable_autosave()
+        self.answer_buffer.record(attempt_id, answers)
+    
+    def write_attempt_answers(self, rows):
+        """Write (attempt_id, question_id, answer, sequence) rows in one transaction.
+        
+        A row only replaces a stored answer with a higher sequence number.
+        """
+        def _write():
+            conn = self.get_connection()
+            try:
+                conn.executemany(UPSERT_ATTEMPT_ANSWER, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        self.pool.run_with_retry(_write)
+    
+    def get_attempt_answers(self, attempt_id):
+        """Get an attempt's stored {question_id: answer}, flushing buffered changes first"""
+        if self.answer_buffer is not None:
+            self.answer_buffer.flush()
         conn = self.get_connection()
-        cursor = conn.cursor()
+        try:
+            rows = conn.execute(
+                'SELECT question_id, answer FROM attempt_answers WHERE attempt_id = ? AND answer IS NOT NULL',
+                (attempt_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {row[0]: row[1] for row in rows}
+    
+    def submit_attempt(self, attempt_id, time_taken=0):
+        """Grade an attempt from its stored answers and save the result.
         
+        The attempt's still-buffered changes, the result, its answer sheet
+        and closing the attempt are written in one transaction, shared with
+        other submissions when the group-commit queue is enabled; submitting
+        an attempt again returns the existing result. Returns (result_id,
+        score, total_questions, percentage) and raises on failure.
+        """
+        if not self._initialized:
+            self.ensure_initialized()
+        pending = self.answer_buffer.take(attempt_id) if self.answer_buffer is not None else []
         try:
-            cursor.execute('''
-                INSERT INTO exam_results (student_id, category_id, score, total_questions, percentage, time_taken)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (student_db_id, category_id, score, total_questions, percentage, time_taken))
-            
-            conn.commit()
+            if self.submission_writer is not None:
+                future = self.submission_writer.submit_attempt(attempt_id, time_taken, pending)
+                return future.result(timeout=SUBMIT_ACK_TIMEOUT)
+            return self.submit_attempts([(attempt_id, time_taken, pending)])[0]
+        except Exception:
+            if pending:
+                self.answer_buffer.restore(pending)
+            raise
+    
+    def submit_attempts(self, submissions):
+        """Grade and save a batch of attempts in one transaction.
+        
+        Each submission is (attempt_id, time_taken, pending), pending being
+        the attempt's changes taken from the autosave buffer as
+        write_attempt_answers rows. Returns (result_id, score,
+        total_questions, percentage) per submission; an attempt submitted
+        before returns its existing result.
+        """
+        submissions = list(submissions)
+        attempts = {}
+        conn = self.get_connection()
+        try:
+            for attempt_id, _, _ in submissions:
+                if attempt_id in attempts:
+                    continue
+                attempt = conn.execute(
+                    'SELECT student_id, category_id, question_ids FROM exam_attempts WHERE id = ?',
+                    (attempt_id,)
+                ).fetchone()
+                if attempt is None:
+                    raise ValueError(f"Unknown exam attempt {attempt_id}")
+                attempts[attempt_id] = attempt
+        finally:
+            conn.close()
+        # Answer keys come from the shared question cache, before taking the write lock
+        papers = {}
+        for attempt_id, attempt in attempts.items():
+            question_ids = array('q')
+            question_ids.frombytes(attempt['question_ids'])
+            papers[attempt_id] = self.get_exam_questions(attempt['category_id'], question_ids)
+        
+        def _submit():
+            conn = self.get_connection()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                cursor = conn.cursor()
+                outcomes = {}
+                graded = []
+                results = []
+                answer_sheets = []
+                for attempt_id, time_taken, pending in submissions:
+                    if attempt_id in outcomes:
+                        continue
+                    result_id = conn.execute(
+                        'SELECT result_id FROM exam_attempts WHERE id = ?', (attempt_id,)
+                    ).fetchone()[0]
+                    if result_id is not None:
+                        row = conn.execute(
+                            'SELECT score, total_questions, percentage FROM exam_results WHERE id = ?',
+                            (result_id,)
+                        ).fetchone()
+                        outcomes[attempt_id] = (result_id, row[0], row[1], row[2])
+                        continue
+                    
+                    if pending:
+                        cursor.executemany(UPSERT_ATTEMPT_ANSWER, pending)
+                    stored = {
+                        row[0]: row[1] for row in conn.execute(
+                            'SELECT question_id, answer FROM attempt_answers WHERE attempt_id = ? AND answer IS NOT NULL',
+                            (attempt_id,)
+                        )
+                    }
+                    questions = papers[attempt_id]
+                    answer_sheet = {
+                        question.db_id: stored[question.db_id] for question in questions if question.db_id in stored
+                    }
+                    score = sum(1 for question in questions if answer_sheet.get(question.db_id) == question.correct_answer)
+                    total_questions = len(questions)
+                    percentage = (score / total_questions) * 100 if total_questions else 0.0
+                    
+                    attempt = attempts[attempt_id]
+                    outcomes[attempt_id] = (None, score, total_questions, percentage)
+                    graded.append(attempt_id)
+                    results.append((attempt['student_id'], attempt['category_id'], score, total_questions,
+                                    percentage, time_taken))
+                    answer_sheets.append(answer_sheet)
+                
+                result_ids = self._write_exam_results(cursor, results, answer_sheets)
+                cursor.executemany('UPDATE exam_attempts SET result_id = ? WHERE id = ?', zip(result_ids, graded))
+                conn.commit()
+                if results:
+                    self._results_committed(result[0] for result in results)
+                for attempt_id, result_id in zip(graded, result_ids):
+                    outcomes[attempt_id] = (result_id,) + outcomes[attempt_id][1:]
+                return [outcomes[attempt_id] for attempt_id, _, _ in submissions]
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        return self.pool.run_with_retry(_submit)
+    
+    def enable_autosave(self, **options):
+        """Start the background autosave buffer for answer changes"""
+        with self._init_lock:
+            if self.answer_buffer is None:
+                options.setdefault('flush_interval', float(os.environ.get('EXAM_AUTOSAVE_INTERVAL', 1.0)))
+                options.setdefault('max_pending', int(os.environ.get('EXAM_AUTOSAVE_MAX_PENDING', 500)))
+                self.answer_buffer = AnswerBuffer(self, **options)
+                self.answer_buffer.start()
+        return self.answer_buffer
+    
+    def autosave_stats(self):
+        """Get autosave buffer and flush counters"""
+        if self.answer_buffer is None:
+            return None
+        return self.answer_buffer.stats()
+    
+    # Exam Results Management
+    def save_exam_result(self, student_db_id, category_id, score, total_questions, percentage, time_taken=0,
+                         answers=None):
+        """Save exam result to database"""
+        try:
+            self.save_exam_results(
+                [(student_db_id, category_id, score, total_questions, percentage, time_taken)],
+                [answers]
+            )
             return True
         except Exception as e:
-            conn.rollback()
-            print(f"Error saving exam result: {e}")
+            logger.error(f"Error saving exam result: {e}")
             return False
+    
+    def save_exam_results(self, results, answer_sheets=None):
+        """Save a batch of exam results in one transaction and return their ids.
+        
+        Each result is a (student_db_id, category_id, score, total_questions,
+        percentage, time_taken) tuple. answer_sheets, if given, holds one
+        {question_id: 'A'-'D'} dict (or None) per result. Raises on failure.
+        """
+        results = list(results)
+        def _save():
+            conn = self.get_connection()
+            try:
+                result_ids = self._write_exam_results(conn.cursor(), results, answer_sheets)
+                conn.commit()
+                self._results_committed(result[0] for result in results)
+                return result_ids
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        return self.pool.run_with_retry(_save)
+    
+    def _results_committed(self, student_db_ids):
+        """Drop the cached views that new results for these students change"""
+        self.recent_attempts_cache.invalidate()
+        self.leaderboard_cache.invalidate()
+        for student_db_id in set(student_db_ids):
+            self.student_dashboard_cache.invalidate(student_db_id)
+    
+    def _write_exam_results(self, cursor, results, answer_sheets=None):
+        """Insert result rows inside the caller's transaction and return their ids"""
+        results = list(results)
+        if not results:
+            return []
+        cursor.executemany('''
+            INSERT INTO exam_results (student_id, category_id, score, total_questions, percentage, time_taken)
+            VALUES (?, ?, ?, ?, ?, COALESCE(?, 0))
+        ''', results)
+        
+        # AUTOINCREMENT ids are consecutive while this transaction holds the write lock
+        last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+        result_ids = list(range(last_id - len(results) + 1, last_id + 1))
+        rollups.apply_rollups(cursor, result_ids[0], result_ids[-1])
+        latest_attempts.apply_latest_attempts(cursor, result_ids[0], result_ids[-1])
+        leaderboards.apply_leaderboards(cursor, result_ids[0], result_ids[-1])
+        leaderboards.apply_score_counts(cursor, result_ids[0], result_ids[-1])
+        student_summaries.apply_student_summaries(cursor, result_ids[0], result_ids[-1])
+        
+        if answer_sheets:
+            cursor.executemany(
+                'INSERT INTO exam_answers (result_id, question_id, answer) VALUES (?, ?, ?)',
+                (
+                    (result_id, question_id, answer)
+                    for result_id, sheet in zip(result_ids, answer_sheets) if sheet
+                    for question_id, answer in sheet.items() if answer
+                )
+            )
+        return result_ids
+    
+    def submit_exam_result(self, student_db_id, category_id, score, total_questions, percentage, time_taken=0,
+                           answers=None):
+        """Save exam result, through the group-commit queue when it is enabled.
+        
+        Returns a Future that resolves to the result id once it is committed.
+        """
+        if not self._initialized:
+            self.ensure_initialized()
+        future = Future()
+        result = (student_db_id, category_id, score, total_questions, percentage, time_taken)
+        try:
+            if self.submission_writer is not None:
+                return self.submission_writer.submit(result, answers)
+            future.set_result(self.save_exam_results([result], [answers])[0])
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def enable_submission_queue(self, **options):
+        """Start the background group-commit writer for exam submissions"""
+        if self.submission_writer is None:
+            self.submission_writer = SubmissionWriter(self, **options)
+            self.submission_writer.start()
+        return self.submission_writer
+    
+    def submission_stats(self):
+        """Get group-commit queue depth and batch-size metrics"""
+        if self.submission_writer is None:
+            return None
+        return self.submission_writer.stats()
+    
+    def get_answer_key(self, category_id):
+        """Get (question_id, correct_answer) rows for a category in question order"""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                'SELECT id, correct_answer FROM questions WHERE category_id = ? ORDER BY id',
+                (category_id,)
+            ).fetchall()
         finally:
             conn.close()
+        return rows
+    
+    def iter_category_answers(self, category_id, chunk_size=10000):
+        """Stream (result_id, total_questions, question_id, answer) rows for a category.
+        
+        Rows are ordered by result id so every attempt arrives contiguously.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute('''
+                SELECT er.id, er.total_questions, ea.question_id, ea.answer
+                FROM exam_results er
+                JOIN exam_answers ea ON ea.result_id = er.id
+                WHERE er.category_id = ?
+                ORDER BY er.id
+            ''', (category_id,))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+    
+    def write_question_stats(self, category_id, rows):
+        """Replace a category's item statistics in one transaction.
+        
+        Each row is (question_id, responses, difficulty_index, point_biserial,
+        count_a, count_b, count_c, count_d).
+        """
+        def _write():
+            conn = self.get_connection()
+            try:
+                conn.execute('DELETE FROM question_stats WHERE category_id = ?', (category_id,))
+                conn.executemany('''
+                    INSERT INTO question_stats (question_id, category_id, responses, difficulty_index,
+                                                point_biserial, count_a, count_b, count_c, count_d)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', ((row[0], category_id) + tuple(row[1:]) for row in rows))
+                conn.execute("UPDATE change_counters SET version = version + 1 WHERE name = 'question_stats'")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        self.pool.run_with_retry(_write)
+    
+    def get_question_stats(self, category_id):
+        """Get a category's item statistics as {question_id: QuestionStats} from the shared cache"""
+        return self.question_stats_cache.get(category_id)
+    
+    def _load_question_stats(self, category_id):
+        """Load a category's question_stats rows"""
+        return {
+            stats.question_id: stats for stats in self.fetch_models(
+                QuestionStats,
+                f'SELECT {QuestionStats.COLUMNS} FROM question_stats WHERE category_id = ? ORDER BY question_id',
+                (category_id,)
+            )
+        }
+    
+    def update_result_scores(self, scores):
+        """Bulk update (score, percentage, result_id) rows in one transaction"""
+        def _update():
+            conn = self.get_connection()
+            try:
+                conn.executemany(
+                    'UPDATE exam_results SET score = ?, percentage = ? WHERE id = ?',
+                    scores
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        self.pool.run_with_retry(_update)
     
     def get_all_results(self):
         """Get all exam results with student and category info"""
-        conn = self.get_connection()
-        results = conn.execute('''
-            SELECT er.*, s.full_name, s.student_id, c.name as category_name
+        return self.fetch_models(ExamResult, f'''
+            SELECT {ExamResult.COLUMNS}
             FROM exam_results er
             JOIN students s ON er.student_id = s.id
             JOIN categories c ON er.category_id = c.id
             ORDER BY er.submitted_at DESC
-        ''').fetchall()
-        conn.close()
-        return results
+        ''')
+    
+    def get_recent_student_attempts(self, limit=5):
+        """Get the latest attempt of the limit most recently active students, newest first"""
+        return self.recent_attempts_cache.get(limit)
+    
+    def _load_recent_student_attempts(self, limit):
+        """Load the recent attempts feed from student_latest_attempts"""
+        return tuple(self.fetch_models(ExamResult, f'''
+            SELECT {ExamResult.COLUMNS}
+            FROM student_latest_attempts la
+            JOIN exam_results er ON er.id = la.result_id
+            JOIN students s ON s.id = la.student_id
+            JOIN categories c ON c.id = er.category_id
+            ORDER BY la.submitted_at DESC, la.result_id DESC
+            LIMIT ?
+        ''', (limit,)))
+    
+    def get_leaderboard(self, category_id, limit=10):
+        """Get a category's top students (best attempt each), best first"""
+        return self.leaderboard_cache.get((category_id, min(limit, leaderboards.LEADERBOARD_SIZE)))
+    
+    def _load_leaderboard(self, key):
+        """Load the top limit entries of a category from leaderboard_entries"""
+        category_id, limit = key
+        return tuple(self.fetch_models(LeaderboardEntry, '''
+            SELECT ROW_NUMBER() OVER (ORDER BY le.percentage DESC, le.time_taken, le.result_id),
+                   le.result_id, le.student_id, s.student_id, s.full_name,
+                   le.percentage, le.time_taken, er.submitted_at
+            FROM leaderboard_entries le
+            JOIN students s ON s.id = le.student_id
+            JOIN exam_results er ON er.id = le.result_id
+            WHERE le.category_id = ?
+            ORDER BY le.percentage DESC, le.time_taken, le.result_id
+            LIMIT ?
+        ''', (category_id, limit)))
+    
+    def get_student_rank(self, student_db_id, category_id):
+        """Get a student's leaderboard rank and best result in a category, or None.
+        
+        Returns {'rank', 'result_id', 'percentage', 'time_taken'}. A student
+        on the category's top-K board is ranked among its entries; anyone
+        else from the category's score histogram, plus the students whose
+        best result ties on percentage and time but was submitted earlier.
+        """
+        conn = self.get_connection()
+        try:
+            entry = conn.execute('''
+                SELECT result_id, percentage, time_taken FROM leaderboard_entries
+                WHERE category_id = ? AND student_id = ?
+            ''', (category_id, student_db_id)).fetchone()
+            if entry is not None:
+                result_id, percentage, time_taken = entry
+                ahead = conn.execute('''
+                    SELECT COUNT(*) FROM leaderboard_entries
+                    WHERE category_id = ? AND percentage >= ?
+                      AND (percentage > ? OR time_taken < ? OR (time_taken = ? AND result_id < ?))
+                ''', (category_id, percentage, percentage, time_taken, time_taken, result_id)).fetchone()[0]
+            else:
+                best = conn.execute(f'''
+                    SELECT id, percentage, time_taken FROM exam_results
+                    WHERE student_id = ? AND category_id = ?
+                    ORDER BY {leaderboards.RESULT_RANK_ORDER}
+                    LIMIT 1
+                ''', (student_db_id, category_id)).fetchone()
+                if best is None:
+                    return None
+                result_id, percentage, time_taken = best
+                ahead = conn.execute('''
+                    SELECT
+                        (SELECT COALESCE(SUM(students), 0) FROM category_score_counts
+                         WHERE category_id = ? AND percentage > ?)
+                        + (SELECT COALESCE(SUM(students), 0) FROM category_score_counts
+                           WHERE category_id = ? AND percentage = ? AND time_taken < ?)
+                        + (SELECT COUNT(DISTINCT student_id) FROM exam_results tied
+                           WHERE category_id = ? AND percentage = ? AND time_taken = ? AND id < ?
+                             AND NOT EXISTS (
+                                 SELECT 1 FROM exam_results better
+                                 WHERE better.student_id = tied.student_id
+                                   AND better.category_id = tied.category_id
+                                   AND (better.percentage > ? OR (better.percentage = ? AND better.time_taken < ?))
+                             ))
+                ''', (category_id, percentage, category_id, percentage, time_taken,
+                      category_id, percentage, time_taken, result_id,
+                      percentage, percentage, time_taken)).fetchone()[0]
+        finally:
+            conn.close()
+        return {'rank': ahead + 1, 'result_id': result_id, 'percentage': percentage, 'time_taken': time_taken}
+    
+    def rebuild_leaderboards(self):
+        """Recompute every leaderboard and score histogram from exam_results; returns the number of entries"""
+        def _rebuild():
+            conn = self.get_connection()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                entries = leaderboards.rebuild_leaderboards(conn.cursor())
+                leaderboards.rebuild_score_counts(conn.cursor())
+                conn.commit()
+                return entries
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        entries = self.pool.run_with_retry(_rebuild)
+        self.leaderboard_cache.invalidate()
+        return entries
+    
+    def _results_filter(self, category_id=None, student_id=None, date_from=None,
+                        date_to=None, grade=None):
+        """Build the WHERE clauses and parameters for results filters"""
+        clauses = []
+        params = []
+        if category_id is not None:
+            clauses.append('er.category_id = ?')
+            params.append(category_id)
+        if student_id:
+            clauses.append('s.student_id = ?')
+            params.append(student_id)
+        if date_from:
+            clauses.append('er.submitted_at >= ?')
+            params.append(str(date_from))
+        if date_to:
+            # date_to is inclusive of the whole day
+            clauses.append("er.submitted_at < date(?, '+1 day')")
+            params.append(str(date_to))
+        if grade:
+            low, high = GRADE_BANDS[grade]
+            if low is not None:
+                clauses.append('er.percentage >= ?')
+                params.append(low)
+            if high is not None:
+                clauses.append('er.percentage < ?')
+                params.append(high)
+        return clauses, params
+    
+    def get_results_page(self, page_size=50, cursor=None, sort_by='submitted_at',
+                         descending=True, **filters):
+        """Get one page of exam results using keyset pagination.
+        
+        cursor is the next_cursor of the previous page. Returns a dict with the
+        page 'rows' and the 'next_cursor' (None on the last page).
+        """
+        sort_column = RESULT_SORT_COLUMNS[sort_by]
+        clauses, params = self._results_filter(**filters)
+        
+        if cursor is not None:
+            comparison = '<' if descending else '>'
+            clauses.append(f'({sort_column}, er.id) {comparison} (?, ?)')
+            params.extend(cursor)
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        direction = 'DESC' if descending else 'ASC'
+        
+        rows = self.fetch_models(ExamResult, f'''
+            SELECT {ExamResult.COLUMNS}
+            FROM exam_results er
+            JOIN students s ON er.student_id = s.id
+            JOIN categories c ON er.category_id = c.id
+            {where}
+            ORDER BY {sort_column} {direction}, er.id {direction}
+            LIMIT ?
+        ''', params + [page_size + 1])
+        
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = (getattr(last, sort_by), last.db_id)
+        return {'rows': rows, 'next_cursor': next_cursor}
+    
+    def get_results_summary(self, **filters):
+        """Get count, average, highest and passed totals for filtered results.
+        
+        Unfiltered, per-category and date-range summaries are read from the
+        result rollups; any other filter falls back to an aggregate query.
+        """
+        active = {name for name, value in filters.items() if value}
+        if filters.get('category_id') is not None:
+            active.add('category_id')
+        
+        if not active:
+            return self.get_rollup_summary('overall', '')
+        if active == {'category_id'}:
+            return self.get_rollup_summary('category', str(filters['category_id']))
+        if active <= {'date_from', 'date_to'}:
+            return self.get_rollup_summary(
+                'day', str(filters.get('date_from') or ''), str(filters.get('date_to') or '9999-12-31')
+            )
+        
+        clauses, params = self._results_filter(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        join = 'JOIN students s ON er.student_id = s.id' if filters.get('student_id') else ''
+        
+        conn = self.get_connection()
+        try:
+            summary = conn.execute(f'''
+                SELECT COUNT(*) as total_exams,
+                       AVG(er.percentage) as average_percentage,
+                       MAX(er.percentage) as highest_percentage,
+                       COALESCE(SUM(er.percentage >= {rollups.PASS_PERCENTAGE}), 0) as passed_exams
+                FROM exam_results er
+                {join}
+                {where}
+            ''', params).fetchone()
+        finally:
+            conn.close()
+        return summary
+    
+    def get_rollup_summary(self, scope, first_key, last_key=None):
+        """Get the statistics cards for one rollup key, or a range of keys"""
+        conn = self.get_connection()
+        try:
+            summary = conn.execute('''
+                SELECT COALESCE(SUM(exam_count), 0) as total_exams,
+                       SUM(percentage_sum) / SUM(exam_count) as average_percentage,
+                       MAX(percentage_max) as highest_percentage,
+                       COALESCE(SUM(pass_count), 0) as passed_exams
+                FROM result_rollups
+                WHERE scope = ? AND scope_key BETWEEN ? AND ?
+            ''', (scope, first_key, first_key if last_key is None else last_key)).fetchone()
+        finally:
+            conn.close()
+        return summary
+    
+    def rebuild_rollups(self):
+        """Recompute result rollups from scratch; returns the number of rows that had drifted"""
+        def _rebuild():
+            conn = self.get_connection()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                mismatched = rollups.rebuild_rollups(conn.cursor())
+                conn.commit()
+                return mismatched
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        return self.pool.run_with_retry(_rebuild)
+    
+    def iter_results(self, chunk_size=1000, **filters):
+        """Stream joined results, newest first, as lists of up to chunk_size ExamResults"""
+        clauses, params = self._results_filter(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        
+        yield from self.iter_models(ExamResult, f'''
+            SELECT {ExamResult.COLUMNS}
+            FROM exam_results er
+            JOIN students s ON er.student_id = s.id
+            JOIN categories c ON er.category_id = c.id
+            {where}
+            ORDER BY er.submitted_at DESC, er.id DESC
+        ''', params, chunk_size)
+    
+    def export_results(self, fmt='csv', compress=False, chunk_size=1000, **filters):
+        """Stream exam results as encoded CSV or NDJSON bytes, optionally gzipped.
+        
+        Yields one bytes chunk per fetchmany() batch so the full export is
+        never held in memory.
+        """
+        if fmt not in ('csv', 'ndjson'):
+            raise ValueError(f"Unsupported export format: {fmt}")
+        
+        # wbits=31 makes zlib write a gzip header and trailer
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        
+        def encode(text):
+            data = text.encode('utf-8')
+            return compressor.compress(data) if compressor else data
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == 'csv':
+            writer.writerow(EXPORT_COLUMNS)
+        
+        for rows in self.iter_results(chunk_size, **filters):
+            for row in rows:
+                values = [
+                    row.student_name,
+                    row.student_id,
+                    row.category_name,
+                    f"{row.score}/{row.total_questions}",
+                    f"{row.percentage:.1f}%",
+                    grade_for_percentage(row.percentage),
+                    row.submitted_at
+                ]
+                if fmt == 'csv':
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False))
+                    buffer.write('\n')
+            chunk = encode(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+            if chunk:
+                yield chunk
+        
+        tail = encode(buffer.getvalue())
+        if compressor:
+            tail += compressor.flush()
+        if tail:
+            yield tail
+    
+    def get_student_dashboard(self, student_db_id):
+        """Get a student's per-category summaries and first history page from the shared cache.
+        
+        Returns a dict with 'summaries', the first page of 'rows' and the
+        'next_cursor' for get_student_results_page.
+        """
+        return self.student_dashboard_cache.get(student_db_id)
+    
+    def _load_student_dashboard(self, student_db_id):
+        """Load a student's dashboard: two lookups by student id"""
+        page = self.get_student_results_page(student_db_id, STUDENT_HISTORY_PAGE_SIZE)
+        page['summaries'] = self.get_student_summaries(student_db_id)
+        return page
+    
+    def get_student_summaries(self, student_db_id):
+        """Get a student's attempts, best and average percentage per category"""
+        return tuple(self.fetch_models(StudentCategorySummary, '''
+            SELECT ss.category_id, c.name, ss.attempts, ss.best_percentage,
+                   ss.percentage_sum / ss.attempts, ss.last_submitted_at
+            FROM student_category_summaries ss
+            JOIN categories c ON c.id = ss.category_id
+            WHERE ss.student_id = ?
+            ORDER BY c.name
+        ''', (student_db_id,)))
+    
+    def get_student_results_page(self, student_db_id, page_size=STUDENT_HISTORY_PAGE_SIZE, cursor=None):
+        """Get one page of a student's results, newest first, using keyset pagination.
+        
+        The rows are read from the covering idx_results_student_history index.
+        Returns a dict with the page 'rows' and the 'next_cursor' (None on
+        the last page).
+        """
+        clauses = ['er.student_id = ?']
+        params = [student_db_id]
+        if cursor is not None:
+            clauses.append('(er.submitted_at, er.id) < (?, ?)')
+            params.extend(cursor)
+        rows = self.fetch_models(ExamResult, f'''
+            SELECT er.id, er.student_id, er.category_id, er.score, er.total_questions,
+                   er.percentage, er.time_taken, er.submitted_at, NULL, NULL, c.name
+            FROM exam_results er
+            JOIN categories c ON er.category_id = c.id
+            WHERE {' AND '.join(clauses)}
+            ORDER BY er.submitted_at DESC, er.id DESC
+            LIMIT ?
+        ''', params + [page_size + 1])
+        
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1].submitted_at, rows[-1].db_id)
+        return {'rows': rows, 'next_cursor': next_cursor}
+    
+    def rebuild_student_summaries(self):
+        """Recompute every student's per-category summary; returns the row count"""
+        def _rebuild():
+            conn = self.get_connection()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                count = student_summaries.rebuild_student_summaries(conn.cursor())
+                conn.commit()
+                return count
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        
+        count = self.pool.run_with_retry(_rebuild)
+        self.student_dashboard_cache.invalidate()
+        return count
     
     def get_student_results(self, student_db_id):
         """Get exam results for a specific student"""
-        conn = self.get_connection()
-        results = conn.execute('''
-            SELECT er.*, c.name as category_name
+        return self.fetch_models(ExamResult, '''
+            SELECT er.id, er.student_id, er.category_id, er.score, er.total_questions,
+                   er.percentage, er.time_taken, er.submitted_at, NULL, NULL, c.name
             FROM exam_results er
             JOIN categories c ON er.category_id = c.id
             WHERE er.student_id = ?
             ORDER BY er.submitted_at DESC
-        ''', (student_db_id,)).fetchall()
-        conn.close()
-        return results
+        ''', (student_db_id,))
 
-# Create global database instance
-exam_db = ExamDatabase()
\ No newline at end of file
+# Create global database instance (cheap - the database is opened on first use)
+exam_db = ExamDatabase(os.environ.get('EXAM_DB_PATH', 'exam_system.db'))
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Randomized, stratified exam papers for the Online Examination System
+
+A paper is a fixed-length sample of a category's questions, stratified by
+difficulty_level in proportion to the bank. Sampling works on an in-memory
+per-difficulty index of positions into the cached question tuple, so no
+ORDER BY RANDOM() sort is ever issued. The paper depends only on the bank and
+the seed, so a session can store just the seed and rebuild it on any rerun.
+"""
+import random
+
+# Stratum of questions stored without a difficulty_level
+UNSPECIFIED_DIFFICULTY = 'Unspecified'
+
+
+class DifficultyIndex:
+    """Snapshot of a category's questions with their positions grouped by difficulty"""
+    __slots__ = ('questions', 'strata', 'positions')
+
+    def __init__(self, questions):
+        self.questions = questions
+        # Question id -> position, to turn a stored paper back into questions
+        self.positions = {question.db_id: position for position, question in enumerate(questions)}
+        strata = {}
+        for position, question in enumerate(questions):
+            difficulty = question.difficulty_level
+            if difficulty is None:
+                difficulty = UNSPECIFIED_DIFFICULTY
+            strata.setdefault(difficulty, []).append(position)
+        # Sorted keys keep the allocation (and so the paper) deterministic
+        self.strata = {difficulty: tuple(strata[difficulty]) for difficulty in sorted(strata)}
+
+    def __len__(self):
+        return len(self.questions)
+
+
+def allocate(strata_sizes, length):
+    """Split length across strata in proportion to their sizes (largest remainder)"""
+    total = sum(strata_sizes.values())
+    length = min(length, total)
+    if not total:
+        return {name: 0 for name in strata_sizes}
+
+    quotas = {name: length * size / total for name, size in strata_sizes.items()}
+    counts = {name: min(int(quota), strata_sizes[name]) for name, quota in quotas.items()}
+    remaining = length - sum(counts.values())
+    by_remainder = sorted(quotas, key=lambda name: (quotas[name] - int(quotas[name]), name), reverse=True)
+    while remaining > 0:
+        for name in by_remainder:
+            if remaining and counts[name] < strata_sizes[name]:
+                counts[name] += 1
+                remaining -= 1
+    return counts
+
+
+def sample_exam(index, length, seed):
+    """Deterministically pick a shuffled, stratified paper of length questions"""
+    rng = random.Random(seed)
+    counts = allocate({name: len(positions) for name, positions in index.strata.items()}, length)
+    positions = []
+    for name, positions_in_stratum in index.strata.items():
+        positions.extend(rng.sample(positions_in_stratum, counts[name]))
+    rng.shuffle(positions)
+    return tuple(index.questions[position] for position in positions)
@@ -0,0 +1,144 @@
+"""
+Vectorized batch grading for the Online Examination System
+
+A category's answer key is compiled into a NumPy array and a whole cohort is
+graded as an (attempts x questions) matrix of option codes in one pass. Used
+for importing paper answer sheets and for re-grading every stored attempt
+after an answer key is corrected.
+"""
+import numpy as np
+
+from answer_sheet import OPTION_CODES
+
+# Matrix cell value for a question the student did not answer
+UNANSWERED = -1
+
+
+class AnswerKey:
+    """Compiled answer key: question ids and correct option codes in column order"""
+
+    def __init__(self, question_ids, correct):
+        self.question_ids = np.asarray(question_ids, dtype=np.int64)
+        self.correct = np.asarray(correct, dtype=np.int8)
+        self.columns = {int(question_id): column for column, question_id in enumerate(self.question_ids)}
+
+    def __len__(self):
+        return len(self.question_ids)
+
+
+def compile_answer_key(questions):
+    """Compile (question_id, correct_answer) rows into an AnswerKey"""
+    question_ids = []
+    correct = []
+    for question_id, correct_answer in questions:
+        question_ids.append(question_id)
+        correct.append(OPTION_CODES[correct_answer])
+    return AnswerKey(question_ids, correct)
+
+
+def encode_answer_sheets(key, answer_sheets):
+    """Build an int8 (attempts x questions) matrix from {question_id: 'A'-'D'} dicts"""
+    matrix = np.full((len(answer_sheets), len(key)), UNANSWERED, dtype=np.int8)
+    rows, columns, codes = [], [], []
+    for row, sheet in enumerate(answer_sheets):
+        for question_id, answer in (sheet or {}).items():
+            column = key.columns.get(int(question_id))
+            if column is not None and answer in OPTION_CODES:
+                rows.append(row)
+                columns.append(column)
+                codes.append(OPTION_CODES[answer])
+    if rows:
+        matrix[rows, columns] = codes
+    return matrix
+
+
+def grade_matrix(key, matrix, total_questions=None):
+    """Score every attempt in one vectorized pass.
+
+    total_questions optionally gives each attempt's denominator (for attempts
+    that only saw part of the bank); it defaults to the full key length.
+    Returns (scores, percentages) arrays.
+    """
+    scores = np.count_nonzero(matrix == key.correct[np.newaxis, :], axis=1)
+    if total_questions is None:
+        totals = np.full(len(scores), len(key), dtype=np.float64)
+    else:
+        totals = np.asarray(total_questions, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentages = np.where(totals > 0, scores * 100.0 / totals, 0.0)
+    return scores, percentages
+
+
+def grade_answer_sheets(db, category_id, student_db_ids, answer_sheets, time_taken=0):
+    """Grade imported answer sheets for one category and save them as results.
+
+    Returns the new result ids.
+    """
+    key = compile_answer_key(db.get_answer_key(category_id))
+    matrix = encode_answer_sheets(key, answer_sheets)
+    scores, percentages = grade_matrix(key, matrix)
+    results = [
+        (student_db_id, category_id, int(score), len(key), float(percentage), time_taken)
+        for student_db_id, score, percentage in zip(student_db_ids, scores, percentages)
+    ]
+    return db.save_exam_results(results, answer_sheets)
+
+
+def attempt_chunks(db, category_id, key, chunk_size):
+    """Yield (result_ids, totals, matrix) for stored attempts, chunk by chunk"""
+    pending = []
+    for rows in db.iter_category_answers(category_id, chunk_size):
+        pending.extend(rows)
+        # Hold back the last attempt in case it continues in the next chunk
+        last_result_id = pending[-1][0]
+        complete = [row for row in pending if row[0] != last_result_id]
+        pending = [row for row in pending if row[0] == last_result_id]
+        if complete:
+            yield _build_matrix(key, complete)
+    if pending:
+        yield _build_matrix(key, pending)
+
+
+def _build_matrix(key, rows):
+    """Scatter (result_id, total_questions, question_id, answer) rows into a matrix"""
+    result_ids = []
+    totals = []
+    row_index = {}
+    rows_, columns, codes = [], [], []
+    for result_id, total_questions, question_id, answer in rows:
+        row = row_index.get(result_id)
+        if row is None:
+            row = row_index[result_id] = len(result_ids)
+            result_ids.append(result_id)
+            totals.append(total_questions)
+        column = key.columns.get(question_id)
+        if column is not None:
+            rows_.append(row)
+            columns.append(column)
+            codes.append(OPTION_CODES[answer])
+    matrix = np.full((len(result_ids), len(key)), UNANSWERED, dtype=np.int8)
+    if rows_:
+        matrix[rows_, columns] = codes
+    return result_ids, totals, matrix
+
+
+def regrade_category(db, category_id, chunk_size=50000):
+    """Re-grade every stored attempt in a category against its current answer key.
+
+    Rollups, leaderboards and student summaries are rebuilt afterwards since
+    scores can go down.
+    Returns the number of attempts updated.
+    """
+    key = compile_answer_key(db.get_answer_key(category_id))
+    updated = 0
+    for result_ids, totals, matrix in attempt_chunks(db, category_id, key, chunk_size):
+        scores, percentages = grade_matrix(key, matrix, totals)
+        db.update_result_scores(zip(
+            scores.tolist(), percentages.tolist(), result_ids
+        ))
+        updated += len(result_ids)
+    if updated:
+        db.rebuild_rollups()
+        db.rebuild_leaderboards()
+        db.rebuild_student_summaries()
+    return updated
@@ -0,0 +1,276 @@
+"""
+Query instrumentation for the Online Examination System
+
+With EXAM_DB_INSTRUMENT=1, pooled connections are created as
+InstrumentedConnection, whose cursors time every statement from execute()
+until its results have been fetched, or just execute() for statements that
+return no rows. Each timing is attributed to the outermost ExamDatabase
+method within the nearest MAX_CALLER_DEPTH frames and aggregated into per-method and per-statement counters and latency
+histograms. Statements slower than the threshold are written to the slow-query
+log together with their EXPLAIN QUERY PLAN.
+"""
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+# Frames searched above a statement for the ExamDatabase method that ran it
+MAX_CALLER_DEPTH = 32
+
+# Distinct statements tracked before new ones are folded into OTHER_STATEMENT
+MAX_STATEMENTS = 500
+OTHER_STATEMENT = '<other>'
+
+
+def normalize_sql(sql):
+    """Collapse whitespace so one statement always maps to the same key"""
+    return ' '.join(sql.split())
+
+
+class LatencyStats:
+    """Count, total, max and histogram of a stream of timings"""
+    __slots__ = ('count', 'seconds', 'max_seconds', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        milliseconds = seconds * 1000
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if milliseconds <= bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def to_dict(self):
+        labels = [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}ms']
+        return {
+            'count': self.count,
+            'total_ms': round(self.seconds * 1000, 3),
+            'average_ms': round(self.seconds * 1000 / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_seconds * 1000, 3),
+            'histogram': dict(zip(labels, self.histogram))
+        }
+
+
+class QueryStats:
+    """Thread-safe per-method and per-statement query timings plus a slow-query log.
+
+    owner is the class whose methods statements are attributed to; a
+    statement run outside any of its methods is attributed to 'other'.
+    """
+
+    def __init__(self, owner, slow_query_ms=200.0, max_slow_queries=50):
+        self.slow_query_ms = slow_query_ms
+        self._owner_codes = {
+            value.__code__: name
+            for cls in reversed(owner.__mro__) for name, value in vars(cls).items()
+            if hasattr(value, '__code__')
+        }
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._methods = {}
+        self._statements = {}
+        self._slow_queries = deque(maxlen=max_slow_queries)
+
+    def connect(self, *args, **kwargs):
+        """sqlite3.connect() factory producing connections that report here"""
+        conn = InstrumentedConnection(*args, **kwargs)
+        conn.query_stats = self
+        return conn
+
+    def caller(self, frame):
+        """Name of the outermost owner method within MAX_CALLER_DEPTH frames above frame"""
+        method = 'other'
+        for _ in range(MAX_CALLER_DEPTH):
+            if frame is None:
+                break
+            name = self._owner_codes.get(frame.f_code)
+            if name is not None:
+                method = name
+            frame = frame.f_back
+        return method
+
+    def record(self, method, sql, seconds):
+        """Add one finished statement to the aggregates"""
+        self._local.seconds = getattr(self._local, 'seconds', 0.0) + seconds
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = LatencyStats()
+            stats.add(seconds)
+
+            key = normalize_sql(sql)
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= MAX_STATEMENTS:
+                    key = OTHER_STATEMENT
+                stats = self._statements.setdefault(key, LatencyStats())
+            stats.add(seconds)
+
+    def thread_seconds(self):
+        """Total statement time recorded so far on the calling thread"""
+        return getattr(self._local, 'seconds', 0.0)
+
+    def record_slow(self, method, sql, seconds, plan):
+        """Keep and log a statement that exceeded the slow-query threshold"""
+        entry = {
+            'method': method,
+            'sql': normalize_sql(sql),
+            'duration_ms': round(seconds * 1000, 3),
+            'plan': plan,
+            'logged_at': time.time()
+        }
+        with self._lock:
+            self._slow_queries.append(entry)
+        # Kept for the admin page; the log line is informational, not an alert
+        logger.info("Slow query in %s (%.1f ms): %s | plan: %s",
+                       method, entry['duration_ms'], entry['sql'], '; '.join(plan) or 'n/a')
+
+    def snapshot(self):
+        """Point-in-time copy of every counter, for admin pages and exporters"""
+        with self._lock:
+            methods = {name: stats.to_dict() for name, stats in self._methods.items()}
+            statements = [dict(stats.to_dict(), sql=sql) for sql, stats in self._statements.items()]
+            slow_queries = list(self._slow_queries)
+        statements.sort(key=lambda stats: stats['total_ms'], reverse=True)
+        return {
+            'slow_query_ms': self.slow_query_ms,
+            'methods': methods,
+            'statements': statements,
+            'slow_queries': slow_queries
+        }
+
+    def reset(self):
+        """Clear all counters and the slow-query log"""
+        with self._lock:
+            self._methods.clear()
+            self._statements.clear()
+            self._slow_queries.clear()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times each statement until its results are consumed.
+
+    A statement that returns no rows (BEGIN, INSERT, UPDATE, DELETE, ...) is
+    finished by execute() itself. A query is finished by fetchone(),
+    fetchall(), a short fetchmany(), running out of rows while iterating,
+    close() or the next execute on the same cursor.
+    """
+    _sql = None
+
+    def _start(self, sql, parameters, seconds):
+        self._finish()
+        self._sql = sql
+        self._parameters = parameters
+        self._seconds = seconds
+        self._method = self.connection.query_stats.caller(sys._getframe(2))
+
+    def _finish(self):
+        if self._sql is None:
+            return
+        sql, self._sql = self._sql, None
+        stats = self.connection.query_stats
+        stats.record(self._method, sql, self._seconds)
+        if self._seconds * 1000 >= stats.slow_query_ms:
+            stats.record_slow(self._method, sql, self._seconds, self._explain(sql, self._parameters))
+
+    def _explain(self, sql, parameters):
+        """EXPLAIN QUERY PLAN detail lines for sql, or [] if it cannot be explained"""
+        if parameters is None:
+            return []  # executemany - no single parameter set to plan with
+        try:
+            rows = sqlite3.Cursor.execute(sqlite3.Cursor(self.connection),
+                                          f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+        except sqlite3.Error:
+            return []
+        return [row[-1] for row in rows]
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._start(sql, parameters, time.perf_counter() - started)
+            if self.description is None:
+                # No rows to fetch, so the cursor may be dropped right away
+                self._finish()
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._start(sql, None, time.perf_counter() - started)
+            self._finish()
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            if self._sql is not None:
+                self._seconds += time.perf_counter() - started
+                self._finish()
+            raise
+        if self._sql is not None:
+            self._seconds += time.perf_counter() - started
+        return row
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        if self._sql is not None:
+            self._seconds += time.perf_counter() - started
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        if self._sql is not None:
+            self._seconds += time.perf_counter() - started
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        if self._sql is not None:
+            self._seconds += time.perf_counter() - started
+            self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are instrumented"""
+    query_stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,143 @@
+"""
+Item analysis for the Online Examination System
+
+For every question of a category this computes the classical test theory
+statistics from the stored answer sheets:
+
+  difficulty index   proportion of responses that were correct
+  point-biserial     correlation between answering the question correctly and
+                     the rest of the attempt's score (the item is left out
+                     so it does not correlate with itself)
+  distractor counts  how often each of options A-D was chosen
+
+Answers are streamed from exam_answers as (attempts x questions) option-code
+matrices, a chunk of complete attempts at a time. Every statistic is built
+from column sums that add up across chunks, so a category with millions of
+responses never has to fit in memory at once. Categories are analysed in
+parallel on a process pool and the results are written to question_stats.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from grading import attempt_chunks, compile_answer_key
+
+
+class ItemSums:
+    """Running column sums for one category's answer matrix"""
+
+    def __init__(self, key):
+        self.key = key
+        size = len(key)
+        self.attempts = 0
+        self.responses = np.zeros(size, dtype=np.int64)
+        self.correct = np.zeros(size, dtype=np.int64)
+        self.score_sum = np.zeros(size, dtype=np.float64)
+        self.score_squares = np.zeros(size, dtype=np.float64)
+        self.correct_score_sum = np.zeros(size, dtype=np.float64)
+        self.option_counts = np.zeros((4, size), dtype=np.int64)
+
+    def add(self, matrix):
+        """Add one chunk of complete attempts"""
+        answered = matrix >= 0
+        correct = matrix == self.key.correct[np.newaxis, :]
+        scores = np.count_nonzero(correct, axis=1).astype(np.float64)
+        self.attempts += len(matrix)
+        self.responses += np.count_nonzero(answered, axis=0)
+        self.correct += np.count_nonzero(correct, axis=0)
+        # Per question: sums of the score over its responders, their squares and its correct responders
+        self.score_sum += scores @ answered
+        self.score_squares += (scores * scores) @ answered
+        self.correct_score_sum += scores @ correct
+        for code in range(4):
+            self.option_counts[code] += np.count_nonzero(matrix == code, axis=0)
+
+    def statistics(self):
+        """(difficulty_index, point_biserial) arrays; NaN where a value is undefined"""
+        n = self.responses.astype(np.float64)
+        x = self.correct.astype(np.float64)
+        # Rest score = score - item, expanded with x * x == x
+        rest = self.score_sum - x
+        rest_squares = self.score_squares - 2 * self.correct_score_sum + x
+        correct_rest = self.correct_score_sum - x
+        with np.errstate(divide='ignore', invalid='ignore'):
+            difficulty = np.where(n > 0, x / n, np.nan)
+            covariance = n * correct_rest - x * rest
+            variance = (n * x - x * x) * (n * rest_squares - rest * rest)
+            point_biserial = np.where(variance > 0, covariance / np.sqrt(variance), np.nan)
+        return difficulty, point_biserial
+
+    def rows(self):
+        """question_stats rows in answer key order"""
+        difficulty, point_biserial = self.statistics()
+        return [
+            (question_id, responses,
+             None if np.isnan(p) else round(p, 6),
+             None if np.isnan(r) else round(r, 6),
+             count_a, count_b, count_c, count_d)
+            for question_id, responses, p, r, count_a, count_b, count_c, count_d in zip(
+                self.key.question_ids.tolist(), self.responses.tolist(),
+                difficulty.tolist(), point_biserial.tolist(), *self.option_counts.tolist()
+            )
+        ]
+
+
+def analyze_category(db, category_id, chunk_size=50000):
+    """Compute one category's item statistics; returns (category_id, attempts, rows)"""
+    key = compile_answer_key(db.get_answer_key(category_id))
+    sums = ItemSums(key)
+    for _, _, matrix in attempt_chunks(db, category_id, key, chunk_size):
+        sums.add(matrix)
+    return category_id, sums.attempts, sums.rows()
+
+
+def _analyze_in_worker(db_name, category_id, chunk_size):
+    """Process pool entry point: a worker opens its own database connections"""
+    import database
+
+    db = database.ExamDatabase(db_name, pool_size=1)
+    try:
+        return analyze_category(db, category_id, chunk_size)
+    finally:
+        db.pool.close_all()
+
+
+def analyze_items(db, category_ids=None, workers=None, chunk_size=50000):
+    """Analyse categories in parallel and replace their question_stats rows.
+
+    Workers only read; the results are written here, one transaction per
+    category. Returns a summary dict.
+    """
+    started = time.perf_counter()
+    if category_ids is None:
+        category_ids = [category.db_id for category in db.get_all_categories()]
+    if workers is None:
+        workers = int(os.environ.get('EXAM_ANALYSIS_WORKERS', 0)) or os.cpu_count() or 1
+    workers = max(1, min(workers, len(category_ids)))
+
+    if workers == 1:
+        results = [analyze_category(db, category_id, chunk_size) for category_id in category_ids]
+    else:
+        # spawn, since the parent may already be running pool and writer threads
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [
+                executor.submit(_analyze_in_worker, db.db_name, category_id, chunk_size)
+                for category_id in category_ids
+            ]
+            results = [future.result() for future in futures]
+
+    attempts = questions = 0
+    for category_id, category_attempts, rows in results:
+        db.write_question_stats(category_id, rows)
+        attempts += category_attempts
+        questions += len(rows)
+    return {
+        'categories': len(results),
+        'attempts': attempts,
+        'questions': questions,
+        'workers': workers,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
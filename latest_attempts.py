@@ -0,0 +1,58 @@
+"""
+Latest attempt per student for the homepage feed
+
+student_latest_attempts keeps one row per student pointing at their most
+recent exam result. It is updated in the same transaction that inserts the
+results, so "the N most recent distinct students" is an index walk over N
+rows instead of a scan and de-duplication of the whole results history.
+"""
+
+CREATE_LATEST_ATTEMPTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS student_latest_attempts (
+        student_id INTEGER PRIMARY KEY,
+        result_id INTEGER NOT NULL,
+        submitted_at TIMESTAMP,
+        FOREIGN KEY (student_id) REFERENCES students (id),
+        FOREIGN KEY (result_id) REFERENCES exam_results (id)
+    )
+'''
+
+CREATE_LATEST_ATTEMPTS_INDEX = '''
+    CREATE INDEX IF NOT EXISTS idx_latest_attempts_recent
+    ON student_latest_attempts (submitted_at, result_id)
+'''
+
+
+def apply_latest_attempts(cursor, first_result_id, last_result_id):
+    """Point each student in a contiguous range of new results at their newest one"""
+    # MAX(id) makes SQLite take submitted_at from that same row
+    cursor.execute('''
+        INSERT INTO student_latest_attempts (student_id, result_id, submitted_at)
+        SELECT student_id, MAX(id), submitted_at
+        FROM exam_results
+        WHERE id BETWEEN ? AND ?
+        GROUP BY student_id
+        ON CONFLICT (student_id) DO UPDATE SET
+            result_id = excluded.result_id,
+            submitted_at = excluded.submitted_at
+        WHERE (excluded.submitted_at, excluded.result_id)
+              > (student_latest_attempts.submitted_at, student_latest_attempts.result_id)
+    ''', (first_result_id, last_result_id))
+
+
+def rebuild_latest_attempts(cursor):
+    """Recompute every student's latest attempt from exam_results; returns the row count"""
+    cursor.execute('DELETE FROM student_latest_attempts')
+    cursor.execute('''
+        INSERT INTO student_latest_attempts (student_id, result_id, submitted_at)
+        SELECT student_id, id, submitted_at
+        FROM (
+            SELECT student_id, id, submitted_at,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY student_id ORDER BY submitted_at DESC, id DESC
+                   ) AS position
+            FROM exam_results
+        )
+        WHERE position = 1
+    ''')
+    return cursor.rowcount
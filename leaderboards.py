@@ -0,0 +1,175 @@
+"""
+Per-category top-K leaderboards
+
+leaderboard_entries holds, for every category, the LEADERBOARD_SIZE students
+with the best results: one row per student pointing at their best attempt,
+ranked by percentage (highest first), then time_taken (fastest first), then
+result id (earliest first). It is updated in the same transaction that
+inserts the results, so reading a leaderboard is an index walk over at most
+LEADERBOARD_SIZE rows however large exam_results grows.
+
+Keeping only the top K is exact: a student outside the board can only join
+it with a new result that beats the board's last entry, and that result is
+then their best.
+
+Students off the board are ranked from category_score_counts, a histogram of
+how many students' best result in a category has each (percentage,
+time_taken). It is updated in the same transactions, so counting the students
+ahead of a result sums the histogram rows above it instead of reading every
+result in the category.
+"""
+
+LEADERBOARD_SIZE = 100
+
+# Ranking order of results and of leaderboard entries, best first
+RESULT_RANK_ORDER = 'percentage DESC, time_taken, id'
+ENTRY_RANK_ORDER = 'percentage DESC, time_taken, result_id'
+
+CREATE_LEADERBOARD_TABLE = '''
+    CREATE TABLE IF NOT EXISTS leaderboard_entries (
+        category_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        result_id INTEGER NOT NULL,
+        percentage REAL NOT NULL,
+        time_taken INTEGER NOT NULL,
+        PRIMARY KEY (category_id, student_id),
+        FOREIGN KEY (category_id) REFERENCES categories (id),
+        FOREIGN KEY (student_id) REFERENCES students (id),
+        FOREIGN KEY (result_id) REFERENCES exam_results (id)
+    ) WITHOUT ROWID
+'''
+
+CREATE_LEADERBOARD_INDEX = '''
+    CREATE INDEX IF NOT EXISTS idx_leaderboard_rank
+    ON leaderboard_entries (category_id, percentage DESC, time_taken, result_id)
+'''
+
+# Students sharing a best percentage and time are told apart over this index
+CREATE_RESULTS_RANK_INDEX = '''
+    CREATE INDEX IF NOT EXISTS idx_results_category_rank
+    ON exam_results (category_id, percentage, time_taken, student_id)
+'''
+
+CREATE_SCORE_COUNTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS category_score_counts (
+        category_id INTEGER NOT NULL,
+        percentage REAL NOT NULL,
+        time_taken INTEGER NOT NULL,
+        students INTEGER NOT NULL,
+        PRIMARY KEY (category_id, percentage, time_taken),
+        FOREIGN KEY (category_id) REFERENCES categories (id)
+    ) WITHOUT ROWID
+'''
+
+
+def _best_results(where=''):
+    """SELECT of each student's best result per category"""
+    return f'''
+        SELECT category_id, student_id, id, percentage, time_taken
+        FROM (
+            SELECT category_id, student_id, id, percentage, time_taken,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY category_id, student_id ORDER BY {RESULT_RANK_ORDER}
+                   ) AS position
+            FROM exam_results
+            {where}
+        )
+        WHERE position = 1
+    '''
+
+
+def _trim(cursor, category_id):
+    """Drop the entries ranked below LEADERBOARD_SIZE in one category"""
+    cursor.execute(f'''
+        DELETE FROM leaderboard_entries
+        WHERE category_id = ? AND student_id IN (
+            SELECT student_id FROM leaderboard_entries
+            WHERE category_id = ?
+            ORDER BY {ENTRY_RANK_ORDER}
+            LIMIT -1 OFFSET ?
+        )
+    ''', (category_id, category_id, LEADERBOARD_SIZE))
+
+
+def apply_leaderboards(cursor, first_result_id, last_result_id):
+    """Merge a contiguous range of new results into their categories' leaderboards"""
+    cursor.execute(f'''
+        INSERT INTO leaderboard_entries (category_id, student_id, result_id, percentage, time_taken)
+        {_best_results('WHERE id BETWEEN ? AND ?')}
+        ON CONFLICT (category_id, student_id) DO UPDATE SET
+            result_id = excluded.result_id,
+            percentage = excluded.percentage,
+            time_taken = excluded.time_taken
+        WHERE (excluded.percentage, -excluded.time_taken, -excluded.result_id)
+              > (leaderboard_entries.percentage, -leaderboard_entries.time_taken, -leaderboard_entries.result_id)
+    ''', (first_result_id, last_result_id))
+    categories = cursor.execute(
+        'SELECT DISTINCT category_id FROM exam_results WHERE id BETWEEN ? AND ?',
+        (first_result_id, last_result_id)
+    ).fetchall()
+    for (category_id,) in categories:
+        _trim(cursor, category_id)
+
+
+def rebuild_leaderboards(cursor):
+    """Recompute every leaderboard from exam_results; returns the number of entries"""
+    cursor.execute('DELETE FROM leaderboard_entries')
+    cursor.execute(f'''
+        INSERT INTO leaderboard_entries (category_id, student_id, result_id, percentage, time_taken)
+        SELECT category_id, student_id, id, percentage, time_taken
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY category_id ORDER BY {RESULT_RANK_ORDER}
+            ) AS rank
+            FROM ({_best_results()})
+        )
+        WHERE rank <= ?
+    ''', (LEADERBOARD_SIZE,))
+    return cursor.rowcount
+
+
+def _count_score(cursor, category_id, percentage, time_taken, change):
+    """Add change students to one histogram bucket, dropping it once empty"""
+    cursor.execute('''
+        INSERT INTO category_score_counts (category_id, percentage, time_taken, students)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (category_id, percentage, time_taken) DO UPDATE SET
+            students = students + excluded.students
+    ''', (category_id, percentage, time_taken, change))
+    if change < 0:
+        cursor.execute('''
+            DELETE FROM category_score_counts
+            WHERE category_id = ? AND percentage = ? AND time_taken = ? AND students <= 0
+        ''', (category_id, percentage, time_taken))
+
+
+def apply_score_counts(cursor, first_result_id, last_result_id):
+    """Move the students of a contiguous range of new results to their new best buckets"""
+    new_bests = cursor.execute(
+        _best_results('WHERE id BETWEEN ? AND ?'), (first_result_id, last_result_id)
+    ).fetchall()
+    for category_id, student_id, _, percentage, time_taken in new_bests:
+        # The student's best before this range, over their own history
+        previous = cursor.execute(f'''
+            SELECT percentage, time_taken FROM exam_results
+            WHERE student_id = ? AND +category_id = ? AND id < ?
+            ORDER BY {RESULT_RANK_ORDER}
+            LIMIT 1
+        ''', (student_id, category_id, first_result_id)).fetchone()
+        if previous is not None:
+            if (-previous[0], previous[1]) <= (-percentage, time_taken):
+                continue  # an equal or better result was already counted
+            _count_score(cursor, category_id, previous[0], previous[1], -1)
+        _count_score(cursor, category_id, percentage, time_taken, 1)
+
+
+def rebuild_score_counts(cursor):
+    """Recompute every score histogram from exam_results; returns the number of buckets"""
+    cursor.execute('DELETE FROM category_score_counts')
+    cursor.execute(f'''
+        INSERT INTO category_score_counts (category_id, percentage, time_taken, students)
+        SELECT category_id, percentage, time_taken, COUNT(*)
+        FROM ({_best_results()})
+        GROUP BY category_id, percentage, time_taken
+    ''')
+    return cursor.rowcount
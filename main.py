@@ -1,7 +1,13 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import database
+import os
 import pandas as pd
+import rerun_profiler
+import secrets
+from array import array
 from datetime import datetime
+from answer_sheet import AnswerSheet
 
 # Configure the page - MUST BE FIRST
 st.set_page_config(
@@ -72,13 +78,41 @@ st.markdown("""
 # Initialize database
 db = database.exam_db
 
+# Questions per exam paper, sampled from the category bank
+EXAM_LENGTH = int(os.environ.get('EXAM_LENGTH', 20))
+
+# With EXAM_CLIENT_MODE=1 the whole paper is sent to the browser and the
+# server only sees the exam start and one final submission
+EXAM_CLIENT_MODE = os.environ.get('EXAM_CLIENT_MODE') == '1'
+if EXAM_CLIENT_MODE:
+    exam_client = components.declare_component(
+        'exam_client',
+        path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'components', 'exam_client')
+    )
+
+# Answer changes are autosaved and submissions graded from the stored answers
+# unless EXAM_AUTOSAVE=0
+EXAM_AUTOSAVE = os.environ.get('EXAM_AUTOSAVE', '1') != '0'
+
+# Set when rerun profiling is enabled (EXAM_PROFILE_RERUNS=1)
+profiler = rerun_profiler.get_profiler(db)
+
 def main():
     if st.session_state.get('show_registration', False):
-        show_registration_page()
+        page = show_registration_page
     elif st.session_state.get('exam_started', False) and not st.session_state.get('submitted', False):
-        show_exam_interface()
+        page = show_exam_interface
+    elif st.session_state.get('show_my_history', False):
+        page = show_my_history
+    elif st.session_state.get('submitted', False):
+        page = show_results
     else:
-        show_homepage()
+        page = show_homepage
+    
+    if profiler is None:
+        page()
+    else:
+        profiler.run(page)
 
 def show_homepage():
     st.markdown("<h1 style='text-align: center; color: white; font-size: 4rem; margin-bottom: 30px;'>ONLINE EXAMINATION SYSTEM</h1>", unsafe_allow_html=True)
@@ -114,17 +148,20 @@ def show_registration_page():
             student_name = st.text_input("FULL NAME", placeholder="John Smith", key="name_input")
             student_id = st.text_input("STUDENT ID", placeholder="S12345", key="id_input")
             
-            # Category selection
-            categories = db.get_all_categories()
-            category_names = [f"{cat['name']}" for cat in categories]
-            category_dict = {cat['name']: cat['id'] for cat in categories}
+            # Category selection (served from the shared catalog cache on every rerun)
+            categories = db.get_category_catalog()
+            category_names = [cat.name for cat in categories]
+            category_dict = {cat.name: cat for cat in categories}
             
             selected_category_name = st.selectbox("SELECT EXAM CATEGORY", category_names, key="category_select")
-            selected_category_id = category_dict[selected_category_name]
+            selected_category = category_dict[selected_category_name]
+            selected_category_id = selected_category.db_id
             
             # Show questions count
-            questions_count = db.get_questions_count_by_category(selected_category_id)
-            st.info(f"Total questions in {selected_category_name}: {questions_count}")
+            questions_count = selected_category.question_count
+            breakdown = ' / '.join(f"{level} {count}" for level, count in selected_category.difficulty_breakdown.items())
+            st.info(f"Total questions in {selected_category_name}: {questions_count} ({breakdown}) | "
+                    f"Questions in this exam: {min(questions_count, EXAM_LENGTH)}")
             
             # Next button
             col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
@@ -140,10 +177,20 @@ def show_registration_page():
                             st.session_state.student_id = student_id
                             st.session_state.selected_category_id = selected_category_id
                             st.session_state.selected_category_name = selected_category_name
+                            # Session state keeps only the paper's question ids and packed answers
+                            exam_seed = secrets.randbits(32)
+                            paper = db.build_exam(selected_category_id, exam_seed, EXAM_LENGTH)
+                            st.session_state.exam_seed = exam_seed
+                            st.session_state.exam_question_ids = array('q', (question.db_id for question in paper))
+                            st.session_state.attempt_id = None
+                            if EXAM_AUTOSAVE:
+                                st.session_state.attempt_id = db.start_attempt(
+                                    student_db_id, selected_category_id, st.session_state.exam_question_ids
+                                )
                             st.session_state.exam_started = True
                             st.session_state.show_registration = False
                             st.session_state.current_question = 0
-                            st.session_state.answers = {}
+                            st.session_state.answers = AnswerSheet(len(paper))
                             st.session_state.submitted = False
                             st.session_state.exam_start_time = datetime.now()
                             st.rerun()
@@ -153,7 +200,7 @@ def show_registration_page():
                         st.error("Please enter both your name and student ID!")
 
 def show_previous_exams():
-    results = db.get_all_results()
+    results = db.get_recent_student_attempts(5)
     
     if not results:
         st.markdown("""
@@ -165,34 +212,23 @@ def show_previous_exams():
         return
     
     # Display last 5 unique student attempts
-    displayed_students = set()
-    count = 0
-    
     for result in results:
-        if count >= 5:
-            break
-            
-        student_key = result['student_id']
-        if student_key not in displayed_students:
-            displayed_students.add(student_key)
-            percentage = result['percentage']
-            grade = "A" if percentage >= 90 else "B" if percentage >= 80 else "C" if percentage >= 70 else "D" if percentage >= 60 else "F"
-            
-            st.markdown(f"""
-            <div class='student-card'>
-                <div style='display: flex; justify-content: space-between; align-items: center;'>
-                    <div>
-                        <h4 style='color: white; margin: 0;'>{result['full_name']}</h4>
-                        <p style='color: #ccc; margin: 5px 0;'>ID: {result['student_id']} | {result['category_name']}</p>
-                    </div>
-                    <div style='text-align: right;'>
-                        <p style='color: #00d4ff; margin: 0; font-weight: bold;'>Score: {result['score']}/{result['total_questions']}</p>
-                        <p style='color: #fff; margin: 0;'>Grade: {grade}</p>
-                    </div>
+        grade = database.grade_for_percentage(result.percentage)
+        
+        st.markdown(f"""
+        <div class='student-card'>
+            <div style='display: flex; justify-content: space-between; align-items: center;'>
+                <div>
+                    <h4 style='color: white; margin: 0;'>{result.student_name}</h4>
+                    <p style='color: #ccc; margin: 5px 0;'>ID: {result.student_id} | {result.category_name}</p>
+                </div>
+                <div style='text-align: right;'>
+                    <p style='color: #00d4ff; margin: 0; font-weight: bold;'>Score: {result.score}/{result.total_questions}</p>
+                    <p style='color: #fff; margin: 0;'>Grade: {grade}</p>
                 </div>
             </div>
-            """, unsafe_allow_html=True)
-            count += 1
+        </div>
+        """, unsafe_allow_html=True)
 
 def show_exam_interface():
     display_exam_questions()
@@ -201,7 +237,9 @@ def clear_student_info():
     keys_to_clear = [
         'student_db_id', 'student_name', 'student_id', 'exam_started', 
         'current_question', 'answers', 'submitted', 'show_registration', 
-        'selected_category_id', 'selected_category_name', 'exam_start_time'
+        'selected_category_id', 'selected_category_name', 'exam_start_time', 'exam_seed',
+        'exam_question_ids', 'client_submission_id', 'client_failed_submission_id', 'attempt_id',
+        'show_my_history', 'my_history_cursors'
     ]
     for key in keys_to_clear:
         if key in st.session_state:
@@ -227,8 +265,11 @@ def display_exam_questions():
     
     st.markdown("---")
     
-    # Get questions by category
-    questions = db.get_questions_by_category(st.session_state.selected_category_id)
+    # Look this session's paper up in the shared question cache
+    questions = db.get_exam_questions(
+        st.session_state.selected_category_id,
+        st.session_state.exam_question_ids
+    )
     total_questions = len(questions)
     
     if total_questions == 0:
@@ -239,6 +280,42 @@ def display_exam_questions():
             st.rerun()
         return
     
+    if EXAM_CLIENT_MODE:
+        client_exam_panel(questions)
+    else:
+        exam_panel(questions)
+
+def go_to_question(index):
+    st.session_state.current_question = index
+
+def restart_exam():
+    st.session_state.current_question = 0
+    st.session_state.answers.clear()
+    st.session_state.submitted = False
+    if st.session_state.get('attempt_id'):
+        db.record_answers(st.session_state.attempt_id,
+                          [(question_id, None) for question_id in st.session_state.exam_question_ids])
+    # Drop the radio widgets' own state so every question starts unanswered again
+    for key in [key for key in st.session_state if str(key).startswith('q_')]:
+        del st.session_state[key]
+
+@st.fragment
+def exam_panel(questions):
+    """Question, answer and navigation panel.
+    
+    Answering or moving between questions reruns only this fragment, reusing
+    the paper built by the last full run; navigation state is changed in
+    on_click callbacks so no extra st.rerun() is needed.
+    """
+    # Fragment reruns bypass main(), so they are profiled here
+    if profiler is None:
+        draw_exam_panel(questions)
+    else:
+        profiler.run(lambda: draw_exam_panel(questions), name='exam_panel')
+
+def draw_exam_panel(questions):
+    total_questions = len(questions)
+    
     # Progress section
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -252,22 +329,17 @@ def display_exam_questions():
     st.markdown(f"""
     <div class='question-container'>
         <h2 style='color: white;'>Question {st.session_state.current_question + 1}</h2>
-        <h3 style='color: white;'>{current_q['question_text']}</h3>
-        <p style='color: #ccc; font-style: italic;'>Category: {current_q['category_name']} | Difficulty: {current_q['difficulty_level']}</p>
+        <h3 style='color: white;'>{current_q.question_text}</h3>
+        <p style='color: #ccc; font-style: italic;'>Category: {current_q.category_name} | Difficulty: {current_q.difficulty_level}</p>
     </div>
     """, unsafe_allow_html=True)
         
     # Radio buttons
     with st.container():
-        options = {
-            'A': current_q['option_a'],
-            'B': current_q['option_b'], 
-            'C': current_q['option_c'],
-            'D': current_q['option_d']
-        }
+        options = current_q.options
         
-        question_key = f"q_{current_q['id']}"
-        current_answer = st.session_state.answers.get(question_key, None)
+        question_key = f"q_{current_q.db_id}"
+        current_answer = st.session_state.answers.get(st.session_state.current_question)
         
         selected_option = st.radio(
             "SELECT YOUR ANSWER:",
@@ -277,99 +349,180 @@ def display_exam_questions():
             index=['A', 'B', 'C', 'D'].index(current_answer) if current_answer else 0
         )
         
-        st.session_state.answers[question_key] = selected_option
+        if selected_option != current_answer:
+            st.session_state.answers.set(st.session_state.current_question, selected_option)
+            if st.session_state.get('attempt_id'):
+                db.record_answers(st.session_state.attempt_id, [(current_q.db_id, selected_option)])
     
     # Navigation
     st.markdown("---")
     col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
     
     with col1:
-        if st.session_state.current_question > 0:
-            if st.button("PREVIOUS", use_container_width=True):
-                st.session_state.current_question -= 1
-                st.rerun()
-        else:
-            st.button("PREVIOUS", disabled=True, use_container_width=True)
+        st.button("PREVIOUS", use_container_width=True,
+                  disabled=st.session_state.current_question == 0,
+                  on_click=go_to_question, args=(st.session_state.current_question - 1,))
     
     with col2:
         if st.session_state.current_question < total_questions - 1:
-            if st.button("NEXT", type="primary", use_container_width=True):
-                st.session_state.current_question += 1
-                st.rerun()
+            st.button("NEXT", type="primary", use_container_width=True,
+                      on_click=go_to_question, args=(st.session_state.current_question + 1,))
         else:
             if st.button("SUBMIT EXAM", type="primary", use_container_width=True):
                 calculate_results(questions)
     
     with col3:
-        if st.button("RESTART", type="secondary", use_container_width=True):
-            st.session_state.current_question = 0
-            st.session_state.answers = {}
-            st.session_state.submitted = False
-            st.info("Exam restarted! All answers cleared.")
-            st.rerun()
+        st.button("RESTART", type="secondary", use_container_width=True, on_click=restart_exam)
     
     with col4:
         if st.button("EXIT EXAM", type="secondary", use_container_width=True):
             clear_student_info()
 
-def calculate_results(questions):
+def client_exam_panel(questions):
+    """Hand the paper (without answer keys) to the browser and grade its single submission"""
+    paper = [
+        {
+            'id': question.db_id,
+            'text': question.question_text,
+            'options': question.options,
+            'category': question.category_name,
+            'difficulty': question.difficulty_level
+        }
+        for question in questions
+    ]
+    failed_submission_id = st.session_state.get('client_failed_submission_id')
+    if failed_submission_id:
+        st.error("Error saving exam results. Please try again.")
+    # A failed submission id tells the component to let the student submit again
+    submission = exam_client(questions=paper, paper_id=str(st.session_state.exam_seed),
+                             failed_submission=failed_submission_id, key='exam_client', default=None)
+    
+    # The component keeps returning its last value, so grade each submission once
+    submission_id = submission.get('submission_id') if submission else None
+    if not submission or submission_id in (st.session_state.get('client_submission_id'), failed_submission_id):
+        return
+    
+    # Only accept answers to questions on this paper
+    positions = {question.db_id: position for position, question in enumerate(questions)}
+    answers = AnswerSheet(len(questions))
+    for question_id, answer in (submission.get('answers') or {}).items():
+        try:
+            position = positions.get(int(question_id))
+        except (TypeError, ValueError):
+            continue
+        if position is not None and answer in ('A', 'B', 'C', 'D'):
+            answers.set(position, answer)
+    st.session_state.answers = answers
+    if st.session_state.get('attempt_id'):
+        db.record_answers(st.session_state.attempt_id, [
+            (question.db_id, answers.get(position)) for position, question in enumerate(questions)
+        ])
+    calculate_results(questions, submission_id)
+    
+    # Still here, so the save failed; rerun to re-enable the component's controls
+    st.session_state.client_failed_submission_id = submission_id
+    st.rerun()
+
+def grade_answers(questions):
+    """Grade the session's answer sheet: (score, total, percentage, {question_id: answer})"""
     score = 0
     total_questions = len(questions)
-    results = []
+    answer_sheet = {}
     
-    for question in questions:
-        question_key = f"q_{question['id']}"
-        user_answer = st.session_state.answers.get(question_key)
-        correct = user_answer == question['correct_answer']
-        
-        if correct:
+    for position, question in enumerate(questions):
+        user_answer = st.session_state.answers.get(position)
+        if user_answer:
+            answer_sheet[question.db_id] = user_answer
+        if user_answer == question.correct_answer:
             score += 1
-        
-        results.append({
-            'question': question['question_text'],
-            'user_answer': user_answer,
-            'correct_answer': question['correct_answer'],
-            'is_correct': correct,
-            'options': {
-                'A': question['option_a'],
-                'B': question['option_b'],
-                'C': question['option_c'],
-                'D': question['option_d']
-            },
-            'category': question['category_name'],
-            'difficulty': question['difficulty_level']
-        })
-    
-    percentage = (score / total_questions) * 100
     
+    return score, total_questions, (score / total_questions) * 100, answer_sheet
+
+# Students shown on a category leaderboard
+LEADERBOARD_ROWS = 10
+
+# Seconds to wait for a submission to be durably committed
+SUBMIT_ACK_TIMEOUT = database.SUBMIT_ACK_TIMEOUT
+
+def calculate_results(questions, client_submission_id=None):
     # Calculate time taken
     time_taken = 0
     if 'exam_start_time' in st.session_state:
         time_taken = int((datetime.now() - st.session_state.exam_start_time).total_seconds())
     
-    # Save to database
-    success = db.save_exam_result(
-        st.session_state.student_db_id,
-        st.session_state.selected_category_id,
-        score,
-        total_questions,
-        percentage,
-        time_taken
-    )
+    try:
+        if st.session_state.get('attempt_id'):
+            # Graded by the database from the autosaved answers (group-committed when EXAM_GROUP_COMMIT=1)
+            _, score, total_questions, percentage = db.submit_attempt(st.session_state.attempt_id, time_taken)
+        else:
+            score, total_questions, percentage, answer_sheet = grade_answers(questions)
+            # Save to database (group-committed when EXAM_GROUP_COMMIT=1) and wait for the commit
+            db.submit_exam_result(
+                st.session_state.student_db_id,
+                st.session_state.selected_category_id,
+                score,
+                total_questions,
+                percentage,
+                time_taken,
+                answers=answer_sheet
+            ).result(timeout=SUBMIT_ACK_TIMEOUT)
+        success = True
+    except Exception as e:
+        print(f"Error saving exam result: {e}")
+        success = False
     
     if success:
         st.session_state.submitted = True
-        st.session_state.results = results
         st.session_state.score = score
         st.session_state.percentage = percentage
         st.session_state.total_questions = total_questions
         st.session_state.time_taken = time_taken
         st.session_state.exam_started = False
+        if client_submission_id:
+            # Only a saved submission is ignored when the component sends it again
+            st.session_state.client_submission_id = client_submission_id
+            st.session_state.pop('client_failed_submission_id', None)
         
-        show_results()
+        # Leave the exam fragment; main() shows the results page on the full rerun
+        st.rerun()
     else:
         st.error("Error saving exam results. Please try again.")
 
+def exam_breakdown():
+    """Per-question review rows, rebuilt on demand from the shared question cache"""
+    questions = db.get_exam_questions(
+        st.session_state.selected_category_id,
+        st.session_state.exam_question_ids
+    )
+    answers = st.session_state.answers
+    return [
+        {
+            'question': question,
+            'user_answer': answers.get(position),
+            'is_correct': answers.get(position) == question.correct_answer
+        }
+        for position, question in enumerate(questions)
+    ]
+
+def show_leaderboard(category_id, category_name):
+    """Top students of a category and this student's own rank"""
+    rank = db.get_student_rank(st.session_state.student_db_id, category_id)
+    if rank:
+        st.info(f"Your best in {category_name}: {rank['percentage']:.1f}% - rank #{rank['rank']}")
+    
+    rows = [
+        {
+            'Rank': entry.rank,
+            'Student': entry.student_name,
+            'Student ID': entry.student_id,
+            'Percentage': f"{entry.percentage:.1f}%",
+            'Time (s)': entry.time_taken,
+            'Date': entry.submitted_at
+        }
+        for entry in db.get_leaderboard(category_id, LEADERBOARD_ROWS)
+    ]
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
 def show_results():
     st.markdown("<h1 style='text-align: center; color: white; font-size: 3rem;'>EXAMINATION RESULTS</h1>", unsafe_allow_html=True)
     st.markdown("---")
@@ -402,7 +555,7 @@ def show_results():
         """, unsafe_allow_html=True)
     
     with col3:
-        grade = "A" if st.session_state.percentage >= 90 else "B" if st.session_state.percentage >= 80 else "C" if st.session_state.percentage >= 70 else "D" if st.session_state.percentage >= 60 else "F"
+        grade = database.grade_for_percentage(st.session_state.percentage)
         st.markdown(f"""
         <div class='metric-card'>
             <h3 style='color: white;'>GRADE</h3>
@@ -433,21 +586,39 @@ def show_results():
     else:
         st.error("SORRY, YOU DID NOT PASS. BETTER LUCK NEXT TIME!")
     
+    # Leaderboard, read from the per-category top-K table
+    if st.toggle("CATEGORY LEADERBOARD", key="show_leaderboard"):
+        show_leaderboard(st.session_state.selected_category_id, st.session_state.selected_category_name)
+    
+    # Answer review, only built when asked for
+    if st.toggle("REVIEW ANSWERS", key="review_answers"):
+        for number, row in enumerate(exam_breakdown(), start=1):
+            question = row['question']
+            status_color = "#00ff88" if row['is_correct'] else "#ff4444"
+            st.markdown(f"""
+            <div class='question-container'>
+                <h4 style='color: white;'>{number}. {question.question_text}</h4>
+                <p style='color: {status_color}; margin: 0;'>Your answer: {row['user_answer'] or '-'}</p>
+                <p style='color: #ccc; margin: 0;'>Correct answer: {question.correct_answer}. {question.options[question.correct_answer]}</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
     # Action buttons
     st.markdown("---")
     col1, col2, col3 = st.columns(3)
     
     with col1:
         if st.button("VIEW HISTORY", use_container_width=True):
-            st.session_state.show_all_results = True
+            st.session_state.show_my_history = True
+            st.session_state.my_history_cursors = [None]
             st.rerun()
     
     with col2:
         if st.button("NEW EXAM", type="primary", use_container_width=True):
             st.session_state.current_question = 0
-            st.session_state.answers = {}
+            st.session_state.answers = None
+            st.session_state.attempt_id = None
             st.session_state.submitted = False
-            st.session_state.results = None
             st.session_state.exam_started = False
             st.success("READY FOR A NEW EXAM!")
             st.rerun()
@@ -456,13 +627,127 @@ def show_results():
         if st.button("BACK TO HOME", type="secondary", use_container_width=True):
             clear_student_info()
 
+def show_my_history():
+    """The student's own history: per-category summaries, then their attempts newest first"""
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("BACK", key="my_history_back"):
+            st.session_state.show_my_history = False
+            st.rerun()
+    
+    with col2:
+        st.markdown("<h1 style='text-align: center; color: white; font-size: 3rem;'>MY HISTORY</h1>", unsafe_allow_html=True)
+    
+    st.markdown(f"""
+    <div class='metric-card'>
+        <h3 style='color: white; text-align: center; margin: 0;'>
+        Student: {st.session_state.student_name} | ID: {st.session_state.student_id}
+        </h3>
+    </div>
+    """, unsafe_allow_html=True)
+    st.markdown("---")
+    
+    # Summaries and the first page come from the shared dashboard cache
+    student_db_id = st.session_state.student_db_id
+    dashboard = db.get_student_dashboard(student_db_id)
+    summaries = dashboard['summaries']
+    if not summaries:
+        st.info("No exam results yet. Take an exam to see your history here!")
+        return
+    
+    columns = st.columns(min(len(summaries), 4))
+    for index, summary in enumerate(summaries):
+        with columns[index % len(columns)]:
+            st.markdown(f"""
+            <div class='metric-card'>
+                <h3 style='color: white;'>{summary.category_name}</h3>
+                <p style='color: #ccc; margin: 0;'>Attempts: {summary.attempts}</p>
+                <h2 style='color: #00d4ff; margin: 5px 0;'>{summary.best_percentage:.1f}%</h2>
+                <p style='color: #ccc; margin: 0;'>Best | Average {summary.average_percentage:.1f}%</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    st.markdown("<h2 style='color: white;'>MY ATTEMPTS</h2>", unsafe_allow_html=True)
+    cursors = st.session_state.setdefault('my_history_cursors', [None])
+    if cursors[-1] is None:
+        page = dashboard
+    else:
+        page = db.get_student_results_page(student_db_id, cursor=cursors[-1])
+    
+    rows = [
+        {
+            'Category': result.category_name,
+            'Score': f"{result.score}/{result.total_questions}",
+            'Percentage': f"{result.percentage:.1f}%",
+            'Grade': database.grade_for_percentage(result.percentage),
+            'Time (s)': result.time_taken,
+            'Date': result.submitted_at
+        }
+        for result in page['rows']
+    ]
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    
+    total_attempts = sum(summary.attempts for summary in summaries)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("PREVIOUS PAGE", disabled=len(cursors) == 1, use_container_width=True, key="my_history_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.markdown(f"<p style='text-align: center; color: #ccc;'>Page {len(cursors)} of {-(-total_attempts // database.STUDENT_HISTORY_PAGE_SIZE)}</p>", unsafe_allow_html=True)
+    with col3:
+        if st.button("NEXT PAGE", disabled=page['next_cursor'] is None, use_container_width=True, key="my_history_next"):
+            cursors.append(page['next_cursor'])
+            st.rerun()
+
+RESULTS_PAGE_SIZE = 50
+
 def view_results():
     st.markdown("<h1 style='text-align: center; color: white; font-size: 3rem;'>RESULTS HISTORY</h1>", unsafe_allow_html=True)
     st.markdown("---")
     
-    results = db.get_all_results()
+    # Filters
+    categories = db.get_all_categories()
+    category_dict = {cat.name: cat.db_id for cat in categories}
     
-    if not results:
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        category_name = st.selectbox("CATEGORY", ["All"] + list(category_dict), key="history_category")
+    with col2:
+        student_filter = st.text_input("STUDENT ID", key="history_student").strip()
+    with col3:
+        date_range = st.date_input("DATE RANGE", value=(), key="history_dates")
+    with col4:
+        grade_filter = st.selectbox("GRADE", ["All"] + list(database.GRADE_BANDS), key="history_grade")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        sort_labels = {
+            'Date': 'submitted_at',
+            'Percentage': 'percentage'
+        }
+        sort_label = st.selectbox("SORT BY", list(sort_labels), key="history_sort")
+    with col2:
+        descending = st.radio("ORDER", ["Descending", "Ascending"], horizontal=True, key="history_order") == "Descending"
+    
+    filters = {
+        'category_id': category_dict.get(category_name),
+        'student_id': student_filter or None,
+        'date_from': date_range[0] if len(date_range) > 0 else None,
+        'date_to': date_range[1] if len(date_range) > 1 else None,
+        'grade': None if grade_filter == "All" else grade_filter
+    }
+    sort_by = sort_labels[sort_label]
+    
+    # Restart paging whenever the filters or sort order change
+    page_key = (tuple(sorted(filters.items())), sort_by, descending)
+    if st.session_state.get('history_page_key') != page_key:
+        st.session_state.history_page_key = page_key
+        st.session_state.history_cursors = [None]
+    
+    summary = db.get_results_summary(**filters)
+    
+    if not summary['total_exams']:
         st.info("No exam results found. Take an exam to see results here!")
         return
     
@@ -471,7 +756,7 @@ def view_results():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_exams = len(results)
+        total_exams = summary['total_exams']
         st.markdown(f"""
         <div class='metric-card'>
             <h3 style='color: white;'>TOTAL EXAMS</h3>
@@ -480,7 +765,7 @@ def view_results():
         """, unsafe_allow_html=True)
     
     with col2:
-        avg_percentage = sum([r['percentage'] for r in results]) / len(results)
+        avg_percentage = summary['average_percentage']
         st.markdown(f"""
         <div class='metric-card'>
             <h3 style='color: white;'>AVERAGE SCORE</h3>
@@ -489,7 +774,7 @@ def view_results():
         """, unsafe_allow_html=True)
     
     with col3:
-        highest_score = max([r['percentage'] for r in results])
+        highest_score = summary['highest_percentage']
         st.markdown(f"""
         <div class='metric-card'>
             <h3 style='color: white;'>HIGHEST SCORE</h3>
@@ -498,7 +783,7 @@ def view_results():
         """, unsafe_allow_html=True)
     
     with col4:
-        passed_exams = len([r for r in results if r['percentage'] >= 60])
+        passed_exams = summary['passed_exams']
         st.markdown(f"""
         <div class='metric-card'>
             <h3 style='color: white;'>EXAMS PASSED</h3>
@@ -506,35 +791,91 @@ def view_results():
         </div>
         """, unsafe_allow_html=True)
     
-    # Results table
+    # Results table - only the visible page is fetched
     st.markdown("<h2 style='color: white;'>ALL EXAM RESULTS</h2>", unsafe_allow_html=True)
     
+    cursors = st.session_state.history_cursors
+    page = db.get_results_page(
+        page_size=RESULTS_PAGE_SIZE,
+        cursor=cursors[-1],
+        sort_by=sort_by,
+        descending=descending,
+        **filters
+    )
+    
     results_data = []
-    for result in results:
-        percentage = result['percentage']
-        grade = "A" if percentage >= 90 else "B" if percentage >= 80 else "C" if percentage >= 70 else "D" if percentage >= 60 else "F"
-        
+    for result in page['rows']:
         results_data.append({
-            'Student Name': result['full_name'],
-            'Student ID': result['student_id'],
-            'Category': result['category_name'],
-            'Score': f"{result['score']}/{result['total_questions']}",
-            'Percentage': f"{percentage:.1f}%",
-            'Grade': grade,
-            'Date': result['submitted_at']
+            'Student Name': result.student_name,
+            'Student ID': result.student_id,
+            'Category': result.category_name,
+            'Score': f"{result.score}/{result.total_questions}",
+            'Percentage': f"{result.percentage:.1f}%",
+            'Grade': database.grade_for_percentage(result.percentage),
+            'Date': result.submitted_at
         })
     
     df = pd.DataFrame(results_data)
     st.dataframe(df, use_container_width=True)
     
-    # Download
-    csv = df.to_csv(index=False)
+    # Pagination
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("PREVIOUS PAGE", disabled=len(cursors) == 1, use_container_width=True, key="history_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.markdown(f"<p style='text-align: center; color: #ccc;'>Page {len(cursors)} of {-(-total_exams // RESULTS_PAGE_SIZE)}</p>", unsafe_allow_html=True)
+    with col3:
+        if st.button("NEXT PAGE", disabled=page['next_cursor'] is None, use_container_width=True, key="history_next"):
+            cursors.append(page['next_cursor'])
+            st.rerun()
+    
+    # Download - the export is built only when clicked (use manage.py export for very large exports)
+    compress = st.checkbox("GZIP COMPRESS", key="history_gzip")
     st.download_button(
         label="DOWNLOAD RESULTS AS CSV",
-        data=csv,
-        file_name="exam_results.csv",
-        mime="text/csv"
+        data=lambda: stream_results_export(filters, compress),
+        file_name="exam_results.csv.gz" if compress else "exam_results.csv",
+        mime="application/gzip" if compress else "text/csv"
     )
+    
+    # Item analysis of the selected category, as of the last analyze-items run
+    if filters['category_id'] is not None and st.toggle("QUESTION STATISTICS", key="history_item_stats"):
+        show_question_stats(filters['category_id'])
+
+def show_question_stats(category_id):
+    """Difficulty, discrimination and option shares per question, from the shared stats cache"""
+    stats = db.get_question_stats(category_id)
+    if not stats:
+        st.info("No question statistics yet. Run `python manage.py analyze-items` to compute them.")
+        return
+    
+    rows = []
+    for question in db.get_questions_by_category(category_id):
+        item = stats.get(question.db_id)
+        if item is None:
+            continue
+        row = {
+            'Question': question.question_text,
+            'Correct': question.correct_answer,
+            'Responses': item.responses,
+            'Difficulty': item.difficulty_index,
+            'Discrimination': item.point_biserial
+        }
+        for option, share in item.option_frequencies.items():
+            row[f'{option} %'] = round(share * 100, 1)
+        rows.append(row)
+    
+    st.dataframe(pd.DataFrame(rows), use_container_width=True)
+
+def stream_results_export(filters, compress):
+    """Build the results export as bytes for download.
+    
+    Streamlit holds a download's whole payload in memory, so the export is
+    buffered here; manage.py export streams it to a file instead.
+    """
+    return b''.join(db.export_results(fmt='csv', compress=compress, **filters))
 
 # Initialize session state
 if 'exam_started' not in st.session_state:
@@ -542,7 +883,7 @@ if 'exam_started' not in st.session_state:
 if 'current_question' not in st.session_state:
     st.session_state.current_question = 0
 if 'answers' not in st.session_state:
-    st.session_state.answers = {}
+    st.session_state.answers = None
 if 'submitted' not in st.session_state:
     st.session_state.submitted = False
 
@@ -0,0 +1,172 @@
+"""
+Command-line maintenance tasks for the Online Examination System
+
+    python manage.py rebuild-rollups
+    python manage.py rebuild-leaderboards
+    python manage.py rebuild-student-summaries
+    python manage.py export --format ndjson --gzip -o results.ndjson.gz
+    python manage.py import-questions bank.csv
+    python manage.py import-roster cohort.csv
+    python manage.py analyze-items --workers 4
+"""
+import argparse
+import os
+import sys
+
+import database
+import item_analysis
+import question_import
+import roster_import
+
+
+def rebuild_rollups(db, args):
+    mismatched = db.rebuild_rollups()
+    if mismatched:
+        print(f"Rebuilt result rollups: {mismatched} rows had drifted and were corrected")
+    else:
+        print("Rebuilt result rollups: no drift found")
+    return 1 if mismatched and args.check else 0
+
+
+def rebuild_leaderboards(db, args):
+    print(f"Rebuilt category leaderboards: {db.rebuild_leaderboards()} entries")
+    return 0
+
+
+def rebuild_student_summaries(db, args):
+    print(f"Rebuilt student summaries: {db.rebuild_student_summaries()} rows")
+    return 0
+
+
+def export_results(db, args):
+    filters = {
+        'category_id': args.category_id,
+        'student_id': args.student_id,
+        'date_from': args.date_from,
+        'date_to': args.date_to,
+        'grade': args.grade
+    }
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in db.export_results(fmt=args.format, compress=args.gzip,
+                                       chunk_size=args.chunk_size, **filters):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+def import_questions(db, args):
+    report = question_import.import_questions(
+        db,
+        question_import.read_question_rows(args.path),
+        batch_size=args.batch_size,
+        create_categories=not args.no_create_categories
+    )
+    summary = report.to_dict()
+    errors = summary.pop('errors')
+    for name, value in summary.items():
+        print(f"{name}: {value}")
+    for error in errors:
+        print(f"  {error}")
+    return 1 if report.invalid else 0
+
+
+def import_roster(db, args):
+    report = roster_import.import_roster(
+        db, roster_import.read_roster_rows(args.path), batch_size=args.batch_size
+    )
+    summary = report.to_dict()
+    errors = summary.pop('errors')
+    for name, value in summary.items():
+        print(f"{name}: {value}")
+    for error in errors:
+        print(f"  {error}")
+    return 1 if report.invalid else 0
+
+
+def analyze_items(db, args):
+    summary = item_analysis.analyze_items(
+        db,
+        category_ids=[args.category_id] if args.category_id else None,
+        workers=args.workers,
+        chunk_size=args.chunk_size
+    )
+    for name, value in summary.items():
+        print(f"{name}: {value}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Online Examination System maintenance")
+    parser.add_argument('--db', default=os.environ.get('EXAM_DB_PATH', 'exam_system.db'),
+                        help="database file (default: $EXAM_DB_PATH or exam_system.db)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rollups_parser = subparsers.add_parser(
+        'rebuild-rollups', help="recompute the statistics rollups from exam_results"
+    )
+    rollups_parser.add_argument(
+        '--check', action='store_true', help="exit with status 1 if any rollup had drifted"
+    )
+    rollups_parser.set_defaults(handler=rebuild_rollups)
+
+    leaderboards_parser = subparsers.add_parser(
+        'rebuild-leaderboards', help="recompute the per-category top-K leaderboards from exam_results"
+    )
+    leaderboards_parser.set_defaults(handler=rebuild_leaderboards)
+
+    summaries_parser = subparsers.add_parser(
+        'rebuild-student-summaries', help="recompute the per-student category summaries from exam_results"
+    )
+    summaries_parser.set_defaults(handler=rebuild_student_summaries)
+
+    export_parser = subparsers.add_parser('export', help="stream exam results as CSV or NDJSON")
+    export_parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    export_parser.add_argument('--gzip', action='store_true', help="gzip the output")
+    export_parser.add_argument('-o', '--output', help="output file (default: stdout)")
+    export_parser.add_argument('--chunk-size', type=int, default=1000)
+    export_parser.add_argument('--category-id', type=int)
+    export_parser.add_argument('--student-id')
+    export_parser.add_argument('--date-from', help="YYYY-MM-DD")
+    export_parser.add_argument('--date-to', help="YYYY-MM-DD (inclusive)")
+    export_parser.add_argument('--grade', choices=list(database.GRADE_BANDS))
+    export_parser.set_defaults(handler=export_results)
+
+    import_parser = subparsers.add_parser(
+        'import-questions', help="bulk import questions from CSV, NDJSON or a JSON array"
+    )
+    import_parser.add_argument('path')
+    import_parser.add_argument('--batch-size', type=int, default=5000)
+    import_parser.add_argument(
+        '--no-create-categories', action='store_true', help="reject rows with unknown categories"
+    )
+    import_parser.set_defaults(handler=import_questions)
+
+    roster_parser = subparsers.add_parser(
+        'import-roster', help="bulk upsert students from a CSV or NDJSON roster"
+    )
+    roster_parser.add_argument('path')
+    roster_parser.add_argument('--batch-size', type=int, default=5000)
+    roster_parser.set_defaults(handler=import_roster)
+
+    analysis_parser = subparsers.add_parser(
+        'analyze-items', help="compute difficulty, discrimination and distractor statistics per question"
+    )
+    analysis_parser.add_argument('--category-id', type=int, help="analyse one category (default: all)")
+    analysis_parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    analysis_parser.add_argument('--chunk-size', type=int, default=50000, help="answer rows per matrix chunk")
+    analysis_parser.set_defaults(handler=analyze_items)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    db = database.ExamDatabase(args.db)
+    return args.handler(db, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Versioned schema migrations for the Online Examination System
+
+The schema version lives in PRAGMA user_version. Each migration is a
+(version, description, steps) tuple where a step is either an SQL string or a
+callable taking a cursor. Migrations run in order inside one transaction each,
+so existing exam_system.db files are upgraded in place.
+"""
+import logging
+
+import autosave
+import latest_attempts
+import leaderboards
+import rollups
+import student_summaries
+from question_import import question_hash
+
+logger = logging.getLogger(__name__)
+
+
+def _backfill_question_hashes(cursor):
+    """Hash existing questions; later copies of the same content keep a NULL hash"""
+    seen = set()
+    rows = cursor.execute(
+        'SELECT id, question_text, option_a, option_b, option_c, option_d FROM questions ORDER BY id'
+    ).fetchall()
+    updates = []
+    for row in rows:
+        content_hash = question_hash(*row[1:])
+        if content_hash not in seen:
+            seen.add(content_hash)
+            updates.append((content_hash, row[0]))
+    cursor.executemany('UPDATE questions SET content_hash = ? WHERE id = ?', updates)
+
+
+def _require_time_taken(cursor):
+    """Rebuild exam_results with time_taken NOT NULL, storing missing times as 0"""
+    indexes = [row[0] for row in cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'exam_results' AND sql IS NOT NULL"
+    ).fetchall()]
+    sequence = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'exam_results'").fetchone()
+    cursor.execute('''
+        CREATE TABLE exam_results_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            percentage REAL NOT NULL,
+            time_taken INTEGER NOT NULL DEFAULT 0,
+            submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES students (id),
+            FOREIGN KEY (category_id) REFERENCES categories (id)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO exam_results_new
+            (id, student_id, category_id, score, total_questions, percentage, time_taken, submitted_at)
+        SELECT id, student_id, category_id, score, total_questions, percentage,
+               COALESCE(time_taken, 0), submitted_at
+        FROM exam_results
+    ''')
+    cursor.execute('DROP TABLE exam_results')
+    cursor.execute('ALTER TABLE exam_results_new RENAME TO exam_results')
+    for sql in indexes:
+        cursor.execute(sql)
+    if sequence is not None:
+        # Keep ids of deleted results from being reused
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'exam_results'", sequence)
+
+
+def _backfill_category_question_hashes(cursor):
+    """Hash questions left without one that are the first copy of their content in their category"""
+    seen = set(cursor.execute(
+        'SELECT category_id, content_hash FROM questions WHERE content_hash IS NOT NULL'
+    ).fetchall())
+    rows = cursor.execute('''
+        SELECT id, category_id, question_text, option_a, option_b, option_c, option_d
+        FROM questions WHERE content_hash IS NULL ORDER BY id
+    ''').fetchall()
+    updates = []
+    for row in rows:
+        key = (row[1], question_hash(*row[2:]))
+        if key not in seen:
+            seen.add(key)
+            updates.append((key[1], row[0]))
+    cursor.executemany('UPDATE questions SET content_hash = ? WHERE id = ?', updates)
+
+
+MIGRATIONS = [
+    (1, 'Add indexes for question, student and results history lookups', [
+        'CREATE INDEX IF NOT EXISTS idx_questions_category ON questions (category_id, id)',
+        'CREATE INDEX IF NOT EXISTS idx_results_student ON exam_results (student_id, submitted_at, id)',
+        'CREATE INDEX IF NOT EXISTS idx_results_category ON exam_results (category_id, submitted_at, id)',
+        'CREATE INDEX IF NOT EXISTS idx_results_submitted ON exam_results (submitted_at, id)',
+        'CREATE INDEX IF NOT EXISTS idx_results_percentage ON exam_results (percentage, id)',
+    ]),
+    (2, 'Store submitted answer sheets for re-grading', [
+        '''CREATE TABLE IF NOT EXISTS exam_answers (
+            result_id INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            answer CHAR(1) NOT NULL CHECK (answer IN ('A', 'B', 'C', 'D')),
+            PRIMARY KEY (result_id, question_id),
+            FOREIGN KEY (result_id) REFERENCES exam_results (id),
+            FOREIGN KEY (question_id) REFERENCES questions (id)
+        ) WITHOUT ROWID''',
+    ]),
+    (3, 'Add result rollups for dashboard statistics', [
+        rollups.CREATE_ROLLUPS_TABLE,
+        rollups.rebuild_rollups,
+    ]),
+    (4, 'Add question content hashes for import deduplication', [
+        'ALTER TABLE questions ADD COLUMN content_hash TEXT',
+        _backfill_question_hashes,
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_content_hash ON questions (content_hash)',
+    ]),
+    (5, 'Track each student\'s latest attempt for the homepage feed', [
+        latest_attempts.CREATE_LATEST_ATTEMPTS_TABLE,
+        latest_attempts.CREATE_LATEST_ATTEMPTS_INDEX,
+        latest_attempts.rebuild_latest_attempts,
+    ]),
+    (6, 'Cover the category catalog counts with an index', [
+        'CREATE INDEX IF NOT EXISTS idx_questions_category_difficulty ON questions (category_id, difficulty_level)',
+    ]),
+    (7, 'Autosave answers of exams in progress', [
+        autosave.CREATE_EXAM_ATTEMPTS_TABLE,
+        autosave.CREATE_ATTEMPT_ANSWERS_TABLE,
+    ]),
+    (8, 'Store item analysis statistics per question', [
+        '''CREATE TABLE IF NOT EXISTS question_stats (
+            question_id INTEGER PRIMARY KEY,
+            category_id INTEGER NOT NULL,
+            responses INTEGER NOT NULL,
+            difficulty_index REAL,
+            point_biserial REAL,
+            count_a INTEGER NOT NULL,
+            count_b INTEGER NOT NULL,
+            count_c INTEGER NOT NULL,
+            count_d INTEGER NOT NULL,
+            analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (question_id) REFERENCES questions (id),
+            FOREIGN KEY (category_id) REFERENCES categories (id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_question_stats_category ON question_stats (category_id, question_id)',
+        "INSERT OR IGNORE INTO change_counters (name, version) VALUES ('question_stats', 0)",
+    ]),
+    (9, 'Keep per-category top-K leaderboards', [
+        # Boards rank a missing time as 0; migration 11 makes that the stored value
+        'UPDATE exam_results SET time_taken = 0 WHERE time_taken IS NULL',
+        leaderboards.CREATE_LEADERBOARD_TABLE,
+        leaderboards.CREATE_LEADERBOARD_INDEX,
+        leaderboards.CREATE_RESULTS_RANK_INDEX,
+        leaderboards.rebuild_leaderboards,
+    ]),
+    (10, 'Summarise and cover each student\'s history for the dashboard', [
+        student_summaries.CREATE_STUDENT_SUMMARIES_TABLE,
+        student_summaries.rebuild_student_summaries,
+        # Replaces idx_results_student, which is a prefix of this index
+        '''CREATE INDEX IF NOT EXISTS idx_results_student_history ON exam_results
+           (student_id, submitted_at, id, category_id, score, total_questions, percentage, time_taken)''',
+        'DROP INDEX IF EXISTS idx_results_student',
+    ]),
+    (11, 'Require time_taken and histogram best scores for off-board ranks', [
+        _require_time_taken,
+        leaderboards.CREATE_SCORE_COUNTS_TABLE,
+        leaderboards.rebuild_score_counts,
+    ]),
+    (12, 'Deduplicate imported questions within their category', [
+        'DROP INDEX IF EXISTS idx_questions_content_hash',
+        _backfill_category_question_hashes,
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_category_hash ON questions (category_id, content_hash)',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def get_schema_version(conn):
+    """Get the schema version stored in the database header"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migrations(conn):
+    """Apply every pending migration; returns the list of versions applied"""
+    applied = []
+    for version, description, steps in MIGRATIONS:
+        if get_schema_version(conn) >= version:
+            continue
+
+        # Take the write lock first so concurrent workers migrate only once
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            cursor = conn.cursor()
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        logger.info(f"Applied migration {version}: {description}")
+    return applied
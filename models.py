@@ -1,96 +1,139 @@
 """
 Data models for the Online Examination System
+
+Models are tuple-backed records: each instance *is* the row tuple returned by
+sqlite3, with named read-only accessors and no per-instance __dict__. Queries
+select their columns in FIELDS order so row_factory can wrap the row without
+copying any values.
 """
+from operator import itemgetter
+
+
+class Record(tuple):
+    """Base class for compact, immutable tuple-backed models"""
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for index, field in enumerate(cls.FIELDS):
+            setattr(cls, field, property(itemgetter(index), doc=f"Column {index}: {field}"))
+
+    def __new__(cls, *values, **named):
+        if named:
+            values = values + tuple(named.get(field) for field in cls.FIELDS[len(values):])
+        if len(values) < len(cls.FIELDS):
+            values = values + (None,) * (len(cls.FIELDS) - len(values))
+        return tuple.__new__(cls, values)
+
+    @classmethod
+    def from_row(cls, row):
+        """Wrap a row tuple whose columns are in FIELDS order"""
+        return tuple.__new__(cls, row)
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """sqlite3 row_factory building this model directly from the row tuple"""
+        return tuple.__new__(cls, row)
 
-class Student:
-    def __init__(self, db_id, student_id, full_name, email=None):
-        self.db_id = db_id
-        self.student_id = student_id
-        self.full_name = full_name
-        self.email = email
-    
-    def to_dict(self):
-        return {
-            'db_id': self.db_id,
-            'student_id': self.student_id,
-            'full_name': self.full_name,
-            'email': self.email
-        }
-
-class Category:
-    def __init__(self, db_id, name, description=None):
-        self.db_id = db_id
-        self.name = name
-        self.description = description
-    
-    def to_dict(self):
-        return {
-            'db_id': self.db_id,
-            'name': self.name,
-            'description': self.description
-        }
-
-class Question:
-    def __init__(self, db_id, question_text, option_a, option_b, option_c, option_d, 
-                 correct_answer, category_id, category_name=None, difficulty_level='Medium'):
-        self.db_id = db_id
-        self.question_text = question_text
-        self.option_a = option_a
-        self.option_b = option_b
-        self.option_c = option_c
-        self.option_d = option_d
-        self.correct_answer = correct_answer
-        self.category_id = category_id
-        self.category_name = category_name
-        self.difficulty_level = difficulty_level
-    
-    def to_dict(self):
-        return {
-            'db_id': self.db_id,
-            'question_text': self.question_text,
-            'option_a': self.option_a,
-            'option_b': self.option_b,
-            'option_c': self.option_c,
-            'option_d': self.option_d,
-            'correct_answer': self.correct_answer,
-            'category_id': self.category_id,
-            'category_name': self.category_name,
-            'difficulty_level': self.difficulty_level
-        }
-
-class ExamResult:
-    def __init__(self, db_id, student_db_id, category_db_id, score, total_questions, 
-                 percentage, time_taken, submitted_at, student_name=None, student_id=None, category_name=None):
-        self.db_id = db_id
-        self.student_db_id = student_db_id
-        self.category_db_id = category_db_id
-        self.score = score
-        self.total_questions = total_questions
-        self.percentage = percentage
-        self.time_taken = time_taken
-        self.submitted_at = submitted_at
-        self.student_name = student_name
-        self.student_id = student_id
-        self.category_name = category_name
-    
     def to_dict(self):
-        return {
-            'db_id': self.db_id,
-            'student_db_id': self.student_db_id,
-            'category_db_id': self.category_db_id,
-            'score': self.score,
-            'total_questions': self.total_questions,
-            'percentage': self.percentage,
-            'time_taken': self.time_taken,
-            'submitted_at': self.submitted_at,
-            'student_name': self.student_name,
-            'student_id': self.student_id,
-            'category_name': self.category_name
-        }
-    
-    def get_grade(self):
-        if self.percentage >= 90: return "A"
-        elif self.percentage >= 80: return "B"
-        elif self.percentage >= 70: return "C"
-        elif self.percentage >= 60: return "D"
-        else: return "F"
\ No newline at end of file
+        return dict(zip(self.FIELDS, self))
+
+    @classmethod
+    def to_dicts(cls, records):
+        """Convert many records to dicts"""
+        fields = cls.FIELDS
+        return [dict(zip(fields, record)) for record in records]
+
+    @classmethod
+    def to_columns(cls, records):
+        """Convert many records to a {field: [values]} columnar dict in one transpose"""
+        columns = zip(*records) if records else [()] * len(cls.FIELDS)
+        return {field: list(values) for field, values in zip(cls.FIELDS, columns)}
+
+    def __repr__(self):
+        values = ', '.join(f'{field}={value!r}' for field, value in zip(self.FIELDS, self))
+        return f'{type(self).__name__}({values})'
+
+
+class Student(Record):
+    __slots__ = ()
+    FIELDS = ('db_id', 'student_id', 'full_name', 'email')
+
+    # Columns to SELECT from students for from_row
+    COLUMNS = 'id, student_id, full_name, email'
+
+
+class Category(Record):
+    __slots__ = ()
+    FIELDS = ('db_id', 'name', 'description')
+
+    COLUMNS = 'id, name, description'
+
+
+class CategorySummary(Record):
+    """A category with its question count and per-difficulty breakdown"""
+    __slots__ = ()
+    FIELDS = ('db_id', 'name', 'description', 'question_count',
+              'easy_count', 'medium_count', 'hard_count')
+
+    @property
+    def difficulty_breakdown(self):
+        """Question counts as an {'Easy': n, 'Medium': n, 'Hard': n} dict"""
+        return {'Easy': self[4], 'Medium': self[5], 'Hard': self[6]}
+
+
+class Question(Record):
+    __slots__ = ()
+    FIELDS = ('db_id', 'question_text', 'option_a', 'option_b', 'option_c', 'option_d',
+              'correct_answer', 'category_id', 'category_name', 'difficulty_level')
+
+    # Columns to SELECT from questions q JOIN categories c for from_row
+    COLUMNS = ('q.id, q.question_text, q.option_a, q.option_b, q.option_c, q.option_d, '
+               'q.correct_answer, q.category_id, c.name, q.difficulty_level')
+
+    @property
+    def options(self):
+        """The four options as an {'A': text, ...} dict"""
+        return {'A': self[2], 'B': self[3], 'C': self[4], 'D': self[5]}
+
+
+class QuestionStats(Record):
+    """Item analysis statistics of one question (see item_analysis.py)"""
+    __slots__ = ()
+    FIELDS = ('question_id', 'category_id', 'responses', 'difficulty_index', 'point_biserial',
+              'count_a', 'count_b', 'count_c', 'count_d', 'analyzed_at')
+
+    COLUMNS = ('question_id, category_id, responses, difficulty_index, point_biserial, '
+               'count_a, count_b, count_c, count_d, analyzed_at')
+
+    @property
+    def option_frequencies(self):
+        """Share of responses choosing each option as an {'A': fraction, ...} dict"""
+        responses = self[2] or 1
+        return {'A': self[5] / responses, 'B': self[6] / responses,
+                'C': self[7] / responses, 'D': self[8] / responses}
+
+
+class LeaderboardEntry(Record):
+    """A student's best result on a category leaderboard"""
+    __slots__ = ()
+    FIELDS = ('rank', 'result_id', 'student_db_id', 'student_id', 'student_name',
+              'percentage', 'time_taken', 'submitted_at')
+
+
+class StudentCategorySummary(Record):
+    """A student's attempts, best and average percentage in one category"""
+    __slots__ = ()
+    FIELDS = ('category_id', 'category_name', 'attempts', 'best_percentage',
+              'average_percentage', 'last_submitted_at')
+
+
+class ExamResult(Record):
+    __slots__ = ()
+    FIELDS = ('db_id', 'student_db_id', 'category_db_id', 'score', 'total_questions',
+              'percentage', 'time_taken', 'submitted_at', 'student_name', 'student_id', 'category_name')
+
+    # Columns to SELECT from exam_results er JOIN students s JOIN categories c for from_row
+    COLUMNS = ('er.id, er.student_id, er.category_id, er.score, er.total_questions, '
+               'er.percentage, er.time_taken, er.submitted_at, s.full_name, s.student_id, c.name')
@@ -0,0 +1,118 @@
+"""
+Bulk question-bank import for the Online Examination System
+
+Questions are streamed from CSV, NDJSON or JSON-array files, validated,
+deduplicated within their category by a content hash of the question and its
+options, and inserted in large executemany transactions.
+
+Expected fields: question_text, option_a, option_b, option_c, option_d,
+correct_answer (A-D), category (name) and optional difficulty_level.
+"""
+import hashlib
+
+from bulk_import import ImportReport, read_rows
+
+DIFFICULTY_LEVELS = ('Easy', 'Medium', 'Hard')
+REQUIRED_FIELDS = ('question_text', 'option_a', 'option_b', 'option_c', 'option_d',
+                   'correct_answer', 'category')
+
+
+def question_hash(question_text, option_a, option_b, option_c, option_d):
+    """Content hash of a question and its options, ignoring case and spacing"""
+    parts = [' '.join(str(part).split()).casefold()
+             for part in (question_text, option_a, option_b, option_c, option_d)]
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def read_question_rows(path):
+    """Stream question dicts from a .csv, .ndjson/.jsonl or .json file"""
+    return read_rows(path, 'question')
+
+
+def validate_question(row):
+    """Normalize one input row; raises ValueError if it is invalid"""
+    if not isinstance(row, dict):
+        raise ValueError(f"expected an object, got {type(row).__name__}")
+    missing = [field for field in REQUIRED_FIELDS if not str(row.get(field) or '').strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    correct_answer = str(row['correct_answer']).strip().upper()
+    if correct_answer not in ('A', 'B', 'C', 'D'):
+        raise ValueError(f"correct_answer must be A-D, got {row['correct_answer']!r}")
+
+    difficulty = str(row.get('difficulty_level') or row.get('difficulty') or 'Medium').strip().title()
+    if difficulty not in DIFFICULTY_LEVELS:
+        raise ValueError(f"difficulty_level must be one of {', '.join(DIFFICULTY_LEVELS)}")
+
+    text, a, b, c, d = (str(row[field]).strip() for field in REQUIRED_FIELDS[:5])
+    return {
+        'question_text': text,
+        'option_a': a,
+        'option_b': b,
+        'option_c': c,
+        'option_d': d,
+        'correct_answer': correct_answer,
+        'category': str(row['category']).strip(),
+        'difficulty_level': difficulty,
+        'content_hash': question_hash(text, a, b, c, d)
+    }
+
+
+def import_questions(db, rows, batch_size=5000, create_categories=True):
+    """Validate, deduplicate and bulk insert question rows.
+
+    rows is any iterable of dicts (e.g. read_question_rows(path)). Unknown
+    categories are created when create_categories is True, otherwise those
+    rows are rejected. Returns an ImportReport.
+    """
+    report = ImportReport('inserted', 'duplicates', 'invalid', 'categories_created')
+    category_ids = {category.name: category.db_id for category in db.get_all_categories()}
+    seen = set()
+    batch = []
+
+    def flush():
+        inserted = db.bulk_insert_questions(batch)
+        report.inserted += inserted
+        report.duplicates += len(batch) - inserted
+        batch.clear()
+
+    for line_number, row in enumerate(rows, start=1):
+        report.rows_read += 1
+        try:
+            question = validate_question(row)
+            category_id = category_ids.get(question['category'])
+            if category_id is None:
+                if not create_categories:
+                    raise ValueError(f"unknown category {question['category']!r}")
+                category_id, created = db.get_or_create_category(question['category'])
+                category_ids[question['category']] = category_id
+                report.categories_created += created
+        except ValueError as e:
+            report.reject(line_number, e)
+            continue
+
+        # Duplicates inside the file never reach the database
+        key = (category_id, question['content_hash'])
+        if key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+
+        batch.append((
+            question['question_text'],
+            question['option_a'],
+            question['option_b'],
+            question['option_c'],
+            question['option_d'],
+            question['correct_answer'],
+            category_id,
+            question['difficulty_level'],
+            question['content_hash']
+        ))
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    return report.finish()
@@ -0,0 +1,163 @@
+"""
+Per-rerun profiling for the Streamlit pages of the Online Examination System
+
+Enabled with EXAM_PROFILE_RERUNS=1. Every rerun is timed and attributed to
+the page function that handled it; fragment reruns are attributed to the
+fragment. The time is split into database time (from
+the query instrumentation) and render time (everything else the script did).
+cProfile output of the slowest reruns is kept as .prof files in
+EXAM_PROFILE_DIR, next to a summary.json of p50/p99 rerun latency per page.
+"""
+import cProfile
+import heapq
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+# Recent reruns kept per page for the percentiles
+MAX_SAMPLES_PER_PAGE = 1000
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class RerunProfiler:
+    """Process-wide collector of rerun timings shared by every session"""
+
+    def __init__(self, db, output_dir, keep_slowest=10, report_every=50):
+        self.db = db
+        self.output_dir = output_dir
+        self.keep_slowest = keep_slowest
+        self.report_every = report_every
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._slowest = []  # min-heap of (seconds, sequence, page, path)
+        self._sequence = itertools.count()
+        self._reruns = 0
+        self._local = threading.local()
+
+    def _db_seconds(self):
+        if self.db.instrumentation is None:
+            return 0.0
+        return self.db.instrumentation.thread_seconds()
+
+    def run(self, page, name=None):
+        """Run one page function as a profiled rerun, recorded as name (default: the function's name).
+
+        A run nested in another on the same thread, such as a fragment drawn
+        by a full rerun of its page, is timed as part of the outer rerun.
+        """
+        if getattr(self._local, 'running', False):
+            page()
+            return
+        self._local.running = True
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            profile = None  # another profiler is active on this interpreter
+
+        db_started = self._db_seconds()
+        started = time.perf_counter()
+        try:
+            page()
+        finally:
+            # st.rerun() and st.stop() end a page with an exception, so record here
+            elapsed = time.perf_counter() - started
+            db_seconds = self._db_seconds() - db_started
+            if profile is not None:
+                profile.disable()
+            self._local.running = False
+            self._record(name or page.__name__, elapsed, db_seconds, profile)
+
+    def _record(self, page, seconds, db_seconds, profile):
+        with self._lock:
+            samples = self._samples.get(page)
+            if samples is None:
+                samples = self._samples[page] = deque(maxlen=MAX_SAMPLES_PER_PAGE)
+            samples.append((seconds, db_seconds))
+            self._reruns += 1
+            report_due = self._reruns % self.report_every == 0
+
+            keep = profile is not None and (
+                len(self._slowest) < self.keep_slowest or seconds > self._slowest[0][0]
+            )
+            if keep:
+                sequence = next(self._sequence)
+                path = os.path.join(self.output_dir, f'{page}-{seconds * 1000:.0f}ms-{sequence}.prof')
+                entry = (seconds, sequence, page, path)
+                if len(self._slowest) < self.keep_slowest:
+                    heapq.heappush(self._slowest, entry)
+                    evicted = None
+                else:
+                    evicted = heapq.heapreplace(self._slowest, entry)
+
+        if keep:
+            profile.dump_stats(path)
+            if evicted is not None and os.path.exists(evicted[3]):
+                os.remove(evicted[3])
+        if report_due:
+            self.write_summary()
+
+    def summary(self):
+        """p50/p99 rerun, database and render latency per page, in milliseconds"""
+        with self._lock:
+            samples = {page: list(values) for page, values in self._samples.items()}
+            slowest = sorted(self._slowest, reverse=True)
+
+        pages = {}
+        for page, values in samples.items():
+            totals = sorted(seconds for seconds, _ in values)
+            db_times = sorted(db_seconds for _, db_seconds in values)
+            renders = sorted(seconds - db_seconds for seconds, db_seconds in values)
+            pages[page] = {
+                'reruns': len(values),
+                'p50_ms': round(percentile(totals, 0.50) * 1000, 2),
+                'p99_ms': round(percentile(totals, 0.99) * 1000, 2),
+                'db_p50_ms': round(percentile(db_times, 0.50) * 1000, 2),
+                'db_p99_ms': round(percentile(db_times, 0.99) * 1000, 2),
+                'render_p50_ms': round(percentile(renders, 0.50) * 1000, 2),
+                'render_p99_ms': round(percentile(renders, 0.99) * 1000, 2)
+            }
+        return {
+            'pages': pages,
+            'slowest_profiles': [
+                {'page': page, 'ms': round(seconds * 1000, 2), 'path': path}
+                for seconds, _, page, path in slowest
+            ]
+        }
+
+    def write_summary(self):
+        """Write summary() to summary.json in the output directory"""
+        with open(os.path.join(self.output_dir, 'summary.json'), 'w') as handle:
+            json.dump(self.summary(), handle, indent=2)
+
+
+def get_profiler(db):
+    """The shared RerunProfiler, or None unless EXAM_PROFILE_RERUNS=1"""
+    global _profiler
+    if os.environ.get('EXAM_PROFILE_RERUNS') != '1':
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = RerunProfiler(
+                db,
+                os.environ.get('EXAM_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'exam_profiles')),
+                keep_slowest=int(os.environ.get('EXAM_PROFILE_KEEP', 10)),
+                report_every=int(os.environ.get('EXAM_PROFILE_REPORT_EVERY', 50))
+            )
+        return _profiler
@@ -0,0 +1,89 @@
+"""
+Aggregate rollups of exam results for the dashboard statistics
+
+result_rollups keeps one row per scope key (overall, per category and per
+day) with the exam count, percentage sum and maximum, and pass count. Rows are
+updated in the same transaction that inserts the results, so the statistics
+cards read a single row instead of aggregating the whole results table.
+"""
+
+PASS_PERCENTAGE = 60
+
+# Rollup scopes and the expression that gives each result's key in that scope
+ROLLUP_SCOPES = {
+    'overall': "''",
+    'category': 'CAST(category_id AS TEXT)',
+    'day': 'date(submitted_at)'
+}
+
+CREATE_ROLLUPS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS result_rollups (
+        scope TEXT NOT NULL,
+        scope_key TEXT NOT NULL,
+        exam_count INTEGER NOT NULL DEFAULT 0,
+        percentage_sum REAL NOT NULL DEFAULT 0,
+        percentage_max REAL,
+        pass_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (scope, scope_key)
+    ) WITHOUT ROWID
+'''
+
+
+def _rollup_select(scope, where=''):
+    """SELECT producing rollup rows for one scope from exam_results"""
+    key = ROLLUP_SCOPES[scope]
+    return f'''
+        SELECT '{scope}', {key}, COUNT(*), SUM(percentage), MAX(percentage),
+               SUM(percentage >= {PASS_PERCENTAGE})
+        FROM exam_results
+        {where}
+        GROUP BY {key}
+    '''
+
+
+def apply_rollups(cursor, first_result_id, last_result_id):
+    """Fold a contiguous range of newly inserted results into the rollups"""
+    for scope in ROLLUP_SCOPES:
+        cursor.execute(f'''
+            INSERT INTO result_rollups
+                (scope, scope_key, exam_count, percentage_sum, percentage_max, pass_count)
+            {_rollup_select(scope, 'WHERE id BETWEEN ? AND ?')}
+            ON CONFLICT (scope, scope_key) DO UPDATE SET
+                exam_count = exam_count + excluded.exam_count,
+                percentage_sum = percentage_sum + excluded.percentage_sum,
+                percentage_max = MAX(percentage_max, excluded.percentage_max),
+                pass_count = pass_count + excluded.pass_count
+        ''', (first_result_id, last_result_id))
+
+
+def rebuild_rollups(cursor):
+    """Recompute every rollup from exam_results; returns the number of rows that differed"""
+    cursor.execute('DROP TABLE IF EXISTS temp.fresh_rollups')
+    cursor.execute('''
+        CREATE TEMP TABLE fresh_rollups AS
+        SELECT * FROM result_rollups WHERE 0
+    ''')
+    for scope in ROLLUP_SCOPES:
+        cursor.execute(f'INSERT INTO temp.fresh_rollups {_rollup_select(scope)}')
+
+    # Rows present on only one side (or with different values) are drift;
+    # sums are rounded so float accumulation order does not count as drift
+    columns = 'scope, scope_key, exam_count, ROUND(percentage_sum, 6), percentage_max, pass_count'
+    mismatched = cursor.execute(f'''
+        SELECT COUNT(*) FROM (
+            SELECT * FROM (
+                SELECT {columns} FROM result_rollups
+                EXCEPT SELECT {columns} FROM temp.fresh_rollups
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT {columns} FROM temp.fresh_rollups
+                EXCEPT SELECT {columns} FROM result_rollups
+            )
+        )
+    ''').fetchone()[0]
+
+    cursor.execute('DELETE FROM result_rollups')
+    cursor.execute('INSERT INTO result_rollups SELECT * FROM temp.fresh_rollups')
+    cursor.execute('DROP TABLE temp.fresh_rollups')
+    return mismatched
@@ -0,0 +1,61 @@
+"""
+Bulk student roster import for the Online Examination System
+
+Rosters are streamed from CSV (or NDJSON) files, validated and upserted into
+students in large executemany transactions. Each batch's database ids are
+read back in one statement and kept in the student id cache, so registering
+on exam day needs no database round trip.
+
+Expected fields: student_id, full_name and optional email.
+"""
+from bulk_import import ImportReport, read_rows
+
+REQUIRED_FIELDS = ('student_id', 'full_name')
+
+
+def read_roster_rows(path):
+    """Stream student dicts from a .csv or .ndjson/.jsonl file"""
+    return read_rows(path, 'roster', json_array=False)
+
+
+def validate_student(row):
+    """Normalize one roster row to (student_id, full_name, email); raises ValueError"""
+    missing = [field for field in REQUIRED_FIELDS if not str(row.get(field) or '').strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    email = str(row.get('email') or '').strip() or None
+    if email is not None and '@' not in email:
+        raise ValueError(f"invalid email {email!r}")
+    return str(row['student_id']).strip(), ' '.join(str(row['full_name']).split()), email
+
+
+def import_roster(db, rows, batch_size=5000):
+    """Validate and upsert roster rows in batches; returns an ImportReport.
+
+    Existing students (matched on student_id) get their name and, when
+    given, email updated. A student repeated in the file counts once, with
+    its last row winning.
+    """
+    report = ImportReport('created', 'updated', 'invalid')
+    batch = {}
+
+    def flush():
+        ids, created = db.bulk_upsert_students(list(batch.values()))
+        report.created += created
+        report.updated += len(ids) - created
+        batch.clear()
+
+    for line_number, row in enumerate(rows, start=1):
+        report.rows_read += 1
+        try:
+            student = validate_student(row)
+        except ValueError as e:
+            report.reject(line_number, e)
+            continue
+        batch[student[0]] = student
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    return report.finish()
@@ -0,0 +1,58 @@
+"""
+Per-student, per-category summaries for the student history dashboard
+
+student_category_summaries keeps one row per (student, category) with the
+attempt count, percentage sum and best percentage, and the time of the latest
+attempt. Rows are updated in the same transaction that inserts the results, so
+a student's dashboard reads its own few rows instead of aggregating their
+whole history.
+"""
+
+CREATE_STUDENT_SUMMARIES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS student_category_summaries (
+        student_id INTEGER NOT NULL,
+        category_id INTEGER NOT NULL,
+        attempts INTEGER NOT NULL,
+        percentage_sum REAL NOT NULL,
+        best_percentage REAL NOT NULL,
+        last_submitted_at TIMESTAMP,
+        PRIMARY KEY (student_id, category_id),
+        FOREIGN KEY (student_id) REFERENCES students (id),
+        FOREIGN KEY (category_id) REFERENCES categories (id)
+    ) WITHOUT ROWID
+'''
+
+
+def _summary_select(where=''):
+    """SELECT producing summary rows from exam_results"""
+    return f'''
+        SELECT student_id, category_id, COUNT(*), SUM(percentage), MAX(percentage), MAX(submitted_at)
+        FROM exam_results
+        {where}
+        GROUP BY student_id, category_id
+    '''
+
+
+def apply_student_summaries(cursor, first_result_id, last_result_id):
+    """Fold a contiguous range of newly inserted results into the student summaries"""
+    cursor.execute(f'''
+        INSERT INTO student_category_summaries
+            (student_id, category_id, attempts, percentage_sum, best_percentage, last_submitted_at)
+        {_summary_select('WHERE id BETWEEN ? AND ?')}
+        ON CONFLICT (student_id, category_id) DO UPDATE SET
+            attempts = attempts + excluded.attempts,
+            percentage_sum = percentage_sum + excluded.percentage_sum,
+            best_percentage = MAX(best_percentage, excluded.best_percentage),
+            last_submitted_at = MAX(last_submitted_at, excluded.last_submitted_at)
+    ''', (first_result_id, last_result_id))
+
+
+def rebuild_student_summaries(cursor):
+    """Recompute every student summary from exam_results; returns the row count"""
+    cursor.execute('DELETE FROM student_category_summaries')
+    cursor.execute(f'''
+        INSERT INTO student_category_summaries
+            (student_id, category_id, attempts, percentage_sum, best_percentage, last_submitted_at)
+        {_summary_select()}
+    ''')
+    return cursor.rowcount
@@ -0,0 +1,209 @@
+"""
+Group-commit write-behind queue for exam submissions
+
+When a timed exam ends every student submits within seconds. Instead of one
+fsync'd transaction per submission, SubmissionWriter collects submissions on
+a bounded queue and a single background thread writes them in batches, so many
+submissions share one commit. A submission is either a graded result (submit)
+or an autosaved exam attempt for the database to grade (submit_attempt).
+
+Each submission gets a Future that resolves only after its batch has
+committed. Connections run with synchronous=FULL by default, so that commit is
+fsync'd and a resolved Future means the result is durable; with
+EXAM_DB_SYNCHRONOUS=NORMAL it only means the result is visible.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Wakes the writer thread when the queue is closed
+_STOP = object()
+
+# Seconds a caller waits for its submission to be committed
+SUBMIT_ACK_TIMEOUT = 30
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class SubmissionWriter:
+    """Background writer that group-commits exam results"""
+
+    def __init__(self, db, max_queue=1000, max_batch=200, max_delay=0.02, put_timeout=5.0):
+        self.db = db
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.put_timeout = put_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._closed = False
+        # Held while checking _closed and enqueueing, so nothing is queued after close()
+        self._put_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'committed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'batches': 0,
+            'max_batch_size': 0,
+            'max_queue_depth': 0,
+        }
+        self._histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def start(self):
+        """Start the writer thread and flush the queue at interpreter exit"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name='submission-writer', daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def submit(self, result, answers=None):
+        """Queue one result and its answer sheet; returns a Future for its result id.
+
+        Blocks for up to put_timeout seconds while the queue is full, then
+        raises queue.Full so callers see backpressure instead of unbounded memory.
+        """
+        return self._put('result', (result, answers))
+
+    def submit_attempt(self, attempt_id, time_taken, pending):
+        """Queue an attempt to grade, with its buffered answer changes; returns a Future.
+
+        The Future resolves to submit_attempts()'s (result_id, score,
+        total_questions, percentage) for the attempt.
+        """
+        return self._put('attempt', (attempt_id, time_taken, pending))
+
+    def _put(self, kind, payload):
+        future = Future()
+        try:
+            with self._put_lock:
+                if self._closed:
+                    raise RuntimeError("Submission queue is closed")
+                self._queue.put((kind, payload, future), timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise
+        with self._lock:
+            self._stats['submitted'] += 1
+            depth = self._queue.qsize()
+            if depth > self._stats['max_queue_depth']:
+                self._stats['max_queue_depth'] = depth
+        return future
+
+    def _collect_batch(self, first):
+        """Gather up to max_batch items, waiting at most max_delay for more"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        # Once stopping, drain what was queued before close() and exit
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            if item is not _STOP:
+                self._write_batch(self._collect_batch(item))
+
+    def _write_batch(self, batch):
+        """Commit the results and the attempts of one batch, resolving their futures"""
+        results = [(payload, future) for kind, payload, future in batch if kind == 'result']
+        attempts = [(payload, future) for kind, payload, future in batch if kind == 'attempt']
+        if results:
+            self._commit(results, lambda payloads: self.db.save_exam_results(
+                [result for result, _ in payloads], [answers for _, answers in payloads]
+            ))
+        if attempts:
+            self._commit(attempts, self.db.submit_attempts)
+
+    def _commit(self, batch, write):
+        """Write (payload, future) pairs with write(payloads) in one transaction"""
+        try:
+            outcomes = write([payload for payload, _ in batch])
+        except Exception as e:
+            logger.error(f"Error saving exam submission batch: {e}")
+            with self._lock:
+                self._stats['failed'] += len(batch)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self._stats['committed'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['max_batch_size'] = max(self._stats['max_batch_size'], len(batch))
+            for index, bound in enumerate(BATCH_SIZE_BUCKETS):
+                if len(batch) <= bound:
+                    self._histogram[index] += 1
+                    break
+            else:
+                self._histogram[-1] += 1
+        for (_, future), outcome in zip(batch, outcomes):
+            future.set_result(outcome)
+
+    def close(self, timeout=30.0):
+        """Stop accepting submissions and flush everything already queued.
+
+        Submissions still queued when the writer stops (or never started)
+        fail instead of leaving their callers waiting.
+        """
+        with self._put_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._stopping.set()
+        if self._thread is not None:
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                pass  # the writer is busy and sees _stopping once the queue drains
+            self._thread.join(timeout)
+        error = RuntimeError("Submission queue closed before the submission was written")
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                with self._lock:
+                    self._stats['failed'] += 1
+                item[2].set_exception(error)
+
+    def stats(self):
+        """Snapshot of queue depth and batch-size metrics"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            histogram = list(self._histogram)
+        snapshot['queue_depth'] = self._queue.qsize()
+        snapshot['average_batch_size'] = (
+            snapshot['committed'] / snapshot['batches'] if snapshot['batches'] else 0.0
+        )
+        labels = [f'<={bound}' for bound in BATCH_SIZE_BUCKETS] + [f'>{BATCH_SIZE_BUCKETS[-1]}']
+        snapshot['batch_size_histogram'] = dict(zip(labels, histogram))
+        return snapshot
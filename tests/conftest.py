@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh, seeded ExamDatabase in a temporary file"""
+    exam_db = database.ExamDatabase(str(tmp_path / 'exam.db'))
+    exam_db.ensure_initialized()
+    yield exam_db
+    if exam_db.submission_writer is not None:
+        exam_db.submission_writer.close()
+    if exam_db.answer_buffer is not None:
+        exam_db.answer_buffer.close()
+    exam_db.pool.close_all()
+
+
+def execute(db, sql, params=()):
+    """Run one write statement outside ExamDatabase, as another process would"""
+    conn = db.get_connection()
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,56 @@
+from conftest import execute
+
+
+def test_grading_uses_an_updated_answer_key(db):
+    category_id = db.get_all_categories()[0].db_id
+    question = db.get_questions_by_category(category_id)[0]
+    student_db_id = db.register_student('CACHE1', 'Cache Student')
+    attempt_id = db.start_attempt(student_db_id, category_id, [question.db_id])
+    new_answer = 'D' if question.correct_answer != 'D' else 'A'
+    db.record_answers(attempt_id, [(question.db_id, new_answer)])
+
+    # question_cache has just polled the version; the exam index polls on every read,
+    # so it sees the write first and must not reload from question_cache's stale entry
+    db.question_cache.check_interval = 3600
+    db.exam_index_cache.check_interval = 0
+    db.get_questions_by_category(category_id)
+    db.get_exam_questions(category_id, [question.db_id])
+    execute(db, 'UPDATE questions SET correct_answer = ? WHERE id = ?', (new_answer, question.db_id))
+
+    assert db.get_exam_questions(category_id, [question.db_id])[0].correct_answer == new_answer
+    _, score, total_questions, _ = db.submit_attempt(attempt_id, 30)
+    assert (score, total_questions) == (1, 1)
+
+
+def test_question_write_is_seen_after_the_version_check(db):
+    category_id = db.get_all_categories()[0].db_id
+    db.question_cache.check_interval = 0
+    db.catalog_cache.check_interval = 0
+    before = len(db.get_questions_by_category(category_id))
+    catalog_before = {summary.db_id: summary.question_count for summary in db.get_category_catalog()}
+
+    execute(db, '''
+        INSERT INTO questions (question_text, option_a, option_b, option_c, option_d,
+                               correct_answer, category_id, difficulty_level)
+        VALUES ('New?', 'a', 'b', 'c', 'd', 'A', ?, 'Hard')
+    ''', (category_id,))
+
+    assert len(db.get_questions_by_category(category_id)) == before + 1
+    catalog = {summary.db_id: summary.question_count for summary in db.get_category_catalog()}
+    assert catalog[category_id] == catalog_before[category_id] + 1
+
+
+def test_saved_result_invalidates_the_views_it_changes(db):
+    category_id = db.get_all_categories()[0].db_id
+    student_db_id = db.register_student('CACHE2', 'Cache Student')
+    # Warm every cached view first
+    assert db.get_leaderboard(category_id) == ()
+    assert db.get_recent_student_attempts(5) == ()
+    assert db.get_student_dashboard(student_db_id)['summaries'] == ()
+
+    assert db.save_exam_result(student_db_id, category_id, 4, 5, 80.0, 120)
+
+    assert [entry.student_id for entry in db.get_leaderboard(category_id)] == ['CACHE2']
+    assert [result.student_id for result in db.get_recent_student_attempts(5)] == ['CACHE2']
+    summaries = db.get_student_dashboard(student_db_id)['summaries']
+    assert [(summary.attempts, summary.best_percentage) for summary in summaries] == [(1, 80.0)]
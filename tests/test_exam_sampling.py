@@ -0,0 +1,15 @@
+from exam_sampling import UNSPECIFIED_DIFFICULTY, DifficultyIndex, sample_exam
+from models import Question
+
+
+def test_questions_without_a_difficulty_are_sampled():
+    questions = tuple(
+        Question(number, f'Question {number}', 'a', 'b', 'c', 'd', 'A', 1, 'Category', difficulty)
+        for number, difficulty in enumerate(['Easy', None, 'Hard', None, 'Easy', 'Medium'], 1)
+    )
+    index = DifficultyIndex(questions)
+
+    assert index.strata[UNSPECIFIED_DIFFICULTY] == (1, 3)
+    paper = sample_exam(index, 4, seed=7)
+    assert len(paper) == 4
+    assert paper == sample_exam(index, 4, seed=7)
@@ -0,0 +1,52 @@
+import random
+
+import leaderboards
+
+
+def brute_force_ranking(db, category_id):
+    """Student ids by their best result, best first, with a plain ORDER BY over every result"""
+    conn = db.get_connection()
+    try:
+        rows = conn.execute('''
+            SELECT student_id, id FROM exam_results
+            WHERE category_id = ?
+            ORDER BY percentage DESC, time_taken, id
+        ''', (category_id,)).fetchall()
+    finally:
+        conn.close()
+    ranking = {}
+    for student_id, result_id in rows:
+        ranking.setdefault(student_id, result_id)
+    return list(ranking.items())
+
+
+def test_ranks_match_a_brute_force_order_by(db, monkeypatch):
+    # A small board, so most students are ranked off it
+    monkeypatch.setattr(leaderboards, 'LEADERBOARD_SIZE', 5)
+    rng = random.Random(7)
+    categories = [category.db_id for category in db.get_all_categories()[:2]]
+    ids, _ = db.bulk_upsert_students([(f'RANK{number}', f'Rank {number}', None) for number in range(40)])
+    students = list(ids.values())
+    # Few distinct scores and times, so many results tie; some times are missing
+    for _ in range(6):
+        batch = []
+        for _ in range(40):
+            score = rng.randint(0, 5)
+            batch.append((rng.choice(students), rng.choice(categories), score, 5, score * 20.0,
+                          rng.choice([None, 30, 60, 90])))
+        db.save_exam_results(batch)
+
+    for category_id in categories:
+        expected = brute_force_ranking(db, category_id)
+        board = db.get_leaderboard(category_id, 10)
+        assert [entry.result_id for entry in board] == [result_id for _, result_id in expected[:5]]
+        for rank, (student_db_id, result_id) in enumerate(expected, start=1):
+            got = db.get_student_rank(student_db_id, category_id)
+            assert (got['rank'], got['result_id']) == (rank, result_id)
+        assert db.get_student_rank(students[0], 10**6) is None
+
+    # Rebuilding from scratch gives the same ranks
+    db.rebuild_leaderboards()
+    for category_id in categories:
+        for rank, (student_db_id, _) in enumerate(brute_force_ranking(db, category_id), start=1):
+            assert db.get_student_rank(student_db_id, category_id)['rank'] == rank
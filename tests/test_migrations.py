@@ -0,0 +1,100 @@
+import sqlite3
+
+import database
+import migrations
+
+# The schema before any migration: the four original tables, user_version 0
+BASELINE_SCHEMA = '''
+    CREATE TABLE categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE questions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        question_text TEXT NOT NULL,
+        option_a TEXT NOT NULL,
+        option_b TEXT NOT NULL,
+        option_c TEXT NOT NULL,
+        option_d TEXT NOT NULL,
+        correct_answer CHAR(1) NOT NULL CHECK (correct_answer IN ('A', 'B', 'C', 'D')),
+        category_id INTEGER NOT NULL,
+        difficulty_level TEXT DEFAULT 'Medium',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (category_id) REFERENCES categories (id)
+    );
+    CREATE TABLE students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id TEXT UNIQUE NOT NULL,
+        full_name TEXT NOT NULL,
+        email TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE exam_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL,
+        category_id INTEGER NOT NULL,
+        score INTEGER NOT NULL,
+        total_questions INTEGER NOT NULL,
+        percentage REAL NOT NULL,
+        time_taken INTEGER DEFAULT 0,
+        submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (student_id) REFERENCES students (id),
+        FOREIGN KEY (category_id) REFERENCES categories (id)
+    );
+'''
+
+
+def create_baseline_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany('INSERT INTO categories (name, description) VALUES (?, ?)',
+                     [('History', 'Dates'), ('Physics', 'Forces')])
+    question = ('What is 2 + 2?', '3', '4', '5', '6', 'B')
+    conn.executemany('''
+        INSERT INTO questions (question_text, option_a, option_b, option_c, option_d,
+                               correct_answer, category_id, difficulty_level)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [question + (1, 'Easy'), question + (2, 'Easy'), question + (2, None)])
+    conn.executemany('INSERT INTO students (student_id, full_name) VALUES (?, ?)',
+                     [('OLD1', 'Old One'), ('OLD2', 'Old Two')])
+    conn.executemany('''
+        INSERT INTO exam_results (student_id, category_id, score, total_questions, percentage, time_taken)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [(1, 1, 1, 2, 50.0, None), (2, 1, 2, 2, 100.0, 90), (1, 1, 2, 2, 100.0, 60), (2, 2, 1, 1, 100.0, None)])
+    conn.commit()
+    conn.close()
+
+
+def test_baseline_database_is_migrated_in_place(tmp_path):
+    path = str(tmp_path / 'baseline.db')
+    create_baseline_db(path)
+
+    db = database.ExamDatabase(path)
+    db.ensure_initialized()
+    try:
+        conn = db.get_connection()
+        try:
+            assert migrations.get_schema_version(conn) == migrations.LATEST_VERSION
+            # Existing data is kept and nothing is seeded on top of it
+            assert conn.execute('SELECT COUNT(*) FROM categories').fetchone()[0] == 2
+            assert conn.execute('SELECT COUNT(*) FROM questions').fetchone()[0] == 3
+            assert conn.execute('SELECT COUNT(*) FROM exam_results WHERE time_taken IS NULL').fetchone()[0] == 0
+            # The copy in a second category keeps its hash; the repeat within one does not
+            hashed = conn.execute(
+                'SELECT category_id, COUNT(content_hash) FROM questions GROUP BY category_id ORDER BY category_id'
+            ).fetchall()
+            assert [tuple(row) for row in hashed] == [(1, 1), (2, 1)]
+            assert migrations.apply_migrations(conn) == []
+        finally:
+            conn.close()
+
+        board = db.get_leaderboard(1)
+        assert [(entry.student_id, entry.time_taken) for entry in board] == [('OLD1', 60), ('OLD2', 90)]
+        assert db.get_student_rank(2, 2)['time_taken'] == 0
+        summaries = {summary.category_id: summary for summary in db.get_student_summaries(1)}
+        assert (summaries[1].attempts, summaries[1].best_percentage) == (2, 100.0)
+        assert [result.student_id for result in db.get_recent_student_attempts(5)] == ['OLD2', 'OLD1']
+    finally:
+        db.pool.close_all()
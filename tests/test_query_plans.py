@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+import check_query_plans
+import database
+
+
+@pytest.fixture
+def plan_db(tmp_path):
+    """A seeded ExamDatabase with one pooled connection, so a trace sees every statement"""
+    exam_db = database.ExamDatabase(str(tmp_path / 'plans.db'), pool_size=1)
+    exam_db.ensure_initialized()
+    yield exam_db
+    exam_db.pool.close_all()
+
+
+def plans_of(db, call):
+    """EXPLAIN QUERY PLAN details of each SELECT run by call()"""
+    statements = []
+    conn = db.get_connection()
+    conn.set_trace_callback(statements.append)
+    conn.close()
+    try:
+        call()
+    finally:
+        conn = db.get_connection()
+        conn.set_trace_callback(None)
+        conn.close()
+    conn = db.get_connection()
+    try:
+        return {
+            statement: [row['detail'] for row in conn.execute(f'EXPLAIN QUERY PLAN {statement}')]
+            for statement in statements if statement.lstrip().upper().startswith('SELECT')
+        }
+    finally:
+        conn.close()
+
+
+def test_no_unexpected_full_scans(plan_db):
+    statements, scans = check_query_plans.find_full_scans(plan_db)
+    assert statements
+    assert scans == []
+
+
+def test_per_request_queries_search_an_index(plan_db):
+    category_id = plan_db.get_all_categories()[0].db_id
+    student_db_id = plan_db.register_student('PLANS1', 'Plan Student')
+    plan_db.save_exam_result(student_db_id, category_id, 3, 5, 60.0, 90)
+    # Off the board, so the rank is counted from the results
+    conn = sqlite3.connect(plan_db.db_name)
+    conn.execute('DELETE FROM leaderboard_entries')
+    conn.commit()
+    conn.close()
+
+    calls = [
+        lambda: plan_db.get_student_rank(student_db_id, category_id),
+        lambda: plan_db._load_leaderboard((category_id, 10)),
+        lambda: plan_db.get_student_results_page(student_db_id, 5, ('2100-01-01', 0)),
+        lambda: plan_db.get_results_page(page_size=5, category_id=category_id),
+    ]
+    for call in calls:
+        plans = plans_of(plan_db, call)
+        assert plans
+        for statement, plan in plans.items():
+            assert any(detail.startswith('SEARCH') for detail in plan), statement
+            assert not any(check_query_plans.FULL_SCAN.match(detail) for detail in plan), (statement, plan)
+
+
+def test_rebuild_methods_are_listed():
+    rebuilds = {name for name in vars(database.ExamDatabase) if name.startswith('rebuild_')}
+    assert rebuilds == set(check_query_plans.REBUILD_METHODS)
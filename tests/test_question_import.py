@@ -0,0 +1,21 @@
+from question_import import import_questions
+
+
+def question(category, text='What is 2 + 2?'):
+    return {'question_text': text, 'option_a': '3', 'option_b': '4', 'option_c': '5', 'option_d': '6',
+            'correct_answer': 'B', 'category': category, 'difficulty_level': 'Easy'}
+
+
+def test_same_question_is_imported_into_each_category(db):
+    report = import_questions(db, [question('Import One'), question('Import Two'), question('Import One')])
+    assert (report.inserted, report.duplicates) == (2, 1)
+
+    # Importing again inserts nothing, in either category
+    report = import_questions(db, [question('Import One'), question('Import Two')])
+    assert (report.inserted, report.duplicates) == (0, 2)
+
+
+def test_rows_that_are_not_objects_are_rejected(db):
+    report = import_questions(db, [['not', 'an', 'object'], question('Import Three'), 'text'])
+    assert (report.inserted, report.invalid) == (1, 2)
+    assert report.errors == ['row 1: expected an object, got list', 'row 3: expected an object, got str']
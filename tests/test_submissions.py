@@ -0,0 +1,71 @@
+from concurrent.futures import Future
+
+import pytest
+
+import database
+from submission_queue import SubmissionWriter
+
+
+def start_graded_attempt(db, student_id):
+    category_id = db.get_all_categories()[0].db_id
+    questions = db.get_questions_by_category(category_id)[:3]
+    student_db_id = db.register_student(student_id, 'Queue Student')
+    attempt_id = db.start_attempt(student_db_id, category_id, [q.db_id for q in questions])
+    # Two right answers and one wrong one
+    answers = [(q.db_id, q.correct_answer) for q in questions[:2]]
+    answers.append((questions[2].db_id, 'D' if questions[2].correct_answer != 'D' else 'A'))
+    db.record_answers(attempt_id, answers)
+    return attempt_id
+
+
+def test_attempt_is_graded_from_its_buffered_answers(db):
+    # With a long flush interval the answers are still buffered when the attempt is submitted
+    db.enable_autosave(flush_interval=3600)
+    attempt_id = start_graded_attempt(db, 'GRADE1')
+    assert db.autosave_stats()['pending'] == 3
+
+    result_id, score, total_questions, percentage = db.submit_attempt(attempt_id, 45)
+    assert (score, total_questions) == (2, 3)
+    assert round(percentage, 2) == 66.67
+    conn = db.get_connection()
+    try:
+        stored = conn.execute('SELECT score, time_taken FROM exam_results WHERE id = ?', (result_id,)).fetchone()
+    finally:
+        conn.close()
+    assert tuple(stored) == (2, 45)
+    assert database.grade_for_percentage(percentage) == 'D'
+
+
+def test_grade_bands_include_their_lower_bound():
+    grades = [database.grade_for_percentage(percentage) for percentage in (100, 90, 89.9, 80, 70, 60, 59.9, 0)]
+    assert grades == ['A', 'A', 'B', 'B', 'C', 'D', 'F', 'F']
+
+
+def test_attempt_submitted_through_the_writer_is_graded(db):
+    attempt_id = start_graded_attempt(db, 'QUEUE1')
+    db.enable_submission_queue()
+
+    _, score, total_questions, _ = db.submit_attempt(attempt_id, 45)
+    assert (score, total_questions) == (2, 3)
+    # Submitting again returns the committed result instead of grading twice
+    assert db.submit_attempt(attempt_id, 45)[1:3] == (2, 3)
+
+
+def test_submit_after_close_raises(db):
+    writer = SubmissionWriter(db)
+    writer.start()
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit_attempt(1, 0, [])
+
+
+def test_close_fails_submissions_the_writer_never_wrote(db):
+    # Never started, so nothing drains the queue: close() must not hang its callers
+    writer = SubmissionWriter(db)
+    future = writer.submit_attempt(start_graded_attempt(db, 'QUEUE2'), 10, [])
+    writer.close(timeout=0.1)
+
+    assert isinstance(future, Future)
+    with pytest.raises(RuntimeError):
+        future.result(timeout=1)
+    assert writer.stats()['failed'] == 1